@@ -0,0 +1,83 @@
+"""Jigsaw-shaped pieces: atlas build time and full-frame draw time.
+
+Compares drawing every piece with source-rect blits from the single atlas
+surface against one alpha-masked surface per piece, with all pieces loose
+on a fullscreen-sized table. The per-piece surfaces are copied out of the
+atlas, so their setup time is a lower bound. Run with: python benchmarks/bench_atlas.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from engine import PuzzleEngine
+from piece_atlas import build_atlas
+
+SCREEN_SIZE = (1920, 1080)
+IMAGE_SIZE = (1400, 1000)
+BORDER_PADDING = 50
+BG_COLOR = (39, 64, 1)
+GRIDS = [(10, 10), (20, 25), (32, 32), (40, 50)]
+FRAMES = 60
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def make_image(screen):
+    rng = random.Random(42)
+    image = pygame.Surface(IMAGE_SIZE, 0, screen)
+    for y in range(0, IMAGE_SIZE[1], 20):
+        for x in range(0, IMAGE_SIZE[0], 20):
+            image.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 20, 20))
+    return image
+
+
+def frame_time(screen, draw):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        screen.fill(BG_COLOR)
+        draw()
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    image = make_image(screen)
+
+    print(f"Image {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}, all pieces loose, {FRAMES} frames")
+    for rows, cols in GRIDS:
+        start = time.perf_counter()
+        atlas = build_atlas(image, rows, cols)
+        build_ms = (time.perf_counter() - start) * 1000
+        atlas.convert()
+
+        engine = PuzzleEngine(rows, cols, *IMAGE_SIZE, BORDER_PADDING)
+        engine.scatter(*SCREEN_SIZE, seed=1)
+        placements = list(enumerate(engine.positions.tolist()))
+
+        # The alternative: a separate masked surface for every piece
+        start = time.perf_counter()
+        separate = [atlas.surface.subsurface(source).copy() for source in atlas.sources]
+        separate_setup_ms = (time.perf_counter() - start) * 1000
+        margin = atlas.margin
+        separate_blits = [(separate[i], (x - margin, y - margin)) for i, (x, y) in placements]
+
+        atlas_ms = frame_time(screen, lambda: atlas.blits(screen, placements))
+        separate_ms = frame_time(screen, lambda: screen.blits(separate_blits, doreturn=False))
+        verdict = "ok" if atlas_ms < FRAME_BUDGET_MS else "over budget"
+        print(
+            f"{rows:>3}x{cols:<3} pieces={rows * cols:>5}  margin={margin:>2}px  build={build_ms:7.1f} ms"
+            f"  atlas={atlas_ms:6.2f} ms/frame  separate={separate_ms:6.2f} ms/frame"
+            f" (+{separate_setup_ms:.1f} ms to copy out)  {verdict}"
+        )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Frame time of a 5,000-piece puzzle on a table larger than the window.
+
+The game is set up with puzzle.py's own functions, half the pieces locked
+on the board. For every zoom level it times a full redraw (the frame after
+a zoom, drawing the pieces on screen from the atlas shrunk to that zoom), a
+pan frame redrawn in full and one scrolled with only the uncovered edge
+drawn, and a drag frame, one piece moving under dirty rendering. The
+baselines draw the whole table at full resolution and shrink it to the
+window every frame (no shrunk pieces), and blit every piece at zoom 1 for
+SDL to clip (no culling). 60 FPS leaves 16.7 ms per frame.
+Run with: python benchmarks/bench_camera.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PUZZLE_IMAGE_CACHE_DIR", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+import puzzle
+
+WINDOW_SIZE = (1920, 1080)
+IMAGE_SIZE = (1600, 900)
+ROWS, COLS = 50, 100
+FRAMES = 60
+PAN_STEP = 20  # Screen pixels the table moves per frame while panning
+
+
+def write_image(path):
+    rng = random.Random(7)
+    image = pygame.Surface(IMAGE_SIZE)
+    for y in range(0, IMAGE_SIZE[1], 20):
+        for x in range(0, IMAGE_SIZE[0], 20):
+            image.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 20, 20))
+    pygame.image.save(image, path)
+
+
+def set_up_game(screen, image_path):
+    puzzle.screen = screen
+    puzzle.WINDOW_WIDTH, puzzle.WINDOW_HEIGHT = WINDOW_SIZE
+    puzzle.ROWS, puzzle.COLS = ROWS, COLS
+    fit = (WINDOW_SIZE[0] - 2 * puzzle.BORDER_PADDING, WINDOW_SIZE[1] - 2 * puzzle.BORDER_PADDING)
+    image, atlas = puzzle.prepare_puzzle_image(image_path, *fit, ROWS, COLS)
+    puzzle.scaled_image = image
+    puzzle.scaled_image_width, puzzle.scaled_image_height = image.get_size()
+    puzzle.border_rect = pygame.Rect(puzzle.BORDER_PADDING, puzzle.BORDER_PADDING, *image.get_size())
+    puzzle.using_saved_data = False
+    puzzle.scatter_rng = random.Random(1)
+    puzzle.generate_pieces(atlas)
+    engine = puzzle.engine
+    half = engine.num_pieces // 2
+    positions = engine.positions.copy()
+    positions[:half] = engine.grid[:half]
+    engine.locked[:half] = True
+    engine.set_positions(positions)
+    puzzle.reset_camera()
+    return engine
+
+
+def full_redraw():
+    puzzle.renderer.reset()
+    puzzle.renderer.set_background(puzzle.build_static_background())
+    pygame.display.update(puzzle.render_game_screen_dirty())
+
+
+def time_frames(frame):
+    frame(0)  # Builds the shrunk pieces of this zoom
+    start = time.perf_counter()
+    for i in range(1, FRAMES + 1):
+        frame(i)
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def drag_frame(engine, x, y):
+    def frame(i):
+        renderer = puzzle.renderer
+        renderer.mark_dirty(puzzle.dragged_rect())
+        engine.drag(x + (5 if i % 2 else 0), y)
+        renderer.mark_dirty(puzzle.dragged_rect())
+        pygame.display.update(puzzle.render_game_screen_dirty())
+    return frame
+
+
+def unscaled_frame(screen, engine):
+    """The whole table drawn at full resolution and shrunk to the window."""
+    table = pygame.Surface((puzzle.camera.table_width, puzzle.camera.table_height), 0, screen)
+    positions = engine.positions.tolist()
+
+    def frame(i):
+        table.fill(puzzle.BG_COLOR)
+        puzzle.pieces.blits(table, [(piece, positions[piece]) for piece in range(engine.num_pieces)])
+        screen.blit(pygame.transform.smoothscale(table, WINDOW_SIZE), (0, 0))
+        pygame.display.update()
+    return frame
+
+
+def unculled_frame(screen, engine):
+    """Every piece blitted at zoom 1, SDL clips the ones off screen."""
+    def frame(i):
+        camera = puzzle.camera
+        camera.pan(1 if i % 2 else -1, 0)
+        screen.fill(puzzle.BG_COLOR)
+        positions = camera.screen_positions(engine.positions)
+        puzzle.pieces.blits(screen, [(piece, positions[piece]) for piece in range(engine.num_pieces)])
+        pygame.display.update()
+    return frame
+
+
+def pan_frame(step, scroll):
+    def frame(i):
+        dx = step if i % 2 else -step
+        if scroll:
+            puzzle.pan_camera(dx, 0)
+        else:
+            puzzle.camera.pan(dx, 0)
+            puzzle.renderer.reset()
+            puzzle.renderer.set_background(puzzle.build_static_background())
+        pygame.display.update(puzzle.render_game_screen_dirty())
+    return frame
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE)
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = os.path.join(work_dir, "image.png")
+        write_image(image_path)
+        engine = set_up_game(screen, image_path)
+    camera = puzzle.camera
+    print(
+        f"{engine.num_pieces} pieces, image {puzzle.scaled_image_width}x{puzzle.scaled_image_height},"
+        f" table {camera.table_width}x{camera.table_height}, window {WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}"
+    )
+    piece = engine.num_pieces - 1
+    for level in range(len(camera.levels) - 1, -1, -1):
+        camera.level = level
+        camera.left = camera.top = 0
+        camera.pan(-10 ** 6, -10 ** 6)  # Bottom right, where loose pieces lie
+        on_screen = len(puzzle.visible_pieces(True)) + len(puzzle.visible_pieces(False))
+        redraw = time_frames(lambda i: full_redraw())
+        line = f"zoom {camera.zoom:5.3f} ({on_screen:>4} pieces on screen): full redraw={redraw:6.2f}"
+        if camera.table_width * camera.zoom > WINDOW_SIZE[0]:
+            redrawn = time_frames(pan_frame(PAN_STEP, scroll=False))
+            scrolled = time_frames(pan_frame(PAN_STEP, scroll=True))
+            line += f"  pan redrawn={redrawn:6.2f} scrolled={scrolled:5.2f}"
+        x, y = engine.positions[piece].tolist()
+        engine.pick(x, y)
+        full_redraw()
+        line += f"  drag={time_frames(drag_frame(engine, x, y)):5.2f} ms/frame"
+        engine.drop()
+        print(line)
+    camera.level = len(camera.levels) - 1
+    print(f"whole table at full resolution, shrunk every frame={time_frames(unscaled_frame(screen, engine)):6.2f} ms/frame")
+    camera.level = 0
+    print(f"zoom 1, every piece blitted and clipped={time_frames(unculled_frame(screen, engine)):6.2f} ms/frame")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Frame time while dragging a 500-piece cluster: per-piece blits vs. a cached cluster surface.
+
+A 40x50 puzzle with jigsaw-shaped pieces, where a 20x25 block of pieces
+has been snapped together and is dragged around the table with the rest
+scattered. Each frame applies the drag to the engine and redraws the dirty
+regions. Run with: python benchmarks/bench_cluster.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+
+from engine import PuzzleEngine
+from piece_atlas import build_atlas
+from renderer import DirtyRectRenderer
+
+SCREEN_SIZE = (1920, 1080)
+IMAGE_SIZE = (1000, 800)
+ROWS, COLS = 40, 50
+CLUSTER_ROWS, CLUSTER_COLS = 20, 25
+BORDER_PADDING = 50
+BG_COLOR = (39, 64, 1)
+FRAMES = 120
+
+
+def make_game(screen):
+    rng = random.Random(42)
+    image = pygame.Surface(IMAGE_SIZE, 0, screen)
+    for y in range(0, IMAGE_SIZE[1], 20):
+        for x in range(0, IMAGE_SIZE[0], 20):
+            image.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 20, 20))
+    atlas = build_atlas(image, ROWS, COLS)
+    atlas.convert()
+
+    engine = PuzzleEngine(ROWS, COLS, *IMAGE_SIZE, BORDER_PADDING)
+    engine.scatter(*SCREEN_SIZE, seed=3)
+    positions = engine.positions.copy()
+    block = (np.arange(ROWS * COLS).reshape(ROWS, COLS)[:CLUSTER_ROWS, :CLUSTER_COLS]).ravel()
+    positions[block] = engine.grid[block] + (1100 - BORDER_PADDING, 100 - BORDER_PADDING)
+    engine.set_positions(positions)
+    assert engine.clusters.size(0) == CLUSTER_ROWS * CLUSTER_COLS
+    return atlas, engine
+
+
+def drag_path(frame):
+    return 1200 + (frame * 7) % 300, 200 + (frame * 5) % 300
+
+
+def bench(screen, cached):
+    atlas, engine = make_game(screen)
+    renderer = DirtyRectRenderer()
+    background = pygame.Surface(screen.get_size(), 0, screen)
+    background.fill(BG_COLOR)
+    renderer.set_background(background)
+
+    engine.dragging = 0  # Picked up by its top-left piece
+    x, y = engine.positions[0].tolist()
+    members = engine.clusters.members(0)
+    in_drag = set(members)
+    margin = atlas.margin
+
+    def cluster_rect():
+        ids = np.asarray(members)
+        top_left = engine.positions[ids].min(axis=0) - margin
+        bottom_right = (engine.positions[ids] + engine.sizes[ids]).max(axis=0) + margin
+        return pygame.Rect(*top_left.tolist(), *(bottom_right - top_left).tolist())
+
+    rect = cluster_rect()
+    surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+    atlas.blits(surface, zip(members, (engine.positions[members] - rect.topleft).tolist()))
+    offset = (rect.x - x, rect.y - y)
+
+    def redraw(area):
+        if area is None:
+            candidates = range(engine.num_pieces)
+        else:
+            candidates = sorted(engine.index.query_rect(
+                area.x - margin, area.y - margin, area.width + 2 * margin, area.height + 2 * margin
+            ))
+        atlas.blits(screen, [(i, engine.positions[i].tolist()) for i in candidates if i not in in_drag])
+        if cached:
+            px, py = engine.positions[0].tolist()
+            screen.blit(surface, (px + offset[0], py + offset[1]))
+        else:
+            atlas.blits(screen, zip(members, engine.positions[members].tolist()))
+
+    renderer.render(screen, redraw)
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        renderer.mark_dirty(cluster_rect())
+        engine.drag(*drag_path(frame))
+        renderer.mark_dirty(cluster_rect())
+        rects = renderer.render(screen, redraw)
+        pygame.display.update(rects)
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    per_piece = bench(screen, cached=False)
+    cached = bench(screen, cached=True)
+    print(
+        f"{CLUSTER_ROWS * CLUSTER_COLS}-piece cluster of a {ROWS}x{COLS} puzzle: "
+        f"per-piece={per_piece:6.2f} ms/frame  cached surface={cached:6.2f} ms/frame  "
+        f"speedup={per_piece / cached:4.1f}x"
+    )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Frame time of the congratulations screen: per-object confetti vs. ConfettiSystem,
+and the timer text rendered every frame vs. through a TextCache.
+
+Each confetti frame fills the screen, moves every particle, draws it and
+blits the message, like display_congratulations. The baseline is the old
+Confetti class, one object and one ``pygame.draw.rect`` per particle.
+Run with: python benchmarks/bench_confetti.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from confetti import CONFETTI_COLORS, ConfettiSystem
+from text_cache import TextCache
+
+SCREEN_SIZE = (1920, 1080)
+BG_COLOR = (39, 64, 1)
+COUNTS = [300, 1000, 10000, 50000]
+FRAMES = 180  # Three seconds at 60 FPS
+TIMER_FRAMES = 3600  # A minute of timer at 60 FPS
+
+
+class Confetti:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.size = random.randint(2, 5)
+        self.color = random.choice(CONFETTI_COLORS)
+        self.speed_x = random.uniform(-3, 3)
+        self.speed_y = random.uniform(3, 5)
+
+    def update(self):
+        self.x += self.speed_x
+        self.y += self.speed_y
+
+    def draw(self, screen):
+        pygame.draw.rect(screen, self.color, (self.x, self.y, self.size, self.size))
+
+
+def bench_confetti(screen, text, count, vectorized):
+    width, height = SCREEN_SIZE
+    if vectorized:
+        confetti = ConfettiSystem(count, width, height, seed=1)
+    else:
+        random.seed(1)
+        particles = [Confetti(random.randint(0, width), random.randint(0, height)) for _ in range(count)]
+    text_rect = text.get_rect(center=(width // 2, height // 2))
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        screen.fill(BG_COLOR)
+        if vectorized:
+            confetti.update()
+            confetti.draw(screen)
+        else:
+            for particle in particles:
+                particle.update()
+                particle.draw(screen)
+        screen.blit(text, text_rect)
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def bench_timer(screen, font, cached):
+    texts = TextCache(None, 36)
+    start = time.perf_counter()
+    for frame in range(TIMER_FRAMES):
+        elapsed_time = frame // 60
+        timer_text = f"Time: {elapsed_time // 60:02}:{elapsed_time % 60:02}"
+        if cached:
+            surface = texts.render(timer_text, (255, 255, 255))
+        else:
+            surface = font.render(timer_text, True, (255, 255, 255))
+        screen.blit(surface, (20, 20))
+    return (time.perf_counter() - start) / TIMER_FRAMES * 1e6
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    text = pygame.font.Font(None, 74).render("Congratulations!", True, (166, 47, 3))
+    for count in COUNTS:
+        per_object = bench_confetti(screen, text, count, vectorized=False)
+        vectorized = bench_confetti(screen, text, count, vectorized=True)
+        print(
+            f"{count:>6} particles: per-object={per_object:7.2f} ms/frame  arrays={vectorized:6.2f} ms/frame"
+            f"  speedup={per_object / vectorized:5.1f}x"
+        )
+    font = pygame.font.Font(None, 36)
+    uncached = bench_timer(screen, font, cached=False)
+    cached = bench_timer(screen, font, cached=True)
+    print(f"timer text: render every frame={uncached:6.1f} us/frame  cached={cached:6.1f} us/frame")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
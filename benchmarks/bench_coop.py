@@ -0,0 +1,202 @@
+"""Load test of coop_server.py: 32 bot players solving one 50x50 puzzle.
+
+Starts the server on a free port and connects the bots, headless
+CoopClients driven from this process at 60 frames a second. Each bot
+picks a free loose piece from its mirror of the puzzle, asks for it,
+drags it to its slot over DRAG_FRAMES frames and drops it a few pixels off,
+for the server to snap. It then waits for the piece to land and starts
+again. Bots race for the same pieces on purpose, so some grabs are denied.
+
+Reported: grab round trip (GRAB sent to GRANTED or DENIED read),
+drop to landed (DROP sent to the UPDATE releasing the piece), bytes each
+bot receives per second, UPDATE size against a full snapshot of the
+puzzle, and whether every bot's mirror matches the server's state at the
+end, which a player joining last receives. The server reports its tick
+times. The run stops when the puzzle is solved or after TIME_LIMIT seconds.
+Run with: python benchmarks/bench_coop.py
+"""
+import json
+import os
+import random
+import selectors
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pygame
+
+from coop_client import CoopClient
+from engine import piece_rects
+
+BOTS = 32
+GRID = (50, 50)
+IMAGE_SIZE = (1000, 800)
+FPS = 60
+DRAG_FRAMES = 30  # Frames a bot takes to drag a piece to its slot
+DROP_ERROR = 5  # Most pixels off its slot a bot drops a piece, the server snaps it
+TIME_LIMIT = 120  # Seconds
+
+
+def write_image(path):
+    rng = random.Random(7)
+    image = pygame.Surface(IMAGE_SIZE)
+    for y in range(0, IMAGE_SIZE[1], 25):
+        for x in range(0, IMAGE_SIZE[0], 25):
+            image.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 25, 25))
+    pygame.image.save(image, path)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+class Bot:
+    """A player that places one random free piece after another."""
+
+    def __init__(self, client, seed):
+        self.client = client
+        self.rng = random.Random(seed)
+        rects = piece_rects(*client.image_size, client.rows, client.cols)
+        self.half_sizes = rects[:, 2:] // 2
+        self.slots = rects[:, :2] + self.half_sizes + client.border_padding  # Centre of every slot
+        self.piece = None
+        self.path = None  # Centre of the piece on each frame of the drag
+        self.frame = 0
+        self.grab_time = None  # When the unanswered GRAB was sent
+        self.drop_time = None  # When the DROP of the piece not landed yet was sent
+        self.grab_times = []
+        self.land_times = []
+        self.denied = 0
+        self.placed = 0
+
+    def receive(self, now):
+        client = self.client
+        was_granted = client.granted
+        _, _, ended = client.receive()
+        if self.grab_time is not None and (client.granted > was_granted or ended == self.piece):
+            self.grab_times.append(now - self.grab_time)
+            self.grab_time = None
+        if ended is not None and ended == self.piece:
+            if self.drop_time is None:
+                self.denied += 1  # Denied, or taken back by a neighbour's drop
+            else:
+                self.land_times.append(now - self.drop_time)
+                self.placed += 1
+            self.piece = self.drop_time = None
+
+    def step(self, now):
+        """Play one frame."""
+        client = self.client
+        if self.piece is None:
+            free = np.flatnonzero(~client.locked & (client.owners == 0))
+            if len(free):
+                piece = int(self.rng.choice(free))
+                if client.grab(piece, [piece]):
+                    self.piece, self.frame, self.grab_time = piece, 0, now
+                    start = client.positions[piece] + self.half_sizes[piece]
+                    end = self.slots[piece] + [self.rng.randint(-DROP_ERROR, DROP_ERROR) for _ in range(2)]
+                    self.path = np.linspace(start, end, DRAG_FRAMES + 1).round().astype(int).tolist()
+        elif self.drop_time is None:
+            self.frame += 1
+            x, y = self.path[self.frame]
+            if self.frame < DRAG_FRAMES:
+                client.move(self.piece, x, y)
+            else:
+                client.drop(self.piece, x, y)
+                self.drop_time = now
+        client.flush()
+
+
+def start_server(image_path):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "coop_server.py"), image_path, "--grid", f"{GRID[0]}x{GRID[1]}",
+         "--port", "0", "--seed", "1", "--exit-when-empty"],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    line = ""
+    while not line.startswith("Listening on "):  # After pygame's greeting
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"coop_server.py exited with {process.wait()} before listening")
+    host, port = line.split()[-1].rsplit(":", 1)
+    return process, host, int(port)
+
+
+def main():
+    pygame.init()
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = os.path.join(work_dir, "image.png")
+        write_image(image_path)
+        server, host, port = start_server(image_path)
+        bots = [Bot(CoopClient(host, port), seed) for seed in range(BOTS)]
+        selector = selectors.DefaultSelector()
+        for bot in bots:
+            selector.register(bot.client.socket, selectors.EVENT_READ, bot)
+
+        # Frames run on a fixed clock, replies are read as soon as they arrive in between
+        start = next_frame = time.perf_counter()
+        frames = 0
+        while not bots[0].client.locked.all() and next_frame - start < TIME_LIMIT:
+            for bot in bots:
+                bot.step(time.perf_counter())
+            frames += 1
+            next_frame += 1 / FPS
+            while (timeout := next_frame - time.perf_counter()) > 0:
+                for key, _ in selector.select(timeout):
+                    key.data.receive(time.perf_counter())
+        duration = time.perf_counter() - start
+
+        # Let the last drops land, then compare every mirror with the state a new player gets
+        settle = time.perf_counter() + 0.5
+        while time.perf_counter() < settle:
+            for key, _ in selector.select(settle - time.perf_counter()):
+                key.data.receive(time.perf_counter())
+        observer = CoopClient(host, port)
+        consistent = all(
+            np.array_equal(bot.client.positions, observer.positions)
+            and np.array_equal(bot.client.locked, observer.locked)
+            and np.array_equal(bot.client.owners, observer.owners)
+            for bot in bots
+        )
+        for bot in bots:
+            bot.client.close()
+        observer.close()
+        summary = server.communicate(timeout=30)[0]
+    pygame.quit()
+
+    grab_times = [t * 1000 for bot in bots for t in bot.grab_times]
+    land_times = [t * 1000 for bot in bots for t in bot.land_times]
+    received = [bot.client.received_bytes / duration for bot in bots]
+    updates = sum(bot.client.updates for bot in bots)
+    update_size = sum(bot.client.update_bytes for bot in bots) / max(updates, 1)
+    count = GRID[0] * GRID[1]
+    snapshot_size = count * 8 + (count + 7) // 8 + count  # Positions, locked bitset and owners
+    print(
+        f"{BOTS} bots, {GRID[0]}x{GRID[1]}: {sum(bot.placed for bot in bots)} pieces placed in {duration:.1f} s"
+        f" ({frames / duration:.1f} frames/s), {sum(bot.denied for bot in bots)} grabs denied,"
+        f" {int(observer.locked.sum())}/{count} locked"
+    )
+    print(
+        f"grab round trip: p50={percentile(grab_times, 0.5):5.2f} ms p99={percentile(grab_times, 0.99):5.2f} ms"
+        f"  drop to landed: p50={percentile(land_times, 0.5):5.1f} ms p99={percentile(land_times, 0.99):5.1f} ms"
+    )
+    print(
+        f"received per bot: {statistics.fmean(received) / 1024:5.1f} KiB/s"
+        f"  UPDATE: {update_size:6.1f} bytes on average, full snapshot {snapshot_size} bytes"
+        f"  mirrors consistent: {consistent}"
+    )
+    for line in summary.splitlines():
+        if line.startswith("Server summary: "):
+            print(f"server: {json.loads(line[len('Server summary: '):])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Generate-and-render time for large grids, up to 100x100 (10k pieces).
+
+Times the same steps as starting a new game: cutting the image into a
+piece atlas, building the engine, scattering the pieces and drawing the
+first full frame. The image size does not divide evenly, so the pieces
+also check that no pixels are dropped at the right and bottom edges.
+Run with: python benchmarks/bench_generate.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from engine import PuzzleEngine
+from piece_atlas import build_atlas
+
+SCREEN_SIZE = (1920, 1080)
+IMAGE_SIZE = (1003, 797)  # Not a multiple of any grid below
+BORDER_PADDING = 50
+BG_COLOR = (39, 64, 1)
+GRIDS = [(10, 10), (13, 17), (50, 50), (100, 100)]
+REPEATS = 5
+
+
+def make_image(screen):
+    rng = random.Random(42)
+    image = pygame.Surface(IMAGE_SIZE, 0, screen)
+    for y in range(0, IMAGE_SIZE[1], 20):
+        for x in range(0, IMAGE_SIZE[0], 20):
+            image.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 20, 20))
+    return image
+
+
+def generate_and_render(screen, image, rows, cols):
+    timings = {}
+    start = time.perf_counter()
+    pieces = build_atlas(image, rows, cols)
+    pieces.convert()
+    timings["split"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = PuzzleEngine(rows, cols, *IMAGE_SIZE, BORDER_PADDING)
+    engine.scatter(*SCREEN_SIZE, seed=1)
+    timings["engine"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    screen.fill(BG_COLOR)
+    pieces.blits(screen, enumerate(engine.positions.tolist()))
+    timings["render"] = time.perf_counter() - start
+    return pieces, timings
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    image = make_image(screen)
+
+    print(f"Image {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}, best of {REPEATS}")
+    print(f"{'grid':>8} {'pieces':>7} {'split ms':>9} {'engine ms':>10} {'render ms':>10} {'total ms':>9}")
+    for rows, cols in GRIDS:
+        best = None
+        for _ in range(REPEATS):
+            pieces, timings = generate_and_render(screen, image, rows, cols)
+            if best is None or sum(timings.values()) < sum(best.values()):
+                best = timings
+        if pieces.margin == 0:
+            covered = sum(width * height for _, _, width, height in pieces.sources)
+        else:
+            covered = int((pygame.surfarray.array_alpha(pieces.surface) > 0).sum())
+        assert covered == IMAGE_SIZE[0] * IMAGE_SIZE[1], "pieces do not cover the whole image"
+        print(
+            f"{rows:>3}x{cols:<4} {rows * cols:>7} {best['split'] * 1000:>9.2f} {best['engine'] * 1000:>10.2f}"
+            f" {best['render'] * 1000:>10.2f} {sum(best.values()) * 1000:>9.2f}"
+        )
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
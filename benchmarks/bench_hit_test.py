@@ -0,0 +1,77 @@
+"""Hit-test latency: linear reverse scan vs. the spatial index.
+
+Run with: python benchmarks/bench_hit_test.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial_index import SpatialIndex
+
+TABLE_WIDTH, TABLE_HEIGHT = 1920, 1080
+CLICKS = 1000
+
+
+# The original MOUSEBUTTONDOWN scan from puzzle.py
+def linear_hit_test(piece_positions, locked_pieces, piece_width, piece_height, mouse_x, mouse_y):
+    for i in range(len(piece_positions) - 1, -1, -1):
+        if i in locked_pieces:
+            continue
+        x, y = piece_positions[i]
+        if x <= mouse_x <= x + piece_width and y <= mouse_y <= y + piece_height:
+            return i
+    return None
+
+
+# The lookup PuzzleEngine.pick does: the highest unlocked id among the items under the point
+def indexed_hit_test(index, locked_pieces, mouse_x, mouse_y):
+    hit = None
+    for item in index.query_point(mouse_x, mouse_y):
+        if (hit is None or item > hit) and item not in locked_pieces:
+            hit = item
+    return hit
+
+
+def run(rows, cols):
+    rng = random.Random(1234)
+    piece_width = max(1, 800 // cols)
+    piece_height = max(1, 600 // rows)
+    piece_positions = [
+        [rng.randint(0, TABLE_WIDTH - piece_width), rng.randint(0, TABLE_HEIGHT - piece_height)]
+        for _ in range(rows * cols)
+    ]
+    locked_pieces = set(rng.sample(range(rows * cols), rows * cols // 4))
+    clicks = [(rng.randint(0, TABLE_WIDTH), rng.randint(0, TABLE_HEIGHT)) for _ in range(CLICKS)]
+
+    index = SpatialIndex()
+    index.rebuild(piece_positions, [(piece_width, piece_height)] * len(piece_positions))
+
+    # Both strategies must agree on every click
+    for mouse_x, mouse_y in clicks:
+        expected = linear_hit_test(piece_positions, locked_pieces, piece_width, piece_height, mouse_x, mouse_y)
+        assert indexed_hit_test(index, locked_pieces, mouse_x, mouse_y) == expected
+
+    def linear():
+        for mouse_x, mouse_y in clicks:
+            linear_hit_test(piece_positions, locked_pieces, piece_width, piece_height, mouse_x, mouse_y)
+
+    def indexed():
+        for mouse_x, mouse_y in clicks:
+            indexed_hit_test(index, locked_pieces, mouse_x, mouse_y)
+
+    linear_time = min(timeit.repeat(linear, number=1, repeat=5)) / CLICKS
+    indexed_time = min(timeit.repeat(indexed, number=1, repeat=5)) / CLICKS
+    print(
+        f"{rows}x{cols:<4} pieces={rows * cols:<6} "
+        f"linear={linear_time * 1e6:9.2f} us/click  "
+        f"indexed={indexed_time * 1e6:7.2f} us/click  "
+        f"speedup={linear_time / indexed_time:6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    for rows, cols in [(10, 10), (100, 100)]:
+        run(rows, cols)
@@ -0,0 +1,62 @@
+"""Reopening a large photo: decode + scale vs. memory and disk cache hits.
+
+Run with: python benchmarks/bench_image_cache.py [megapixels]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from image_cache import ImageCache
+
+FIT_BOX = (700, 500)  # 800x600 window minus the board padding
+
+
+def make_photo(path, megapixels):
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    surface = pygame.Surface((width, height))
+    for y in range(0, height, 64):
+        for x in range(0, width, 64):
+            surface.fill(((x * 7) % 256, (y * 5) % 256, (x + y) % 256), (x, y, 64, 64))
+    pygame.image.save(surface, path)
+    return width, height
+
+
+def fit(image):
+    width, height = image.get_size()
+    scale = min(FIT_BOX[0] / width, FIT_BOX[1] / height)
+    return pygame.transform.scale(image, (int(width * scale), int(height * scale)))
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    megapixels = float(sys.argv[1]) if len(sys.argv) > 1 else 40
+    pygame.display.init()
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, "photo.jpg")
+        size = make_photo(photo, megapixels)
+        disk_dir = os.path.join(tmp, "cache")
+
+        uncached = timed(lambda: fit(pygame.image.load(photo)))
+        cache = ImageCache(disk_dir=disk_dir)
+        cold = timed(lambda: cache.get(photo, ("fit",) + FIT_BOX, fit))
+        memory_hit = timed(lambda: cache.get(photo, ("fit",) + FIT_BOX, fit))
+        disk_hit = timed(lambda: ImageCache(disk_dir=disk_dir).get(photo, ("fit",) + FIT_BOX, fit))
+
+        print(f"{size[0]}x{size[1]} photo ({megapixels:g} MP)")
+        print(f"    decode + scale     {uncached:9.2f} ms")
+        print(f"    cold cache miss    {cold:9.2f} ms  (includes writing the disk entry)")
+        print(f"    memory hit         {memory_hit:9.3f} ms")
+        print(f"    disk hit           {disk_hit:9.2f} ms  (fresh process, e.g. Continue Game after restart)")
+    pygame.quit()
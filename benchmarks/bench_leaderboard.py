@@ -0,0 +1,94 @@
+"""Record insert throughput and top-N leaderboard latency (SQLite and cached) on a large table.
+
+Single and batched inserts are compared side by side, first on an empty
+table and again once it holds the given number of records.
+Run with: python benchmarks/bench_leaderboard.py [records]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["PUZZLE_DB_PATH"] = os.path.join(tmp.name, "bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+IMAGES = [f"image/photo_{i}.jpg" for i in range(50)]
+SIZES = [(n, n) for n in range(2, 11)]
+SAMPLE = 5000  # Records inserted each way when comparing single and batched inserts
+
+
+def random_record(rng):
+    rows, cols = rng.choice(SIZES)
+    return (f"user{rng.randrange(5000)}", rng.choice(IMAGES), rng.randrange(10, 5000), rows, cols)
+
+
+def single_inserts(connection, records):
+    # One transaction per record, as a synchronous insert from the event loop would do
+    start = time.perf_counter()
+    for username, image, completion_time, rows, cols in records:
+        with connection:
+            connection.execute(database.INSERT_RECORD_SQL, (username, image, rows * cols, rows, cols, completion_time))
+    return len(records) / (time.perf_counter() - start)
+
+
+def batched_inserts(records):
+    # Queued and batched by the record writer, also returns how long the caller is blocked per record
+    start = time.perf_counter()
+    for record in records:
+        database.insert_record(*record)
+    enqueue_time = (time.perf_counter() - start) / len(records)
+    database.flush_records()
+    return len(records) / (time.perf_counter() - start), enqueue_time
+
+
+def compare_inserts(connection, rng):
+    """Insert the same records both ways, each starting from the table as it is now."""
+    table_rows = connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    last_row = connection.execute("SELECT COALESCE(MAX(rowid), 0) FROM records").fetchone()[0]
+    sample = [random_record(rng) for _ in range(SAMPLE)]
+    single_rate = single_inserts(connection, sample)
+    with connection:
+        connection.execute("DELETE FROM records WHERE rowid > ?", (last_row,))
+    batched_rate, enqueue_time = batched_inserts(sample)
+    with connection:
+        connection.execute("DELETE FROM records WHERE rowid > ?", (last_row,))
+    print(
+        f"inserts into {table_rows:>9,} rows  single={single_rate:9,.0f} records/s  batched={batched_rate:9,.0f} records/s"
+        f"  ({batched_rate / single_rate:4.1f}x)  caller blocked={enqueue_time * 1e6:5.1f} us/record"
+        f" (vs {1e6 / single_rate:.1f} us synchronous)"
+    )
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(11)
+    connection = database.get_connection()
+
+    compare_inserts(connection, rng)
+    batched_inserts([random_record(rng) for _ in range(total)])  # Fill the table
+    compare_inserts(connection, rng)
+
+    queries = [(rng.choice(IMAGES), rows * cols) for rows, cols in (rng.choice(SIZES) for _ in range(1000))]
+
+    def top_n():
+        for image, num_pieces in queries:
+            database.get_leaderboard(image, num_pieces)
+
+    def top_n_uncached():
+        database.leaderboard_cache.clear()
+        top_n()
+
+    query_time = min(timeit.repeat(top_n_uncached, number=1, repeat=3)) / len(queries)
+    top_n()  # Fill the cache
+    cached_time = min(timeit.repeat(top_n, number=1, repeat=3)) / len(queries)
+    plan = connection.execute("EXPLAIN QUERY PLAN " + database.LEADERBOARD_SQL, (IMAGES[0], 9, 10)).fetchall()
+    print(f"records in table     {connection.execute('SELECT COUNT(*) FROM records').fetchone()[0]:>12,}")
+    print(f"top-10 from SQLite   {query_time * 1e6:12.1f} us/query")
+    print(f"top-10 from cache    {cached_time * 1e6:12.1f} us/query")
+    print(f"query plan           {plan[0][-1]}")
+    tmp.cleanup()
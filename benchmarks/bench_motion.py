@@ -0,0 +1,104 @@
+"""Event handling time per frame while dragging with a 1000 Hz mouse.
+
+At 60 FPS a 1000 Hz mouse queues about 17 MOUSEMOTION events per frame.
+The per-event loop drags the piece, marks it dirty and routes the event
+through the pygame_gui manager for every one of them, and updates the
+timer per event. The coalesced loop merges them with coalesce_motion,
+drags once, keeps the drag away from the GUI and updates the timer once.
+Both then redraw the dirty regions. Run with: python benchmarks/bench_motion.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pygame_gui
+
+from engine import PuzzleEngine
+from input_events import coalesce_motion
+from renderer import DirtyRectRenderer
+
+SCREEN_SIZE = (1920, 1080)
+IMAGE_SIZE = (1000, 800)
+BORDER_PADDING = 50
+BG_COLOR = (39, 64, 1)
+ROWS, COLS = 10, 10
+FRAMES = 300
+POLLING_RATES = [125, 500, 1000, 4000]
+FPS = 60
+
+
+def frame_events(frame, per_frame):
+    """The motion events one frame of a circular drag queues up."""
+    events = []
+    for step in range(per_frame):
+        t = frame * per_frame + step
+        x, y = 1300 + t % 400, 300 + (t * 3) % 400
+        events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(1, 3), buttons=(1, 0, 0)))
+    return events
+
+
+def bench(screen, polling_rate, coalesced):
+    manager = pygame_gui.UIManager(SCREEN_SIZE)
+    for y in (50, 100, 150, 200):
+        pygame_gui.elements.UIButton(relative_rect=pygame.Rect((1100, y), (150, 35)), text="Button", manager=manager)
+    engine = PuzzleEngine(ROWS, COLS, *IMAGE_SIZE, BORDER_PADDING)
+    engine.scatter(*SCREEN_SIZE, seed=3)
+    width, height = engine.piece_width, engine.piece_height
+    piece_images = [pygame.Surface((width, height), 0, screen) for _ in range(engine.num_pieces)]
+    for i, image in enumerate(piece_images):
+        image.fill(((i * 37) % 256, (i * 91) % 256, (i * 53) % 256))
+    renderer = DirtyRectRenderer()
+    background = pygame.Surface(SCREEN_SIZE, 0, screen)
+    background.fill(BG_COLOR)
+    renderer.set_background(background)
+    engine.dragging = engine.num_pieces - 1
+
+    def dragged_rect():
+        x, y = engine.positions[engine.dragging].tolist()
+        return pygame.Rect(x, y, width, height)
+
+    def redraw(area):
+        ids = range(engine.num_pieces) if area is None else sorted(engine.index.query_rect(*area))
+        screen.blits([(piece_images[i], engine.positions[i].tolist()) for i in ids], False)
+
+    renderer.render(screen, redraw)
+    per_frame = max(1, polling_rate // FPS)
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        events = frame_events(frame, per_frame)
+        if coalesced:
+            events = coalesce_motion(events)
+        for event in events:
+            if not coalesced:
+                pygame.time.get_ticks()  # The per-event timer update
+            renderer.mark_dirty(dragged_rect())
+            engine.drag(*event.pos)
+            renderer.mark_dirty(dragged_rect())
+            if not coalesced:
+                manager.process_events(event)
+        if coalesced:
+            pygame.time.get_ticks()
+        manager.update(1 / FPS)
+        pygame.display.update(renderer.render(screen, redraw))
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    for polling_rate in POLLING_RATES:
+        per_event = bench(screen, polling_rate, coalesced=False)
+        coalesced = bench(screen, polling_rate, coalesced=True)
+        print(
+            f"{polling_rate:>5} Hz ({max(1, polling_rate // FPS):>2} motions/frame): per-event={per_event:6.2f} ms/frame"
+            f"  coalesced={coalesced:6.2f} ms/frame  speedup={per_event / coalesced:4.1f}x"
+        )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
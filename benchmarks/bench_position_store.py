@@ -0,0 +1,92 @@
+"""Whole-board operations: list-of-lists positions vs. the NumPy position store.
+
+Run with: python benchmarks/bench_position_store.py
+"""
+import os
+import pickle
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from engine import PuzzleEngine
+from spatial_index import SpatialIndex
+
+TABLE_WIDTH, TABLE_HEIGHT = 8000, 6000
+BORDER_PADDING = 50
+
+
+def list_scatter(count, piece_width, piece_height, board, rng):
+    left, top, width, height = board
+    positions = []
+    for _ in range(count):
+        rand_x = rng.randint(0, TABLE_WIDTH - piece_width)
+        rand_y = rng.randint(0, TABLE_HEIGHT - piece_height)
+        while left <= rand_x < left + width and top <= rand_y < top + height:
+            rand_x = rng.randint(0, TABLE_WIDTH - piece_width)
+            rand_y = rng.randint(0, TABLE_HEIGHT - piece_height)
+        positions.append([rand_x, rand_y])
+    return positions
+
+
+def list_scatter_and_index(count, piece_width, piece_height, board, rng):
+    positions = list_scatter(count, piece_width, piece_height, board, rng)
+    SpatialIndex().rebuild(positions, [(piece_width, piece_height)] * len(positions))
+    return positions
+
+
+def list_complete(positions, grid):
+    for i, position in enumerate(positions):
+        grid_x, grid_y = grid[i]
+        if position != [grid_x, grid_y]:
+            return False
+    return True
+
+
+def allocated(build):
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def best(func, number=5):
+    return min(timeit.repeat(func, number=1, repeat=number))
+
+
+def run(rows, cols):
+    image_width, image_height = cols * 40, rows * 40
+    engine = PuzzleEngine(rows, cols, image_width, image_height, BORDER_PADDING)
+    board = (BORDER_PADDING, BORDER_PADDING, image_width, image_height)
+    grid = [tuple(slot) for slot in engine.grid.tolist()]
+    solved = [list(slot) for slot in grid]
+    count = rows * cols
+
+    positions, list_bytes = allocated(
+        lambda: list_scatter(count, engine.piece_width, engine.piece_height, board, random.Random(1))
+    )
+    _, array_bytes = allocated(lambda: (np.array(positions, dtype=np.int32), np.zeros(count, dtype=bool)))
+    engine.set_positions(positions)
+
+    rows_out = [
+        ("scatter+index", lambda: list_scatter_and_index(count, engine.piece_width, engine.piece_height, board, random.Random(1)),
+         lambda: engine.scatter(TABLE_WIDTH, TABLE_HEIGHT, seed=1)),
+        ("complete scan", lambda: list_complete(solved, grid),
+         lambda: np.array_equal(engine.positions, engine.grid)),
+        ("save+load", lambda: pickle.loads(pickle.dumps(positions)),
+         lambda: np.frombuffer(engine.positions.tobytes(), dtype=np.int32).reshape(-1, 2)),
+    ]
+    print(f"{rows}x{cols} ({count} pieces)  memory: lists={list_bytes / 1024:8.1f} KiB  numpy={array_bytes / 1024:7.1f} KiB")
+    for name, list_op, array_op in rows_out:
+        list_time, array_time = best(list_op), best(array_op)
+        print(f"    {name:<14} lists={list_time * 1e3:8.3f} ms  numpy={array_time * 1e3:7.3f} ms  speedup={list_time / array_time:6.1f}x")
+
+
+if __name__ == "__main__":
+    for size in (50, 100, 200):
+        run(size, size)
@@ -0,0 +1,121 @@
+"""Frame time of the GAME_SCREEN draw: full-frame redraw vs. dirty rectangles.
+
+Simulates a piece being dragged across a fullscreen-sized table while the
+rest of the board sits still. Run with: python benchmarks/bench_render.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from renderer import DirtyRectRenderer
+from spatial_index import SpatialIndex
+
+SCREEN_SIZE = (1920, 1080)
+IMAGE_SIZE = (1000, 800)
+BORDER_PADDING = 50
+BG_COLOR = (39, 64, 1)
+BORDER_COLOR = (242, 159, 5)
+FRAMES = 300
+
+
+def make_board(screen, rows, cols, locked_fraction):
+    rng = random.Random(42)
+    image = pygame.Surface(IMAGE_SIZE, 0, screen)
+    for y in range(0, IMAGE_SIZE[1], 20):
+        for x in range(0, IMAGE_SIZE[0], 20):
+            image.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 20, 20))
+    piece_width, piece_height = IMAGE_SIZE[0] // cols, IMAGE_SIZE[1] // rows
+    pieces = [
+        image.subsurface((col * piece_width, row * piece_height, piece_width, piece_height))
+        for row in range(rows)
+        for col in range(cols)
+    ]
+    grid = [
+        (BORDER_PADDING + col * piece_width, BORDER_PADDING + row * piece_height)
+        for row in range(rows)
+        for col in range(cols)
+    ]
+    locked = set(rng.sample(range(len(pieces)), int(len(pieces) * locked_fraction)))
+    positions = [
+        list(grid[i]) if i in locked else [
+            rng.randint(IMAGE_SIZE[0] + BORDER_PADDING, SCREEN_SIZE[0] - piece_width),
+            rng.randint(0, SCREEN_SIZE[1] - piece_height),
+        ]
+        for i in range(len(pieces))
+    ]
+    border_rect = pygame.Rect(BORDER_PADDING, BORDER_PADDING, *IMAGE_SIZE)
+    return pieces, positions, locked, border_rect, (piece_width, piece_height)
+
+
+def drag_path(frame):
+    return 200 + (frame * 5) % 1200, 300 + (frame * 3) % 500
+
+
+def bench_full(screen, pieces, positions, locked, border_rect, size):
+    dragging = next(i for i in range(len(pieces)) if i not in locked)
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        positions[dragging] = list(drag_path(frame))
+        screen.fill(BG_COLOR)
+        pygame.draw.rect(screen, BORDER_COLOR, border_rect, 2)
+        for i, (piece, (x, y)) in enumerate(zip(pieces, positions)):
+            if i != dragging:
+                screen.blit(piece, (x, y))
+        screen.blit(pieces[dragging], positions[dragging])
+        pygame.display.update()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def bench_dirty(screen, pieces, positions, locked, border_rect, size):
+    dragging = next(i for i in range(len(pieces)) if i not in locked)
+    index = SpatialIndex()
+    index.rebuild(positions, [size] * len(positions))
+    renderer = DirtyRectRenderer()
+    background = pygame.Surface(screen.get_size(), 0, screen)
+    background.fill(BG_COLOR)
+    pygame.draw.rect(background, BORDER_COLOR, border_rect, 2)
+    for i in locked:
+        background.blit(pieces[i], positions[i])
+    renderer.set_background(background)
+
+    def redraw(area):
+        candidates = range(len(pieces)) if area is None else sorted(index.query_rect(area.x, area.y, area.width, area.height))
+        for i in candidates:
+            if i != dragging and i not in locked:
+                screen.blit(pieces[i], positions[i])
+        screen.blit(pieces[dragging], positions[dragging])
+
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        renderer.mark_dirty(pygame.Rect(positions[dragging], size))
+        positions[dragging] = list(drag_path(frame))
+        index.move(dragging, *positions[dragging])
+        renderer.mark_dirty(pygame.Rect(positions[dragging], size))
+        rects = renderer.render(screen, redraw)
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+    return (time.perf_counter() - start) / FRAMES
+
+
+if __name__ == "__main__":
+    pygame.display.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    for rows, cols, locked_fraction in [(3, 3, 0.0), (10, 10, 0.5), (10, 10, 0.9), (30, 30, 0.5)]:
+        board = make_board(screen, rows, cols, locked_fraction)
+        full = bench_full(screen, *board)
+        board = make_board(screen, rows, cols, locked_fraction)
+        dirty = bench_dirty(screen, *board)
+        print(
+            f"{rows}x{cols:<3} locked={int(locked_fraction * 100):3d}%  "
+            f"full={full * 1000:7.3f} ms/frame  dirty={dirty * 1000:7.3f} ms/frame  "
+            f"speedup={full / dirty:5.1f}x"
+        )
+    pygame.quit()
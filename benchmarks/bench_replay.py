@@ -0,0 +1,146 @@
+"""End-to-end replay of canned game sessions through puzzle.py.
+
+For each grid a bot session is written as an input log: every piece but
+the first is picked up, dragged across the table in a few motion events
+and dropped on its slot, one event per frame. The last piece is left out so
+the replay ends before the congratulations screen. puzzle.py then plays the
+log back headlessly (--replay, SDL dummy drivers) as fast as it can, and
+its summary gives event throughput, frame time and peak memory.
+
+The session is planned on a PuzzleEngine and Camera set up the way
+puzzle.py sets up a new game from the log header, so the bot knows where
+every piece lands. Grids too fine for the window play on a larger table,
+zoomed out to show all of it.
+Run with: python benchmarks/bench_replay.py
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PUZZLE_IMAGE_CACHE_DIR", "")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+
+import puzzle
+from camera import Camera, table_size
+from engine import PuzzleEngine
+from input_log import InputRecorder
+
+WINDOW_SIZE = (1920, 1080)
+IMAGE_SIZE = (1000, 800)  # Also the fit size, so small grids are not rescaled
+BORDER_PADDING = 50
+BUTTONS_RECT = pygame.Rect(1100, 50, 150, 185)  # In-game buttons, clicks there would press them
+GRIDS = [(3, 3), (10, 10), (50, 50)]
+DRAG_STEPS = 8
+SEED = 20240601
+
+
+def write_image(path):
+    rng = random.Random(7)
+    image = pygame.Surface(IMAGE_SIZE)
+    for y in range(0, IMAGE_SIZE[1], 25):
+        for x in range(0, IMAGE_SIZE[0], 25):
+            image.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 25, 25))
+    pygame.image.save(image, path)
+
+
+def grab_point(engine, camera, piece):
+    """A screen point that picks up piece and is clear of the buttons, None if there is none."""
+    x, y = engine.positions[piece].tolist()
+    width, height = engine.piece_sizes[piece]
+    for fx, fy in ((2, 2), (1, 1), (3, 3), (1, 3), (3, 1)):
+        point = camera.to_screen(x + width * fx // 4, y + height * fy // 4)
+        if not BUTTONS_RECT.collidepoint(point) and engine.pick(*camera.to_table(*point)) == piece:
+            engine.dragging = None
+            return point
+    return None
+
+
+def write_session(path, image_path, rows, cols):
+    """Log of a bot solving all but the first piece, returns the number of pieces it places."""
+    image, atlas = puzzle.prepare_puzzle_image(image_path, *IMAGE_SIZE, rows, cols)
+    image_size = image.get_size()
+    engine = PuzzleEngine(rows, cols, *image_size, BORDER_PADDING)
+    table = table_size(*image_size, *WINDOW_SIZE, BORDER_PADDING)
+    engine.scatter(*table, seed=random.Random(SEED).randrange(2 ** 32), margin=atlas.margin)  # First layout of the game
+    camera = Camera(*WINDOW_SIZE, *table)
+    recorder = InputRecorder(path, {
+        "image": image_path,
+        "rows": rows,
+        "cols": cols,
+        "seed": SEED,
+        "fit": list(IMAGE_SIZE),
+        "window": list(WINDOW_SIZE),
+        "jigsaw_shapes": True,
+    })
+    recorder.record([])  # The frame the game appears in
+    placed = 0
+    for piece in range(engine.num_pieces - 1, 0, -1):
+        start = grab_point(engine, camera, piece)
+        if start is None:
+            continue
+        grid_x, grid_y = engine.grid[piece].tolist()
+        width, height = engine.piece_sizes[piece]
+        end = camera.to_screen(grid_x + width // 2, grid_y + height // 2)
+        recorder.record([pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=start, button=1)])
+        engine.pick(*camera.to_table(*start))
+        last = start
+        for step in range(1, DRAG_STEPS + 1):
+            point = (start[0] + (end[0] - start[0]) * step // DRAG_STEPS, start[1] + (end[1] - start[1]) * step // DRAG_STEPS)
+            rel = (point[0] - last[0], point[1] - last[1])
+            recorder.record([pygame.event.Event(pygame.MOUSEMOTION, pos=point, rel=rel, buttons=(1, 0, 0))])
+            engine.drag(*camera.to_table(*point))
+            last = point
+        recorder.record([pygame.event.Event(pygame.MOUSEBUTTONUP, pos=end, button=1)])
+        engine.drop()
+        placed += 1
+    recorder.close()
+    return placed
+
+
+def replay(log_path, work_dir):
+    env = dict(
+        os.environ,
+        SDL_VIDEODRIVER="dummy",
+        SDL_AUDIODRIVER="dummy",
+        PUZZLE_IMAGE_CACHE_DIR="",
+        PUZZLE_DB_PATH=os.path.join(work_dir, "puzzle.db"),
+    )
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "puzzle.py"), "--replay", log_path],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Replay of {log_path} failed:\n{result.stderr}")
+    for line in result.stdout.splitlines():
+        if line.startswith("Replay summary: "):
+            return json.loads(line[len("Replay summary: "):])
+    raise RuntimeError(f"No replay summary in the output:\n{result.stdout}\n{result.stderr}")
+
+
+def main():
+    pygame.init()
+    with tempfile.TemporaryDirectory() as work_dir:
+        image_path = os.path.join(work_dir, "image.png")
+        write_image(image_path)
+        for rows, cols in GRIDS:
+            log_path = os.path.join(work_dir, f"session_{rows}x{cols}.jsonl")
+            placed = write_session(log_path, image_path, rows, cols)
+            summary = replay(log_path, work_dir)
+            print(
+                f"{rows:>2}x{cols:<2} frames={summary['frames']:>6}  events/s={summary['events_per_second']:8.0f}"
+                f"  frame mean={summary['frame_mean']:6.2f} p50={summary['frame_p50']:6.2f}"
+                f" p99={summary['frame_p99']:6.2f} ms  peak RSS={summary['peak_rss_mb']:6.1f} MB"
+                f"  placed={summary['correct']}/{placed}"
+            )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Save file size and load time: pickled dict vs. the binary save format.
+
+Run with: python benchmarks/bench_save.py
+"""
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from engine import PuzzleEngine
+from save_format import read_save, write_save
+
+
+def run(rows, cols, tmp):
+    engine = PuzzleEngine(rows, cols, cols * 20, rows * 20)
+    engine.scatter(1920, 1080, seed=5)
+    engine.locked[::3] = True
+
+    pickle_path = os.path.join(tmp, "progress.pkl")
+    save_data = engine.serialize()
+    save_data["image_path"] = "image/photo.jpg"
+    with open(pickle_path, "wb") as f:
+        pickle.dump(save_data, f)
+    binary_path = os.path.join(tmp, "progress.sav")
+    write_save(binary_path, engine, "image/photo.jpg", 123, True)
+
+    loaded = read_save(binary_path)
+    assert np.array_equal(loaded["piece_positions"], engine.positions)
+    assert loaded["locked_pieces"].tolist() == engine.locked_pieces
+
+    def load_pickle():
+        with open(pickle_path, "rb") as f:
+            pickle.load(f)
+
+    pickle_time = min(timeit.repeat(load_pickle, number=20, repeat=5)) / 20
+    binary_time = min(timeit.repeat(lambda: read_save(binary_path), number=20, repeat=5)) / 20
+    print(
+        f"{rows}x{cols:<4} pickle: {os.path.getsize(pickle_path) / 1024:8.1f} KiB {pickle_time * 1e6:8.1f} us  |  "
+        f"binary: {os.path.getsize(binary_path) / 1024:6.1f} KiB {binary_time * 1e6:6.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (10, 50, 100):
+            run(size, size, tmp)
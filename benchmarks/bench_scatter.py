@@ -0,0 +1,71 @@
+"""Scatter time and quality: old rejection sampling vs. the stratified placer.
+
+"roomy" is a fullscreen table around a small board, "tight" leaves only a
+thin strip around the board. Run with: python benchmarks/bench_scatter.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from scatter import scatter_positions
+
+TIMEOUT = 5.0  # Give up on rejection sampling after this many seconds
+
+
+# The original generate_pieces loop, which only tests the top-left corner
+def rejection_scatter(count, piece_size, table_size, board_rect, rng):
+    piece_width, piece_height = piece_size
+    left, top, width, height = board_rect
+    deadline = time.perf_counter() + TIMEOUT
+    positions = []
+    for _ in range(count):
+        rand_x = rng.randint(0, table_size[0] - piece_width)
+        rand_y = rng.randint(0, table_size[1] - piece_height)
+        while left <= rand_x < left + width and top <= rand_y < top + height:
+            if time.perf_counter() > deadline:
+                return None
+            rand_x = rng.randint(0, table_size[0] - piece_width)
+            rand_y = rng.randint(0, table_size[1] - piece_height)
+        positions.append([rand_x, rand_y])
+    return np.array(positions)
+
+
+def overlaps(positions, piece_size, board_rect):
+    """Count pieces covering the board and overlapping piece pairs."""
+    width, height = piece_size
+    xs, ys = positions[:, 0], positions[:, 1]
+    left, top, board_width, board_height = board_rect
+    on_board = (xs < left + board_width) & (xs + width > left) & (ys < top + board_height) & (ys + height > top)
+    pairs = (np.abs(xs[:, None] - xs[None, :]) < width) & (np.abs(ys[:, None] - ys[None, :]) < height)
+    return int(on_board.sum()), int((pairs.sum() - len(xs)) // 2)
+
+
+def run(label, count, piece_size, table_size, board_rect):
+    start = time.perf_counter()
+    old = rejection_scatter(count, piece_size, table_size, board_rect, random.Random(3))
+    old_time = time.perf_counter() - start
+    start = time.perf_counter()
+    new = scatter_positions(count, piece_size, table_size, board_rect, seed=3)
+    new_time = time.perf_counter() - start
+    assert np.array_equal(new, scatter_positions(count, piece_size, table_size, board_rect, seed=3))
+
+    old_text = "   gave up after {:.0f} s".format(TIMEOUT) if old is None else (
+        "{:8.2f} ms board={:4d} pairs={:6d}".format(old_time * 1e3, *overlaps(old, piece_size, board_rect))
+    )
+    new_board, new_pairs = overlaps(new, piece_size, board_rect)
+    print(
+        f"{label:<6} pieces={count:<5} rejection: {old_text}  |  "
+        f"stratified: {new_time * 1e3:6.2f} ms board={new_board:4d} pairs={new_pairs:6d}"
+    )
+
+
+if __name__ == "__main__":
+    scatter_positions(10, (10, 10), (100, 100), (10, 10, 50, 50), seed=0)  # Warm up NumPy
+    for count, piece_size in [(100, (70, 50)), (2500, (14, 10))]:
+        run("roomy", count, piece_size, (1920, 1080), (50, 50, 700, 500))
+        run("tight", count, piece_size, (1920, 1080), (50, 50, 1830, 990))
@@ -0,0 +1,58 @@
+"""Cold start of puzzle.py: time until the login screen is on the display.
+
+Starts ``puzzle.py --exit-after-first-frame`` with the SDL dummy drivers a
+number of times. "first frame" is the time from spawning the process until
+it reports that its first frame was shown, interpreter start-up included.
+"exit" is the time until the process has quit. "floor" is a process that
+only imports pygame and pygame_gui, which puzzle.py cannot start faster
+than. The target for the kiosks is a first frame well under 200 ms.
+Run with: python benchmarks/bench_startup.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 10
+TARGET_MS = 200
+
+
+def cold_start():
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "puzzle.py"), "--exit-after-first-frame"],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    first_frame = None
+    for line in process.stdout:
+        if line.startswith("First frame shown"):
+            first_frame = (time.perf_counter() - start) * 1000
+    process.wait()
+    if process.returncode != 0 or first_frame is None:
+        raise RuntimeError(f"puzzle.py exited with {process.returncode} before showing a frame")
+    return first_frame, (time.perf_counter() - start) * 1000
+
+
+def import_floor():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import pygame, pygame_gui"], stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    cold_start()  # Let the OS cache the interpreter and libraries
+    first_frames, exits = zip(*(cold_start() for _ in range(RUNS)))
+    floor = statistics.median(import_floor() for _ in range(RUNS))
+    first_frame = statistics.median(first_frames)
+    print(
+        f"first frame: median={first_frame:6.1f} ms  min={min(first_frames):6.1f} ms  "
+        f"exit: median={statistics.median(exits):6.1f} ms  floor: median={floor:6.1f} ms  "
+        f"target {TARGET_MS} ms {'met' if first_frame < TARGET_MS else 'missed'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
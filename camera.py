@@ -0,0 +1,122 @@
+"""Camera over the virtual table the pieces lie on.
+
+Puzzles with many pieces get an image larger than the window, so pieces
+keep a size that can be picked up, on a table larger than the window. The
+camera shows a part of that table, zoomed out and panned. Small puzzles
+keep a table the size of the window and a camera that never moves.
+"""
+import math
+
+import numpy as np
+import pygame
+
+MIN_PIECE_SIZE = 40  # Shortest piece side at zoom 1, the image is scaled up until pieces reach it
+MAX_TABLE_SCALE = 4  # Most the image is scaled up past the fit size, bounds the memory of huge puzzles
+ZOOM_STEP = math.sqrt(2)  # Ratio between zoom levels, every second level halves the size
+
+
+def table_scale(image_width, image_height, fit_width, fit_height, rows, cols):
+    """How much larger than the fit size the puzzle image is scaled, 1 unless its pieces would be too small."""
+    fit = min(fit_width / image_width, fit_height / image_height)
+    smallest = min(image_width * fit / cols, image_height * fit / rows)
+    return min(MAX_TABLE_SCALE, max(1.0, MIN_PIECE_SIZE / smallest))
+
+
+def table_size(image_width, image_height, window_width, window_height, padding):
+    """Size of the table for a scaled puzzle image: the window, grown in proportion until the board fits."""
+    scale = max(1.0, (image_width + 2 * padding) / window_width, (image_height + 2 * padding) / window_height)
+    return math.ceil(window_width * scale), math.ceil(window_height * scale)
+
+
+class Camera:
+    """Which part of the table is on screen, and at what zoom.
+
+    Zoom levels are 1 and powers of 1 / ZOOM_STEP down to the zoom showing
+    the whole table, which is the last level and the one a camera starts at.
+    A table point (x, y) is drawn at (floor(x * zoom) - left, floor(y * zoom) - top):
+    the offset is in zoomed pixels, so panning scrolls by whole pixels and
+    pieces keep their placement relative to each other wherever the camera is.
+    """
+
+    def __init__(self, view_width, view_height, table_width, table_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.table_width = table_width
+        self.table_height = table_height
+        fit = min(1.0, view_width / table_width, view_height / table_height)
+        self.levels = [1.0]
+        zoom = 1 / ZOOM_STEP
+        while zoom > fit * 1.1:  # A level just above the fit would look the same
+            self.levels.append(zoom)
+            zoom /= ZOOM_STEP
+        if fit < 1:
+            self.levels.append(fit)
+        self.level = len(self.levels) - 1
+        self.left = 0
+        self.top = 0
+
+    @property
+    def zoom(self):
+        return self.levels[self.level]
+
+    def to_table(self, sx, sy):
+        """Table point under a screen point."""
+        zoom = self.zoom
+        return int((sx + self.left) // zoom), int((sy + self.top) // zoom)
+
+    def to_screen(self, x, y):
+        zoom = self.zoom
+        return math.floor(x * zoom) - self.left, math.floor(y * zoom) - self.top
+
+    def screen_positions(self, positions):
+        """Screen position of every row of an (n, 2) array of table positions, as a list."""
+        if self.zoom == 1:
+            return (positions - (self.left, self.top)).tolist()
+        return (np.floor(positions * self.zoom).astype(np.int64) - (self.left, self.top)).tolist()
+
+    def screen_rect(self, x, y, width, height):
+        """Screen rect covering a table rect, rounded outwards."""
+        zoom = self.zoom
+        left, top = math.floor(x * zoom), math.floor(y * zoom)
+        right, bottom = math.ceil((x + width) * zoom), math.ceil((y + height) * zoom)
+        return pygame.Rect(left - self.left, top - self.top, right - left, bottom - top)
+
+    def table_rect(self, rect):
+        """Table (x, y, width, height) under a screen rect, rounded outwards.
+
+        Grown by a screen pixel on every side, pieces shrunk to the zoom can be drawn a pixel past their table rect.
+        """
+        zoom = self.zoom
+        left, top = math.floor((rect.left - 1 + self.left) / zoom), math.floor((rect.top - 1 + self.top) / zoom)
+        right, bottom = math.ceil((rect.right + 1 + self.left) / zoom), math.ceil((rect.bottom + 1 + self.top) / zoom)
+        return left, top, right - left, bottom - top
+
+    def visible_rect(self):
+        """Table (x, y, width, height) on screen."""
+        return self.table_rect(pygame.Rect(0, 0, self.view_width, self.view_height))
+
+    def pan(self, dx, dy):
+        """Drag the table by (dx, dy) screen pixels, returns whether the view moved."""
+        return self._move(self.level, self.left - dx, self.top - dy)
+
+    def zoom_at(self, sx, sy, steps):
+        """Zoom in (steps > 0) or out by whole levels, keeping the table point under (sx, sy) in place.
+
+        Returns whether the view changed.
+        """
+        level = min(max(self.level - steps, 0), len(self.levels) - 1)
+        if level == self.level:
+            return False
+        x, y = (sx + self.left) / self.zoom, (sy + self.top) / self.zoom
+        zoom = self.levels[level]
+        return self._move(level, round(x * zoom) - sx, round(y * zoom) - sy)
+
+    def _move(self, level, left, top):
+        # Keep the table on screen, a table smaller than the view stays in the top left corner
+        zoom = self.levels[level]
+        left = min(max(left, 0), max(0, math.ceil(self.table_width * zoom) - self.view_width))
+        top = min(max(top, 0), max(0, math.ceil(self.table_height * zoom) - self.view_height))
+        if (level, left, top) == (self.level, self.left, self.top):
+            return False
+        self.level, self.left, self.top = level, left, top
+        return True
@@ -0,0 +1,36 @@
+class PieceClusters:
+    """Union-find over piece ids, grouping pieces that were snapped together.
+
+    Each root also keeps the list of its members, so a whole cluster can be
+    moved or drawn without scanning every piece. Unions attach the smaller
+    cluster to the larger one and finds halve the path as they go.
+    """
+
+    def __init__(self, count):
+        self.parent = list(range(count))
+        self.members_of = {piece: [piece] for piece in range(count)}  # root -> member ids
+
+    def find(self, piece):
+        parent = self.parent
+        while parent[piece] != piece:
+            parent[piece] = parent[parent[piece]]
+            piece = parent[piece]
+        return piece
+
+    def union(self, a, b):
+        """Join the clusters of a and b. Returns the root of the joined cluster."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if len(self.members_of[root_a]) < len(self.members_of[root_b]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.members_of[root_a].extend(self.members_of.pop(root_b))
+        return root_a
+
+    def members(self, piece):
+        """Ids of every piece in the cluster of piece, the list is owned by the cluster."""
+        return self.members_of[self.find(piece)]
+
+    def size(self, piece):
+        return len(self.members_of[self.find(piece)])
@@ -0,0 +1,65 @@
+import numpy as np
+
+CONFETTI_COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)]
+MIN_SIZE, MAX_SIZE = 2, 5  # Side of a confetti square in pixels
+SIZES = range(MIN_SIZE, MAX_SIZE + 1)
+
+
+class ConfettiSystem:
+    """Confetti squares falling over the screen, updated and drawn as whole arrays.
+
+    Positions and velocities live in NumPy arrays, so a frame is a handful
+    of array operations however many particles there are. Particles are kept
+    sorted by size, and drawing writes all the pixels of each size class into
+    the surface's pixel buffer with one indexed assignment, instead of a
+    ``pygame.draw.rect`` call per particle.
+    """
+
+    def __init__(self, count, width, height, seed=None):
+        rng = np.random.default_rng(seed)
+        sizes = rng.integers(MIN_SIZE, MAX_SIZE, size=count, endpoint=True)
+        order = np.argsort(sizes, kind="stable")
+        self.sizes = sizes[order]
+        self.positions = rng.uniform((0, 0), (width, height), size=(count, 2))
+        self.velocities = np.column_stack((rng.uniform(-3, 3, count), rng.uniform(3, 5, count)))
+        self.colors = rng.integers(0, len(CONFETTI_COLORS), size=count)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def update(self):
+        """Move every particle by one frame's worth of velocity."""
+        self.positions += self.velocities
+
+    def draw(self, surface):
+        width, height = surface.get_size()
+        corners = self.positions.astype(np.int64)
+        x, y = corners[:, 0], corners[:, 1]
+        on_screen = (x + self.sizes > 0) & (x < width) & (y + self.sizes > 0) & (y < height)
+        if not on_screen.any():
+            return
+        palette = [surface.map_rgb(color) for color in CONFETTI_COLORS]
+        if surface.get_bytesize() != 4:
+            # Only 32-bit surfaces can be written as one array, draw the rest square by square
+            for px, py, size, color in zip(x[on_screen], y[on_screen], self.sizes[on_screen], self.colors[on_screen]):
+                surface.fill(palette[color], (px, py, size, size))
+            return
+
+        x, y, sizes = x[on_screen], y[on_screen], self.sizes[on_screen]
+        colors = np.array(palette, dtype=np.uint32)[self.colors[on_screen]]
+        row = surface.get_pitch() // 4
+        # Squares cut by the screen edge need every pixel checked, the rest are written whole
+        inside = (x >= 0) & (y >= 0) & (x + sizes <= width) & (y + sizes <= height)
+        pixels = np.frombuffer(surface.get_view("0"), dtype=np.uint32)
+        bases, inside_sizes, inside_colors = y[inside] * row + x[inside], sizes[inside], colors[inside]
+        bounds = np.searchsorted(inside_sizes, [*SIZES, MAX_SIZE + 1])
+        for size, start, stop in zip(SIZES, bounds[:-1], bounds[1:]):
+            if start == stop:
+                continue
+            offsets = (np.arange(size)[:, None] * row + np.arange(size)).ravel()
+            pixels[(bases[start:stop, None] + offsets).ravel()] = np.repeat(inside_colors[start:stop], size * size)
+        for px, py, size, color in zip(x[~inside], y[~inside], sizes[~inside], colors[~inside]):
+            left, top = max(px, 0), max(py, 0)
+            right, bottom = min(px + size, width), min(py + size, height)
+            pixels.reshape(-1, row)[top:bottom, left:right] = color
+        del pixels  # Unlock the surface
@@ -0,0 +1,138 @@
+"""Connection of one player to a coop_server.py session.
+
+The client keeps a mirror of the server's puzzle (positions, locked pieces
+and owners), updated by every UPDATE it receives. A player drags a piece
+at once, without waiting for the server, and the server's copy follows
+the moves sent once per tick. The mirror positions of the piece being
+dragged lag behind until the drop. The game moves it where the server
+says once the hold ends. A hold ends when the server denies the grab,
+when it takes the piece back, or when the piece has landed after a drop.
+"""
+import socket
+import time
+
+from coop_protocol import (
+    DENIED, DROP, GRAB, GRANTED, MOVE, PIECE, PIECE_POINT, UPDATE, WELCOME, MessageReader, apply_update,
+    decode_welcome, message,
+)
+
+
+class CoopClient:
+    """Non-blocking connection to the server, call receive() and flush() once per frame."""
+
+    def __init__(self, host, port, timeout=5.0):
+        self.socket = socket.create_connection((host, port), timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = MessageReader()
+        self.inbox = []
+        self.received_bytes = 0
+        while not self.inbox:
+            data = self.socket.recv(1 << 16)
+            if not data:
+                raise ConnectionError("The server closed the connection before sending the puzzle")
+            self.received_bytes += len(data)
+            self.inbox = self.reader.feed(data)
+        kind, payload = self.inbox.pop(0)
+        if kind != WELCOME:
+            raise ConnectionError(f"Expected the puzzle from the server, got message type {kind}")
+        welcome = decode_welcome(payload)
+        self.player = welcome["player"]
+        self.tick_interval = 1 / welcome["tick_rate"]
+        self.rows, self.cols = welcome["rows"], welcome["cols"]
+        self.image_size = welcome["image_size"]
+        self.jigsaw_shapes = welcome["jigsaw_shapes"]
+        self.border_padding = welcome["border_padding"]
+        self.image_path = welcome["image_path"]
+        self.positions = welcome["positions"]
+        self.locked = welcome["locked"]
+        self.owners = welcome["owners"]
+        self.socket.setblocking(False)
+        self.outbox = bytearray()
+        self.held = None  # Piece grabbed here, until the hold ends
+        self.granted = False  # Whether the server gave us the held piece
+        self.pending_move = None  # (piece, x, y) not sent yet
+        self.last_move_time = 0.0
+        self.closed = False
+        self.updates = 0
+        self.update_bytes = 0
+
+    def grab(self, piece, members):
+        """Ask for piece, the one the cluster members are dragged by. False when the mirror shows it taken."""
+        if self.held is not None or self.closed or self.locked[piece] or self.owners[members].any():
+            return False
+        self.held = piece
+        self.granted = False
+        self._send(message(GRAB, PIECE.pack(piece)))
+        return True
+
+    def move(self, piece, x, y):
+        """Centre piece on x, y, sent by flush() at most once per tick."""
+        self.pending_move = (piece, x, y)
+
+    def drop(self, piece, x, y):
+        self.pending_move = None
+        self._send(message(DROP, PIECE_POINT.pack(piece, x, y)))
+
+    def flush(self):
+        """Send the latest move if a tick has passed since the last one, and whatever the socket did not take."""
+        now = time.perf_counter()
+        if self.pending_move is not None and now - self.last_move_time >= self.tick_interval:
+            self.outbox += message(MOVE, PIECE_POINT.pack(*self.pending_move))
+            self.pending_move = None
+            self.last_move_time = now
+        self._send(b"")
+
+    def receive(self):
+        """Apply everything the server sent since the last call.
+
+        Returns (locked, released, ended): the ids of the newly locked pieces,
+        whether any piece was let go (clusters may have joined), and the piece
+        whose hold here ended, or None.
+        """
+        locked, released, ended = [], False, None
+        messages, self.inbox = self.inbox, []
+        while not self.closed:
+            try:
+                data = self.socket.recv(1 << 16)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.closed = True
+                break
+            self.received_bytes += len(data)
+            messages.extend(self.reader.feed(data))
+        for kind, payload in messages:
+            if kind == UPDATE:
+                _, _, new_locks, owner_changes = apply_update(payload, self.positions, self.locked, self.owners)
+                self.updates += 1
+                self.update_bytes += len(payload)
+                locked.extend(new_locks.tolist())
+                released = released or len(new_locks) > 0 or not self.owners[owner_changes].all()
+                if self.granted and self.owners[self.held] != self.player:
+                    ended, self.held, self.granted = self.held, None, False
+            elif kind == GRANTED and PIECE.unpack(payload)[0] == self.held:
+                self.granted = True
+            elif kind == DENIED and PIECE.unpack(payload)[0] == self.held:
+                ended, self.held = self.held, None
+        if self.closed and self.held is not None:
+            ended, self.held, self.granted = self.held, None, False
+        return locked, released, ended
+
+    def close(self):
+        self.closed = True
+        self.socket.close()
+
+    def _send(self, data):
+        self.outbox += data
+        if not self.outbox or self.closed:
+            return
+        try:
+            sent = self.socket.send(self.outbox)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.closed = True
+            return
+        del self.outbox[:sent]
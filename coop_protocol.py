@@ -0,0 +1,179 @@
+"""Messages between the cooperative puzzle server and its players.
+
+Every message is a header, the payload length (u32) and the message type
+(u8), followed by the payload. Integers are little-endian and positions
+are table coordinates.
+
+Player -> server:
+
+    GRAB     piece u16                  start dragging piece and its cluster
+    MOVE     piece u16, x i32, y i32    centre the dragged piece on x, y
+    DROP     piece u16, x i32, y i32    move it there one last time and let go
+
+Server -> player:
+
+    WELCOME  player u8, tick rate u8, rows u16, cols u16, image width u32,
+             image height u32, jigsaw shapes u8, border padding u16, image
+             path length u16, then the image path, the positions as
+             rows * cols (x, y) i32 pairs, the locked bitset and the owner
+             of every piece as u8 (0 for nobody)
+    GRANTED  piece u16                  the answer to a GRAB
+    DENIED   piece u16
+    UPDATE   tick u32, then small moves (piece u16, dx i8, dy i8), moves
+             (piece u16, dx i16, dy i16), jumps (piece u16, x i32, y i32),
+             locks (piece u16) and owner changes (piece u16, owner u8),
+             each section a u16 count followed by its records
+
+An UPDATE holds everything that changed since the previous one, moves as
+offsets from the positions it left, which every player has. A dragged
+piece costs 4 bytes a tick instead of a snapshot of the whole puzzle.
+"""
+import struct
+
+import numpy as np
+
+HEADER = struct.Struct("<IB")  # payload length, message type
+PIECE = struct.Struct("<H")
+PIECE_POINT = struct.Struct("<Hii")
+WELCOME_HEADER = struct.Struct("<BBHHIIBHH")
+TICK = struct.Struct("<I")
+COUNT = struct.Struct("<H")
+
+GRAB = 1
+MOVE = 2
+DROP = 3
+WELCOME = 10
+GRANTED = 11
+DENIED = 12
+UPDATE = 13
+
+SMALL_MOVES = np.dtype([("piece", "<u2"), ("dx", "i1"), ("dy", "i1")])
+MOVES = np.dtype([("piece", "<u2"), ("dx", "<i2"), ("dy", "<i2")])
+JUMPS = np.dtype([("piece", "<u2"), ("x", "<i4"), ("y", "<i4")])
+LOCKS = np.dtype([("piece", "<u2")])
+OWNERS = np.dtype([("piece", "<u2"), ("owner", "u1")])
+SECTIONS = [SMALL_MOVES, MOVES, JUMPS, LOCKS, OWNERS]
+
+
+def message(kind, payload=b""):
+    return HEADER.pack(len(payload), kind) + payload
+
+
+def encode_welcome(player, tick_rate, rows, cols, image_size, jigsaw_shapes, border_padding, image_path,
+                   positions, locked, owners):
+    path = image_path.encode("utf-8")
+    return message(WELCOME, b"".join([
+        WELCOME_HEADER.pack(player, tick_rate, rows, cols, *image_size, jigsaw_shapes, border_padding, len(path)),
+        path,
+        positions.astype("<i4").tobytes(),
+        np.packbits(locked, bitorder="little").tobytes(),
+        owners.astype("u1").tobytes(),
+    ]))
+
+
+def decode_welcome(payload):
+    """The WELCOME fields as a dict, with positions, locked and owners as writable arrays."""
+    (player, tick_rate, rows, cols, image_width, image_height,
+     jigsaw_shapes, border_padding, path_length) = WELCOME_HEADER.unpack_from(payload)
+    count = rows * cols
+    offset = WELCOME_HEADER.size
+    image_path = bytes(payload[offset:offset + path_length]).decode("utf-8")
+    offset += path_length
+    positions = np.frombuffer(payload, "<i4", count * 2, offset).reshape(count, 2).astype(np.int32)
+    offset += count * 8
+    bitset = np.frombuffer(payload, np.uint8, (count + 7) // 8, offset)
+    locked = np.unpackbits(bitset, count=count, bitorder="little").astype(bool)
+    offset += len(bitset)
+    owners = np.frombuffer(payload, np.uint8, count, offset).copy()
+    return {
+        "player": player,
+        "tick_rate": tick_rate,
+        "rows": rows,
+        "cols": cols,
+        "image_size": (image_width, image_height),
+        "jigsaw_shapes": bool(jigsaw_shapes),
+        "border_padding": border_padding,
+        "image_path": image_path,
+        "positions": positions,
+        "locked": locked,
+        "owners": owners,
+    }
+
+
+def _section(dtype, *columns):
+    records = np.empty(len(columns[0]), dtype)
+    for name, column in zip(dtype.names, columns):
+        records[name] = column
+    return COUNT.pack(len(records)) + records.tobytes()
+
+
+def encode_update(tick, previous, positions, locked, owners, owner_pieces):
+    """UPDATE taking positions from previous to positions, with the ids of newly locked pieces
+    and the pieces whose owner changed (owners holds the owner of every piece).
+
+    Returns None when nothing changed.
+    """
+    locked = np.asarray(locked, dtype=np.intp)
+    owner_pieces = np.asarray(owner_pieces, dtype=np.intp)
+    changed = np.flatnonzero(np.any(positions != previous, axis=1))
+    if not len(changed) and not len(locked) and not len(owner_pieces):
+        return None
+    delta = positions[changed] - previous[changed]
+    small = np.all((delta >= -128) & (delta <= 127), axis=1)
+    medium = ~small & np.all((delta >= -32768) & (delta <= 32767), axis=1)
+    jump = ~small & ~medium
+    return message(UPDATE, b"".join([
+        TICK.pack(tick),
+        _section(SMALL_MOVES, changed[small], delta[small, 0], delta[small, 1]),
+        _section(MOVES, changed[medium], delta[medium, 0], delta[medium, 1]),
+        _section(JUMPS, changed[jump], positions[changed[jump], 0], positions[changed[jump], 1]),
+        _section(LOCKS, locked),
+        _section(OWNERS, owner_pieces, owners[owner_pieces]),
+    ]))
+
+
+def apply_update(payload, positions, locked, owners):
+    """Apply an UPDATE to a player's copy of the puzzle, in place.
+
+    Returns (tick, moved, newly locked, pieces whose owner changed), the ids as arrays.
+    """
+    (tick,) = TICK.unpack_from(payload)
+    offset = TICK.size
+    sections = []
+    for dtype in SECTIONS:
+        (count,) = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        sections.append(np.frombuffer(payload, dtype, count, offset))
+        offset += count * dtype.itemsize
+    small, medium, jump, lock, owner = sections
+    for records in (small, medium):
+        positions[records["piece"], 0] += records["dx"]
+        positions[records["piece"], 1] += records["dy"]
+    positions[jump["piece"], 0] = jump["x"]
+    positions[jump["piece"], 1] = jump["y"]
+    locked[lock["piece"]] = True
+    owners[owner["piece"]] = owner["owner"]
+    moved = np.concatenate([small["piece"], medium["piece"], jump["piece"]]).astype(np.intp)
+    return tick, moved, lock["piece"].astype(np.intp), owner["piece"].astype(np.intp)
+
+
+class MessageReader:
+    """Splits a byte stream into (type, payload) messages as the bytes arrive."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add received bytes, returns the messages they completed."""
+        self.buffer += data
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            length, kind = HEADER.unpack_from(self.buffer, offset)
+            end = offset + HEADER.size + length
+            if end > len(self.buffer):
+                break
+            messages.append((kind, bytes(self.buffer[offset + HEADER.size:end])))
+            offset = end
+        del self.buffer[:offset]
+        return messages
@@ -0,0 +1,261 @@
+"""Server for solving one puzzle together.
+
+The server owns the puzzle: a PuzzleEngine with every piece position and
+locked piece. Players connect over TCP (coop_protocol.py), get the whole
+puzzle once and then only what changed, in one UPDATE per tick sent to
+every player. A player asks for a piece before dragging it. The piece
+and its cluster then belong to that player until it is dropped, and the
+other players cannot pick them up. Moves arrive as often as the player
+sends them and the latest one is applied at the next tick. Drops are
+applied at once, snapping and locking exactly like a single player game.
+
+Run with: python coop_server.py IMAGE [--grid 50x50] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import time
+
+import numpy as np
+import pygame
+
+from camera import table_scale, table_size
+from coop_protocol import (
+    DENIED, DROP, GRAB, GRANTED, HEADER, MOVE, PIECE, PIECE_POINT, encode_update, encode_welcome, message,
+)
+from engine import PuzzleEngine
+from piece_atlas import tab_margin
+
+TICK_RATE = 20  # Updates sent per second
+MAX_PLAYERS = 64
+MAX_BUFFERED = 1024 * 1024  # Bytes waiting to be sent to a player before it is dropped as too slow
+BORDER_PADDING = 50  # Same as puzzle.py
+WINDOW_SIZE = (1920, 1080)  # Window the puzzle is laid out for, players with other windows zoom
+
+
+def puzzle_size(image_size, window_size, rows, cols):
+    """Size puzzle.py scales an image to for a new game in a window of window_size."""
+    fit_width, fit_height = window_size[0] - 2 * BORDER_PADDING, window_size[1] - 2 * BORDER_PADDING
+    scale = table_scale(*image_size, fit_width, fit_height, rows, cols)
+    factor = min(int(fit_width * scale) / image_size[0], int(fit_height * scale) / image_size[1])
+    return int(image_size[0] * factor), int(image_size[1] * factor)
+
+
+class CoopSession:
+    """The shared puzzle, who holds which piece, and what changed since the last UPDATE.
+
+    Players are numbered from 1, owner 0 is nobody.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.owners = np.zeros(engine.num_pieces, dtype=np.uint8)  # Player holding each piece
+        self.held = {}  # player -> piece it dragged the cluster by
+        self.targets = {}  # player -> latest (x, y) it moved its piece to, applied at the next tick
+        self.sent_positions = engine.positions.copy()  # Positions as of the last UPDATE
+        self.new_locks = []
+        self.owner_changes = set()
+        self.tick_count = 0
+
+    def snapshot(self):
+        """(positions, locked, owners) for a new player, as of the last UPDATE so the next one applies to it."""
+        return self.sent_positions, self.engine.locked, self.owners
+
+    def grab(self, player, piece):
+        """Give piece and its cluster to player, returns False when it is locked, held or player holds another."""
+        engine = self.engine
+        if player in self.held or not 0 <= piece < engine.num_pieces or engine.locked[piece]:
+            return False
+        members = engine.clusters.members(piece)
+        if self.owners[members].any():
+            return False
+        self.held[player] = piece
+        self.owners[members] = player
+        self.owner_changes.update(members)
+        return True
+
+    def move(self, player, piece, x, y):
+        if self.held.get(player) == piece:
+            self.targets[player] = (x, y)
+
+    def drop(self, player, piece, x, y):
+        """Move the piece of player to x, y and release it, it snaps and locks like in a single player game."""
+        if self.held.get(player) != piece:
+            return
+        del self.held[player]
+        self.targets.pop(player, None)
+        engine = self.engine
+        engine.dragging = piece
+        engine.drag(x, y)
+        _, locked = engine.drop()
+        self.new_locks.extend(locked)
+        self._reown()
+
+    def leave(self, player):
+        if self.held.pop(player, None) is not None:
+            self.targets.pop(player, None)
+            self._reown()
+
+    def _reown(self):
+        # A drop can join other clusters to a held one or lock them. A held cluster joined to
+        # another held cluster stays with the first player, locked pieces are taken away
+        owners = np.zeros_like(self.owners)
+        for player, piece in list(self.held.items()):
+            members = self.engine.clusters.members(piece)
+            if self.engine.locked[piece] or owners[members].any():
+                del self.held[player]
+                self.targets.pop(player, None)
+            else:
+                owners[members] = player
+        self.owner_changes.update(np.flatnonzero(owners != self.owners).tolist())
+        self.owners = owners
+
+    def tick(self):
+        """Apply the latest moves and return the UPDATE with everything that changed, None if nothing did."""
+        engine = self.engine
+        for player, (x, y) in self.targets.items():
+            engine.dragging = self.held[player]
+            engine.drag(x, y)
+        engine.dragging = None
+        self.targets.clear()
+        self.tick_count += 1
+        update = encode_update(
+            self.tick_count, self.sent_positions, engine.positions, self.new_locks, self.owners, sorted(self.owner_changes)
+        )
+        np.copyto(self.sent_positions, engine.positions)
+        self.new_locks = []
+        self.owner_changes.clear()
+        return update
+
+
+class CoopServer:
+    """Serves a CoopSession to its players and sends the UPDATEs."""
+
+    def __init__(self, session, image_path, jigsaw_shapes, tick_rate=TICK_RATE, exit_when_empty=False):
+        self.session = session
+        self.image_path = image_path
+        self.jigsaw_shapes = jigsaw_shapes
+        self.tick_rate = tick_rate
+        self.exit_when_empty = exit_when_empty
+        self.players = {}  # player -> StreamWriter
+        self.joined = 0
+        self.most_players = 0
+        self.bytes_sent = 0
+        self.tick_times = []  # Seconds spent on each tick
+        self.stopped = None  # Event set when the server should stop
+
+    def welcome(self, player):
+        engine = self.session.engine
+        positions, locked, owners = self.session.snapshot()
+        return encode_welcome(
+            player, self.tick_rate, engine.rows, engine.cols, (engine.image_width, engine.image_height),
+            self.jigsaw_shapes, engine.border_padding, self.image_path, positions, locked, owners,
+        )
+
+    def send(self, writer, data):
+        writer.write(data)
+        self.bytes_sent += len(data)
+
+    async def handle_player(self, reader, writer):
+        free = [player for player in range(1, MAX_PLAYERS + 1) if player not in self.players]
+        if not free:
+            writer.close()
+            return
+        player = free[0]
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.players[player] = writer
+        self.joined += 1
+        self.most_players = max(self.most_players, len(self.players))
+        self.send(writer, self.welcome(player))
+        session = self.session
+        try:
+            while True:
+                length, kind = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(length)
+                if kind == GRAB:
+                    (piece,) = PIECE.unpack(payload)
+                    reply = GRANTED if session.grab(player, piece) else DENIED
+                    self.send(writer, message(reply, payload))
+                elif kind == MOVE:
+                    session.move(player, *PIECE_POINT.unpack(payload))
+                elif kind == DROP:
+                    session.drop(player, *PIECE_POINT.unpack(payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            del self.players[player]
+            session.leave(player)
+            writer.close()
+            if self.exit_when_empty and not self.players:
+                self.stopped.set()
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        while not self.stopped.is_set():
+            next_tick = max(next_tick + interval, loop.time())  # Late ticks are not made up for
+            await asyncio.sleep(next_tick - loop.time())
+            start = time.perf_counter()
+            update = self.session.tick()
+            if update is not None:
+                for writer in list(self.players.values()):
+                    if writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+                        writer.close()  # Too slow to keep up, its handler cleans up
+                    else:
+                        self.send(writer, update)
+            self.tick_times.append(time.perf_counter() - start)
+
+    async def serve(self, host, port):
+        self.stopped = asyncio.Event()
+        server = await asyncio.start_server(self.handle_player, host, port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"Listening on {host}:{port}", flush=True)
+        async with server:
+            await self.run_ticks()
+
+    def summary(self):
+        times = sorted(self.tick_times) or [0.0]
+        return {
+            "ticks": len(self.tick_times),
+            "tick_mean_ms": round(statistics.fmean(times) * 1000, 3),
+            "tick_p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))] * 1000, 3),
+            "bytes_sent": self.bytes_sent,
+            "players_joined": self.joined,
+            "most_players": self.most_players,
+            "locked": int(np.count_nonzero(self.session.engine.locked)),
+            "pieces": self.session.engine.num_pieces,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a jigsaw puzzle for several players")
+    parser.add_argument("image", help="puzzle image, players load it from the same path")
+    parser.add_argument("--grid", default="10x10", help="rows x columns (default 10x10)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--window", default=f"{WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}", help="window size the puzzle is laid out for")
+    parser.add_argument("--seed", type=int, help="scatter seed, random by default")
+    parser.add_argument("--rectangular", action="store_true", help="rectangular pieces instead of jigsaw shapes")
+    parser.add_argument("--exit-when-empty", action="store_true", help="stop when the last player leaves")
+    args = parser.parse_args()
+    rows, cols = (int(n) for n in args.grid.lower().split("x"))
+    window_size = tuple(int(n) for n in args.window.lower().split("x"))
+
+    image_width, image_height = puzzle_size(pygame.image.load(args.image).get_size(), window_size, rows, cols)
+    engine = PuzzleEngine(rows, cols, image_width, image_height, BORDER_PADDING)
+    margin = 0 if args.rectangular else tab_margin(image_width, image_height, rows, cols)
+    engine.scatter(*table_size(image_width, image_height, *window_size, BORDER_PADDING), seed=args.seed, margin=margin)
+    server = CoopServer(CoopSession(engine), os.path.abspath(args.image), not args.rectangular, exit_when_empty=args.exit_when_empty)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    print(f"Server summary: {json.dumps(server.summary())}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import hashlib
+import heapq
+import hmac
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DB_PATH = os.environ.get("PUZZLE_DB_PATH", "puzzle.db")
+
+# Password hashing cost, new hashes use these and older ones are upgraded on login
+PASSWORD_KDF = os.environ.get("PUZZLE_PASSWORD_KDF", "pbkdf2_sha256")  # "pbkdf2_sha256" or "scrypt"
+PASSWORD_ITERATIONS = int(os.environ.get("PUZZLE_PASSWORD_ITERATIONS", 200_000))  # PBKDF2 rounds
+SCRYPT_N = int(os.environ.get("PUZZLE_SCRYPT_N", 2 ** 14))  # scrypt CPU/memory cost
+SCRYPT_R = 8
+SCRYPT_P = 1
+SESSION_TTL = 15 * 60  # Seconds a verified login is remembered
+LEADERBOARD_SIZE = 10
+WRITE_BATCH_SIZE = 256  # Most records written in one transaction
+LEADERBOARD_CACHE_ENTRIES = 1024  # (image, num_pieces) leaderboards kept in memory
+LEADERBOARD_CACHE_TTL = 60.0  # Seconds before a cached leaderboard is re-read, picks up other processes' records
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password_hash BLOB NOT NULL,
+    salt BLOB NOT NULL,
+    kdf TEXT NOT NULL DEFAULT 'pbkdf2_sha256:200000'
+);
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    puzzle_image TEXT NOT NULL,
+    num_pieces INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    completion_time INTEGER NOT NULL
+);
+-- Covers the leaderboard query: the top N is read straight off the index
+CREATE INDEX IF NOT EXISTS records_leaderboard
+    ON records (puzzle_image, num_pieces, completion_time, username);
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses them
+INSERT_USER_SQL = "INSERT INTO users (username, password_hash, salt, kdf) VALUES (?, ?, ?, ?)"
+SELECT_USER_SQL = "SELECT password_hash, salt, kdf FROM users WHERE username = ?"
+UPDATE_USER_HASH_SQL = "UPDATE users SET password_hash = ?, salt = ?, kdf = ? WHERE username = ?"
+INSERT_RECORD_SQL = (
+    "INSERT INTO records (username, puzzle_image, num_pieces, rows, cols, completion_time) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+LEADERBOARD_SQL = (
+    "SELECT username, completion_time FROM records "
+    "WHERE puzzle_image = ? AND num_pieces = ? "
+    "ORDER BY completion_time LIMIT ?"
+)
+
+_local = threading.local()  # One connection per thread
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+# Connection for the calling thread, opened on first use
+def get_connection():
+    global _schema_ready
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = sqlite3.connect(DB_PATH, timeout=30, cached_statements=64)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with _schema_lock:
+            if not _schema_ready:
+                connection.executescript(SCHEMA)
+                # Databases created before the kdf column hold PBKDF2 hashes with 200000 rounds
+                columns = [row[1] for row in connection.execute("PRAGMA table_info(users)")]
+                if "kdf" not in columns:
+                    with connection:
+                        connection.execute(
+                            "ALTER TABLE users ADD COLUMN kdf TEXT NOT NULL DEFAULT 'pbkdf2_sha256:200000'"
+                        )
+                _schema_ready = True
+        _local.connection = connection
+    return connection
+
+
+# KDF name and parameters new password hashes are stored with
+def current_kdf():
+    if PASSWORD_KDF == "scrypt":
+        return f"scrypt:{SCRYPT_N}:{SCRYPT_R}:{SCRYPT_P}"
+    return f"pbkdf2_sha256:{PASSWORD_ITERATIONS}"
+
+
+def _hash_password(password, salt, kdf):
+    name, *params = kdf.split(":")
+    if name == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, int(params[0]))
+    if name == "scrypt":
+        n, r, p = (int(param) for param in params)
+        return hashlib.scrypt(
+            password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32
+        )
+    raise ValueError(f"Unknown password KDF: {name}")
+
+
+class SessionCache:
+    """Recently verified logins, so logging in again skips the slow KDF.
+
+    Only a keyed SHA-256 of the password is kept, under a key that never
+    leaves the process.
+    """
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self.key = os.urandom(32)
+        self.sessions = {}  # username -> (expires_at, password digest)
+        self.lock = threading.Lock()
+
+    def _digest(self, username, password):
+        return hmac.new(self.key, f"{username}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+    def check(self, username, password):
+        with self.lock:
+            session = self.sessions.get(username)
+        if session is None or session[0] < time.monotonic():
+            return False
+        return hmac.compare_digest(session[1], self._digest(username, password))
+
+    def remember(self, username, password):
+        digest = self._digest(username, password)
+        with self.lock:
+            self.sessions[username] = (time.monotonic() + self.ttl, digest)
+
+
+session_cache = SessionCache()
+
+
+# Register a user, returns False if the username is taken
+def insert_user(username, password):
+    if not username or not password:
+        return False
+    salt = os.urandom(16)
+    kdf = current_kdf()
+    connection = get_connection()
+    try:
+        with connection:
+            connection.execute(INSERT_USER_SQL, (username, _hash_password(password, salt, kdf), salt, kdf))
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+
+# Check a username and password. Slow by design, call it off the event loop
+def validate_user(username, password):
+    if session_cache.check(username, password):
+        return True
+    connection = get_connection()
+    row = connection.execute(SELECT_USER_SQL, (username,)).fetchone()
+    if row is None:
+        return False
+    password_hash, salt, kdf = row
+    if not hmac.compare_digest(_hash_password(password, salt, kdf), password_hash):
+        return False
+    if kdf != current_kdf():
+        # Re-hash with the configured cost now that we know the password
+        new_salt = os.urandom(16)
+        new_kdf = current_kdf()
+        with connection:
+            connection.execute(
+                UPDATE_USER_HASH_SQL, (_hash_password(password, new_salt, new_kdf), new_salt, new_kdf, username)
+            )
+    session_cache.remember(username, password)
+    return True
+
+
+class RecordWriter:
+    """Background thread that batches queued records into single transactions."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="records-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, record):
+        self.queue.put(record)
+
+    def flush(self):
+        """Block until every queued record is committed."""
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                connection = get_connection()
+                with connection:
+                    connection.executemany(INSERT_RECORD_SQL, batch)
+            except sqlite3.Error as e:
+                print(f"Error saving records: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
+class LeaderboardCache:
+    """Top-N completion times per (puzzle_image, num_pieces), updated on every insert.
+
+    Each entry is a bounded max-heap of the N fastest times, so a new record
+    only displaces the slowest one. Entries expire after ``ttl`` seconds and
+    the least recently used entry is dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, size=LEADERBOARD_SIZE, max_entries=LEADERBOARD_CACHE_ENTRIES, ttl=LEADERBOARD_CACHE_TTL):
+        self.size = size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, heap of (-completion_time, -order, username))
+        self.order = itertools.count()  # Earlier records win ties, as in the insert order
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return [(username, -negative_time) for negative_time, _, username in sorted(entry[1], reverse=True)]
+
+    def put(self, key, rows):
+        """Store a leaderboard read from the database, fastest first."""
+        heap = [(-completion_time, -next(self.order), username) for username, completion_time in rows[:self.size]]
+        heapq.heapify(heap)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, heap)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def add(self, key, username, completion_time):
+        """Write-through for a new record, only touches leaderboards already cached."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            heap = entry[1]
+            item = (-completion_time, -next(self.order), username)
+            if len(heap) < self.size:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+leaderboard_cache = LeaderboardCache()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = RecordWriter()
+        return _writer
+
+
+# Queue a completion record, it is committed in the background
+def insert_record(username, puzzle_image, completion_time, rows, cols):
+    _get_writer().put((username, puzzle_image, rows * cols, rows, cols, completion_time))
+    leaderboard_cache.add((puzzle_image, rows * cols), username, completion_time)
+
+
+# Wait for queued records to be committed
+def flush_records():
+    if _writer is not None:
+        _writer.flush()
+
+
+# Fastest completions for a puzzle image and piece count, from the cache when possible
+def get_leaderboard(puzzle_image, num_pieces, limit=LEADERBOARD_SIZE):
+    key = (puzzle_image, num_pieces)
+    if limit <= leaderboard_cache.size:
+        cached = leaderboard_cache.get(key)
+        if cached is not None:
+            return cached[:limit]
+    flush_records()  # Include records still waiting in the write queue
+    rows = get_connection().execute(
+        LEADERBOARD_SQL, (puzzle_image, num_pieces, max(limit, leaderboard_cache.size))
+    ).fetchall()
+    leaderboard_cache.put(key, rows)
+    return rows[:limit]
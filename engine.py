@@ -0,0 +1,319 @@
+import numpy as np
+
+from clusters import PieceClusters
+from scatter import scatter_positions
+from spatial_index import SpatialIndex
+
+SNAP_DISTANCE = 10  # Pieces closer than this to their grid slot, or to a matching neighbour, snap to it
+
+# Input event kinds accepted by PuzzleEngine.apply_events
+PICK = "pick"  # (PICK, x, y): press the mouse button at x, y
+DRAG = "drag"  # (DRAG, x, y): move the mouse to x, y
+DROP = "drop"  # (DROP,): release the mouse button
+
+
+def grid_edges(length, count):
+    """Cut positions splitting length into count parts, the remainder spread one pixel at a time."""
+    return np.arange(count + 1, dtype=np.int64) * length // count
+
+
+def piece_rects(image_width, image_height, rows, cols):
+    """(x, y, width, height) of every piece in the image, in row-major order.
+
+    Unlike plain integer division, the cuts cover the whole image, so no
+    pixels are dropped at the right and bottom edges.
+    """
+    x_edges = grid_edges(image_width, cols)
+    y_edges = grid_edges(image_height, rows)
+    xs, ys = np.meshgrid(x_edges[:-1], y_edges[:-1])
+    widths, heights = np.meshgrid(np.diff(x_edges), np.diff(y_edges))
+    return np.column_stack((xs.ravel(), ys.ravel(), widths.ravel(), heights.ravel())).astype(np.int32)
+
+
+class PuzzleEngine:
+    """Headless puzzle state: piece positions, locked pieces, snapping grid and drag state.
+
+    The engine knows nothing about surfaces or the display, so it can be used
+    without pygame to simulate and replay games. Pieces are identified by their
+    index in row-major order, which is also their draw order.
+
+    Positions live in an N x 2 int32 array and locked pieces in a boolean
+    mask, so whole-board operations run as NumPy array operations. Grids can
+    be any rows x cols; piece sizes differ by at most a pixel when the image
+    does not divide evenly.
+
+    Pieces dropped next to a matching neighbour snap to it anywhere on the
+    table and join its cluster, which then drags as one unit. Snapped pieces
+    sit exactly at their grid offsets from each other, so clusters can be
+    rebuilt from positions alone and are not stored in save files.
+    """
+
+    def __init__(self, rows, cols, image_width, image_height, border_padding=50):
+        self.rows = rows
+        self.cols = cols
+        self.image_width = image_width
+        self.image_height = image_height
+        self.border_padding = border_padding
+        rects = piece_rects(image_width, image_height, rows, cols)
+        self.grid = rects[:, :2] + np.int32(border_padding)
+        self.sizes = rects[:, 2:].copy()
+        self.piece_width = int(self.sizes[:, 0].max())  # Largest piece, for layout
+        self.piece_height = int(self.sizes[:, 1].max())
+        # Plain ints for per-event lookups
+        self.grid_slots = [tuple(slot) for slot in self.grid.tolist()]
+        self.piece_sizes = [tuple(size) for size in self.sizes.tolist()]
+        self.positions = self.grid.copy()
+        self.in_place = np.ones(self.num_pieces, dtype=bool)  # Whether each piece sits exactly on its slot
+        self.correct_count = self.num_pieces  # Number of True entries in in_place
+        self.locked = np.zeros(self.num_pieces, dtype=bool)  # Locked-piece mask
+        self.dragging = None
+        self.clusters = PieceClusters(self.num_pieces)
+        self.index = SpatialIndex()
+        self.index.rebuild(self.positions.tolist(), self.piece_sizes)
+
+    @property
+    def num_pieces(self):
+        return self.rows * self.cols
+
+    @property
+    def locked_pieces(self):
+        """Ids of the locked pieces."""
+        return np.flatnonzero(self.locked).tolist()
+
+    @property
+    def loose_pieces(self):
+        """Ids of the pieces that are not locked, in draw order."""
+        return np.flatnonzero(~self.locked).tolist()
+
+    def set_positions(self, positions):
+        self.positions = np.array(positions, dtype=np.int32).reshape(self.num_pieces, 2)
+        self.in_place = np.all(self.positions == self.grid, axis=1)
+        self.correct_count = int(np.count_nonzero(self.in_place))
+        self.index.rebuild(self.positions.tolist(), self.piece_sizes)
+        self.rebuild_clusters()
+
+    def rebuild_clusters(self):
+        """Join grid neighbours that sit exactly at their grid offset from each other.
+
+        Locked and loose pieces are never joined, so a loose piece lying on
+        its slot can still be picked up on its own.
+        """
+        self.clusters = PieceClusters(self.num_pieces)
+        offsets = self.positions - self.grid  # Equal for pieces aligned with each other
+        ids = np.arange(self.num_pieces).reshape(self.rows, self.cols)
+        for first, second in ((ids[:, :-1].ravel(), ids[:, 1:].ravel()), (ids[:-1, :].ravel(), ids[1:, :].ravel())):
+            aligned = np.all(offsets[first] == offsets[second], axis=1) & (self.locked[first] == self.locked[second])
+            for a, b in zip(first[aligned].tolist(), second[aligned].tolist()):
+                self.clusters.union(a, b)
+
+    def move_piece(self, piece, x, y):
+        """Move a piece, keeping the index and the correctly-placed count up to date."""
+        x, y = int(x), int(y)
+        self.positions[piece] = (x, y)
+        self.index.move(piece, x, y)
+        grid_x, grid_y = self.grid_slots[piece]
+        now_in_place = x == grid_x and y == grid_y
+        if now_in_place != self.in_place[piece]:
+            self.in_place[piece] = now_in_place
+            self.correct_count += 1 if now_in_place else -1
+
+    def shift_pieces(self, pieces, dx, dy):
+        """Move several pieces by the same offset, e.g. a whole cluster."""
+        if len(pieces) == 1:
+            x, y = self.positions[pieces[0]].tolist()
+            self.move_piece(pieces[0], x + dx, y + dy)
+            return
+        ids = np.asarray(pieces, dtype=np.intp)
+        self.positions[ids] += np.array((dx, dy), dtype=np.int32)
+        moved = self.positions[ids]
+        now_in_place = np.all(moved == self.grid[ids], axis=1)
+        self.correct_count += int(np.count_nonzero(now_in_place)) - int(np.count_nonzero(self.in_place[ids]))
+        self.in_place[ids] = now_in_place
+        move = self.index.move
+        for piece, (x, y) in zip(pieces, moved.tolist()):
+            move(piece, x, y)
+
+    def scatter(self, table_width, table_height, seed=None, no_overlap=False, margin=0):
+        """Deal the pieces out around the board, with room for tabs reaching margin past each piece.
+
+        The same seed gives the same layout.
+        """
+        positions = scatter_positions(
+            self.num_pieces,
+            (self.piece_width, self.piece_height),
+            (table_width, table_height),
+            (self.border_padding, self.border_padding, self.image_width, self.image_height),
+            seed=seed,
+            no_overlap=no_overlap,
+            margin=margin,
+        )
+        self.locked = np.zeros(self.num_pieces, dtype=bool)
+        self.dragging = None
+        self.set_positions(positions)
+
+    def grid_neighbours(self, piece):
+        """Ids of the pieces next to piece in the finished puzzle."""
+        row, col = divmod(piece, self.cols)
+        neighbours = []
+        if col > 0:
+            neighbours.append(piece - 1)
+        if col < self.cols - 1:
+            neighbours.append(piece + 1)
+        if row > 0:
+            neighbours.append(piece - self.cols)
+        if row < self.rows - 1:
+            neighbours.append(piece + self.cols)
+        return neighbours
+
+    def _neighbour_snaps(self, piece, tolerance):
+        """(error, neighbour, dx, dy) for every grid neighbour in another cluster within tolerance.
+
+        dx, dy is the move that lines piece up with the neighbour. Candidates
+        come from the spatial index, so only pieces around piece are checked.
+        """
+        x, y = self.positions[piece].tolist()
+        width, height = self.piece_sizes[piece]
+        grid_x, grid_y = self.grid_slots[piece]
+        root = self.clusters.find(piece)
+        snaps = []
+        for other in self.index.query_rect(x - tolerance, y - tolerance, width + 2 * tolerance, height + 2 * tolerance):
+            step = other - piece
+            if step in (1, -1):
+                if other // self.cols != piece // self.cols:
+                    continue
+            elif step not in (self.cols, -self.cols):
+                continue
+            if self.clusters.find(other) == root:
+                continue
+            other_x, other_y = self.positions[other].tolist()
+            other_grid_x, other_grid_y = self.grid_slots[other]
+            dx = other_x - other_grid_x - (x - grid_x)
+            dy = other_y - other_grid_y - (y - grid_y)
+            if abs(dx) <= tolerance and abs(dy) <= tolerance:
+                snaps.append((abs(dx) + abs(dy), other, dx, dy))
+        return snaps
+
+    def _edge_members(self, members):
+        """Members of a cluster with at least one grid neighbour outside it."""
+        find = self.clusters.find
+        root = find(members[0])
+        return [piece for piece in members if any(find(other) != root for other in self.grid_neighbours(piece))]
+
+    def pieces_in_rect(self, x, y, width, height, locked=None):
+        """Ids of the pieces overlapping a rect in draw order, only the locked or loose ones if locked is given.
+
+        One array test over every piece, cheaper than the spatial index once the
+        rect covers a good part of the table.
+        """
+        left, top = self.positions[:, 0], self.positions[:, 1]
+        mask = (left <= x + width) & (left + self.sizes[:, 0] >= x) & (top <= y + height) & (top + self.sizes[:, 1] >= y)
+        if locked is not None:
+            mask &= self.locked == locked
+        return np.flatnonzero(mask).tolist()
+
+    def pick(self, x, y):
+        """Start dragging the topmost unlocked piece under x, y. Returns its id or None."""
+        hit = None
+        for item in self.index.query_point(x, y):
+            if (hit is None or item > hit) and not self.locked[item]:
+                hit = item
+        if hit is not None:
+            self.dragging = hit
+        return hit
+
+    def drag(self, x, y):
+        """Centre the dragged piece on x, y, its cluster moving with it. Returns False when nothing is being dragged."""
+        piece = self.dragging
+        if piece is None:
+            return False
+        width, height = self.piece_sizes[piece]
+        members = self.clusters.members(piece)
+        if len(members) == 1:
+            self.move_piece(piece, x - width // 2, y - height // 2)
+        else:
+            old_x, old_y = self.positions[piece].tolist()
+            self.shift_pieces(members, x - width // 2 - old_x, y - height // 2 - old_y)
+        return True
+
+    def drop(self):
+        """Release the dragged cluster, snapping it to its slot or to a matching neighbour.
+
+        Returns (moved, locked): the ids of the pieces that were dragged and
+        of the pieces that locked into their slots.
+        """
+        piece = self.dragging
+        if piece is None:
+            return [], []
+        self.dragging = None
+        moved = list(self.clusters.members(piece))
+        # Matching neighbours of the pieces on the cluster's edge, as (error, neighbour, dx, dy, member)
+        snaps = [
+            snap + (member,)
+            for member in self._edge_members(moved)
+            for snap in self._neighbour_snaps(member, SNAP_DISTANCE - 1)
+        ]
+        piece_x, piece_y = self.positions[piece].tolist()
+        grid_x, grid_y = self.grid_slots[piece]
+        if abs(piece_x - grid_x) < SNAP_DISTANCE and abs(piece_y - grid_y) < SNAP_DISTANCE:
+            shift = (grid_x - piece_x, grid_y - piece_y)
+        elif snaps:
+            shift = min(snaps)[2:4]  # Closest neighbour
+        else:
+            shift = (0, 0)
+        if shift != (0, 0):
+            self.shift_pieces(moved, *shift)
+        # Join every neighbour the cluster now lines up with exactly
+        loose = list(moved)  # Members of the joined cluster that are not locked yet
+        find = self.clusters.find
+        for _, other, dx, dy, member in snaps:
+            if (dx, dy) == shift and find(other) != find(member):
+                if not self.locked[other]:
+                    loose.extend(self.clusters.members(other))
+                self.clusters.union(member, other)
+        locked = []
+        if self.in_place[piece]:
+            locked = loose
+            self.locked[locked] = True
+        return moved, locked
+
+    def apply_events(self, events):
+        """Apply a batch of (kind, ...) input events. Returns the ids of the pieces that locked."""
+        snapped = []
+        for event in events:
+            kind = event[0]
+            if kind == DRAG:
+                self.drag(event[1], event[2])
+            elif kind == PICK:
+                self.pick(event[1], event[2])
+            elif kind == DROP:
+                snapped.extend(self.drop()[1])
+            else:
+                raise ValueError(f"Unknown event kind: {kind!r}")
+        return snapped
+
+    def is_complete(self):
+        return self.correct_count == self.num_pieces
+
+    def serialize(self):
+        return {
+            "piece_positions": self.positions.tolist(),
+            "locked_pieces": self.locked_pieces,
+            "rows": self.rows,
+            "cols": self.cols,
+            "scaled_image_width": self.image_width,
+            "scaled_image_height": self.image_height,
+        }
+
+    @classmethod
+    def deserialize(cls, data, border_padding=50):
+        engine = cls(
+            data["rows"],
+            data["cols"],
+            data["scaled_image_width"],
+            data["scaled_image_height"],
+            border_padding,
+        )
+        engine.set_positions(data["piece_positions"])
+        engine.locked[np.asarray(data["locked_pieces"], dtype=np.intp)] = True
+        engine.rebuild_clusters()
+        return engine
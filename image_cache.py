@@ -0,0 +1,193 @@
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+import pygame
+
+# On-disk entries: magic, pixel format, width, height, then zlib-compressed pixels
+DISK_MAGIC = b"PZI1"
+DISK_HEADER = struct.Struct("<4s4sII")
+DISK_SIZE_ONLY = b"SIZE"  # Pixel format of an entry holding just the size of an original image
+
+
+class ImageCache:
+    """LRU cache of decoded and scaled images, bounded by a memory budget.
+
+    Entries are keyed by (path, mtime, target), so editing an image on disk
+    invalidates everything derived from it. ``target`` describes the derived
+    surface, e.g. ("size", width, height); None is the decoded original.
+    With ``disk_dir`` set, derived surfaces are also kept on disk as compressed
+    raw pixels, which are much faster to read back than re-decoding and
+    rescaling a large photo, along with the size of each original so it need
+    not be decoded to work out a target size. The files are kept under
+    ``disk_max_bytes``, the least recently used are deleted first.
+
+    The cache is shared with the loader thread, so lookups hold a lock.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None, disk_max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()  # key -> surface, least recently used first
+        self.sizes = {}  # (path, mtime, None) -> (width, height) of the original
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
+
+    def _key(self, path, target):
+        return (os.path.abspath(path), os.stat(path).st_mtime_ns, target)
+
+    def _remember(self, key, surface):
+        size = self.surface_bytes(surface)
+        if size > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        self.entries[key] = surface
+        self.used_bytes += size
+        while self.used_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.used_bytes -= self.surface_bytes(evicted)
+
+    def _lookup(self, key):
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return surface
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used_bytes = 0
+
+    def load(self, path):
+        """Decoded original image."""
+        key = self._key(path, None)
+        with self.lock:
+            surface = self._lookup(key)
+            if surface is None:
+                self.misses += 1
+                surface = pygame.image.load(path)
+                self._remember(key, surface)
+            return surface
+
+    def original_size(self, path):
+        """(width, height) of the image at path, decoding it only when the disk cache does not know it."""
+        key = self._key(path, None)
+        with self.lock:
+            size = self.sizes.get(key)
+            if size is None:
+                size = self._read_disk_size(key)
+                if size is None:
+                    size = self.load(path).get_size()
+                    self._write_disk(key, DISK_HEADER.pack(DISK_MAGIC, DISK_SIZE_ONLY, *size))
+                self.sizes[key] = size
+            return size
+
+    def get(self, path, target, build):
+        """Surface derived from the image at path, calling build(original) on a miss."""
+        key = self._key(path, target)
+        with self.lock:
+            surface = self._lookup(key)
+            if surface is not None:
+                return surface
+            self.misses += 1
+            surface = self._read_disk(key)
+            if surface is None:
+                surface = build(self.load(path))
+                self._write_surface_disk(key, surface)
+            self._remember(key, surface)
+            return surface
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pzi")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Recently used, pruned last
+            magic, pixel_format, width, height = DISK_HEADER.unpack_from(data)
+            if magic != DISK_MAGIC or pixel_format == DISK_SIZE_ONLY:
+                return None
+            pixels = zlib.decompress(memoryview(data)[DISK_HEADER.size:])
+            return pygame.image.frombytes(pixels, (width, height), pixel_format.decode("ascii").strip())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            print(f"Ignoring unreadable image cache entry: {e}")
+            return None
+
+    def _read_disk_size(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read(DISK_HEADER.size)
+            os.utime(path)
+            magic, pixel_format, width, height = DISK_HEADER.unpack(data)
+        except FileNotFoundError:
+            return None
+        except (OSError, struct.error) as e:
+            print(f"Ignoring unreadable image cache entry: {e}")
+            return None
+        if magic != DISK_MAGIC or pixel_format != DISK_SIZE_ONLY:
+            return None
+        return width, height
+
+    def _write_surface_disk(self, key, surface):
+        if not self.disk_dir:
+            return
+        pixel_format = "RGBA" if surface.get_flags() & pygame.SRCALPHA else "RGB"
+        header = DISK_HEADER.pack(DISK_MAGIC, pixel_format.ljust(4).encode("ascii"), *surface.get_size())
+        self._write_disk(key, header, zlib.compress(pygame.image.tobytes(surface, pixel_format), 1))
+
+    def _write_disk(self, key, header, pixels=b""):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(header)
+                f.write(pixels)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing image cache entry: {e}")
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        # Delete the least recently used entries until the rest fit the disk budget
+        try:
+            with os.scandir(self.disk_dir) as scan:
+                files = [(entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+                         for entry in scan if entry.name.endswith(".pzi")]
+        except OSError as e:
+            print(f"Error listing the image cache: {e}")
+            return
+        used = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if used <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except FileNotFoundError:
+                used -= size
+            except OSError as e:
+                print(f"Error pruning image cache entry: {e}")
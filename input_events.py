@@ -0,0 +1,31 @@
+import pygame
+
+
+def _merge_motion(run):
+    if len(run) == 1:
+        return run[0]
+    last = run[-1]
+    rel = (sum(event.rel[0] for event in run), sum(event.rel[1] for event in run))
+    return pygame.event.Event(pygame.MOUSEMOTION, {**last.dict, "rel": rel})
+
+
+def coalesce_motion(events):
+    """Collapse every run of consecutive MOUSEMOTION events into one.
+
+    The merged event has the position and buttons of the last motion in the
+    run and the summed ``rel``. Runs are split by any other event, so a
+    button press still sees the cursor where it was when it happened.
+    """
+    coalesced = []
+    run = []
+    for event in events:
+        if event.type == pygame.MOUSEMOTION:
+            run.append(event)
+            continue
+        if run:
+            coalesced.append(_merge_motion(run))
+            run = []
+        coalesced.append(event)
+    if run:
+        coalesced.append(_merge_motion(run))
+    return coalesced
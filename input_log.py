@@ -0,0 +1,113 @@
+"""Record the input of a game and play it back frame by frame.
+
+A log is JSON lines: a header with everything needed to set the same game
+up again (image, grid, scatter seed, window and fit size), then one line
+per frame that had input. Playback hands each frame the events recorded
+for it, so a replay makes the same moves no matter how fast it runs.
+"""
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+import pygame
+
+LOG_VERSION = 1
+
+# Recorded event types: name in the log and the attributes kept
+EVENT_FIELDS = {
+    pygame.MOUSEBUTTONDOWN: ("mouse_down", ("pos", "button")),
+    pygame.MOUSEBUTTONUP: ("mouse_up", ("pos", "button")),
+    pygame.MOUSEMOTION: ("mouse_motion", ("pos", "rel", "buttons")),
+    pygame.MOUSEWHEEL: ("mouse_wheel", ("x", "y")),
+    pygame.KEYDOWN: ("key_down", ("key", "mod", "unicode", "scancode")),
+    pygame.KEYUP: ("key_up", ("key", "mod", "unicode", "scancode")),
+    pygame.TEXTINPUT: ("text_input", ("text",)),
+}
+EVENT_TYPES = {name: event_type for event_type, (name, _) in EVENT_FIELDS.items()}
+
+
+def _encode(event):
+    name, fields = EVENT_FIELDS[event.type]
+    return [name, {field: getattr(event, field) for field in fields}]
+
+
+def _decode(name, attributes):
+    attributes = {key: tuple(value) if isinstance(value, list) else value for key, value in attributes.items()}
+    return pygame.event.Event(EVENT_TYPES[name], attributes)
+
+
+class InputRecorder:
+    def __init__(self, path, header):
+        self.file = open(path, "w")
+        self.file.write(json.dumps({"version": LOG_VERSION, **header}) + "\n")
+        self.frame = 0
+        self.start = time.perf_counter()
+
+    def record(self, events):
+        """Log the input events of one frame, called once per frame even when there are none."""
+        recorded = [_encode(event) for event in events if event.type in EVENT_FIELDS]
+        if recorded:
+            ms = round((time.perf_counter() - self.start) * 1000, 1)
+            self.file.write(json.dumps({"frame": self.frame, "ms": ms, "events": recorded}) + "\n")
+        self.frame += 1
+
+    def close(self):
+        self.file.close()
+
+
+class InputReplay:
+    def __init__(self, path):
+        with open(path) as f:
+            self.header = json.loads(f.readline())
+            if self.header.get("version") != LOG_VERSION:
+                raise ValueError(f"Unsupported input log version {self.header.get('version')}")
+            self.frames = [json.loads(line) for line in f if line.strip()]
+        self.next_line = 0
+        self.frame = 0
+        self.events = 0
+        self.frame_starts = []
+
+    @property
+    def finished(self):
+        return self.next_line >= len(self.frames)
+
+    def next_events(self):
+        """Events recorded for the next frame."""
+        self.frame_starts.append(time.perf_counter())
+        events = []
+        if not self.finished and self.frames[self.next_line]["frame"] == self.frame:
+            events = [_decode(name, attributes) for name, attributes in self.frames[self.next_line]["events"]]
+            self.next_line += 1
+        self.frame += 1
+        self.events += len(events)
+        return events
+
+    def summary(self):
+        """Frames and events played back, throughput and frame time in milliseconds."""
+        starts = np.array(self.frame_starts)
+        frame_times = np.diff(starts) * 1000 if len(starts) > 1 else np.zeros(1)
+        seconds = float(starts[-1] - starts[0]) if len(starts) > 1 else 0.0
+        return {
+            "frames": self.frame,
+            "events": self.events,
+            "seconds": seconds,
+            "events_per_second": self.events / seconds if seconds else 0.0,
+            "frame_mean": float(frame_times.mean()),
+            "frame_p50": float(np.percentile(frame_times, 50)),
+            "frame_p99": float(np.percentile(frame_times, 99)),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process, None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KiB elsewhere
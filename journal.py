@@ -0,0 +1,127 @@
+"""Append-only move journal that autosaves puzzle progress between snapshots.
+
+Every drop is appended to ``<save file>.journal`` as a fixed-size record
+by a background writer thread, so the main loop never waits on the disk.
+Compaction writes a fresh snapshot with save_format and empties the
+journal. Records hold absolute positions, so replaying a journal on top of
+a snapshot that already contains them is harmless.
+"""
+import os
+import queue
+import struct
+import threading
+from collections import namedtuple
+
+from save_format import write_save
+
+MOVE = 1  # Piece dropped at (x, y)
+LOCK = 2  # Piece snapped into its slot at (x, y)
+
+RECORD = struct.Struct("<BIiiI")  # kind, piece, x, y, elapsed seconds
+
+# Frozen copy of the engine state handed to the writer thread
+Snapshot = namedtuple(
+    "Snapshot", "rows cols image_width image_height positions locked image_path elapsed_time timer_running"
+)
+
+
+def journal_path(save_path):
+    return f"{save_path}.journal"
+
+
+class ProgressJournal:
+    def __init__(self, save_path, compact_every=256):
+        self.save_path = save_path
+        self.path = journal_path(save_path)
+        self.compact_every = compact_every
+        self.records_since_compaction = 0
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="puzzle-journal", daemon=True)
+        self.thread.start()
+
+    @property
+    def needs_compaction(self):
+        return self.records_since_compaction >= self.compact_every
+
+    def record(self, kind, piece, x, y, elapsed_time):
+        self.queue.put(RECORD.pack(kind, piece, int(x), int(y), int(elapsed_time)))
+        self.records_since_compaction += 1
+
+    def compact(self, engine, image_path, elapsed_time, timer_running):
+        """Queue a snapshot of the current state, the journal restarts empty after it."""
+        self.queue.put(Snapshot(
+            engine.rows,
+            engine.cols,
+            engine.image_width,
+            engine.image_height,
+            engine.positions.copy(),
+            engine.locked.copy(),
+            image_path,
+            elapsed_time,
+            timer_running,
+        ))
+        self.records_since_compaction = 0
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        with open(self.path, "ab") as f:
+            running = True
+            while running:
+                batch = [self.queue.get()]
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for item in batch:
+                    if item is None:
+                        running = False
+                    elif isinstance(item, bytes):
+                        f.write(item)
+                    else:
+                        self._write_snapshot(f, item)
+                try:
+                    f.flush()
+                    os.fsync(f.fileno())
+                except OSError as e:
+                    print(f"Error flushing journal: {e}")
+
+    def _write_snapshot(self, f, snapshot):
+        try:
+            f.flush()
+            write_save(
+                self.save_path,
+                snapshot,
+                snapshot.image_path,
+                snapshot.elapsed_time,
+                snapshot.timer_running,
+            )
+            f.seek(0)
+            f.truncate()
+        except OSError as e:
+            print(f"Error writing snapshot: {e}")
+
+
+def replay_journal(save_path, engine):
+    """Apply the journal of save_path to engine. Returns the last elapsed time recorded, or None."""
+    try:
+        with open(journal_path(save_path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    elapsed_time = None
+    complete = len(data) - len(data) % RECORD.size  # A crash may leave half a record
+    for kind, piece, x, y, elapsed in RECORD.iter_unpack(memoryview(data)[:complete]):
+        if piece >= engine.num_pieces or kind not in (MOVE, LOCK):
+            continue
+        engine.move_piece(piece, x, y)
+        if kind == LOCK:
+            engine.locked[piece] = True
+        elapsed_time = elapsed
+    if elapsed_time is not None:
+        engine.rebuild_clusters()  # Snapped pieces were journaled at their aligned positions
+    return elapsed_time
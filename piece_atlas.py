@@ -0,0 +1,228 @@
+"""Jigsaw-shaped puzzle pieces packed into a single texture atlas.
+
+Every interior edge gets a round tab on one side and the matching blank on
+the other. The shapes are computed as a label map (which piece owns each
+pixel), using NumPy array operations rather than per-pixel loops. The masked
+pieces are then gathered into one SRCALPHA surface laid out as a grid, a
+band of piece rows at a time so memory stays small on large grids, and drawn
+with source-rect blits from it.
+
+A shaped piece reaches ``margin`` pixels past its grid cell on every side,
+so it is drawn at (x - margin, y - margin) for a piece whose cell is at x, y.
+"""
+import math
+
+import numpy as np
+import pygame
+
+from engine import grid_edges, piece_rects
+
+TAB_SIZE = 0.22  # How far tabs reach past the cell, as a fraction of the smallest piece side
+TAB_RADIUS = 0.6  # Knob radius as a fraction of the tab reach, the rest is the neck
+MIN_MARGIN = 3  # Smaller tabs are not worth drawing, pieces stay rectangular
+OUTLINE_SHADE = 0.55  # Brightness of the outline drawn along each piece's edge
+BAND_PIXELS = 1 << 21  # Atlas pixels built at once, about 25 bytes of working arrays each
+
+
+class PieceAtlas:
+    """One surface holding every piece, with the source rect of each piece in it."""
+
+    def __init__(self, surface, sources, margin):
+        self.surface = surface
+        self.sources = sources  # piece id -> (x, y, width, height) in surface
+        self.margin = margin
+
+    def __len__(self):
+        return len(self.sources)
+
+    def convert(self):
+        """Switch the atlas to the display's pixel format, blits are several times faster.
+
+        Needs a display mode, so call it on the main thread once the window is set up.
+        """
+        if self.margin:
+            self.surface = self.surface.convert_alpha()
+
+    def scaled(self, zoom):
+        """Copy of the atlas with every piece shrunk by zoom, for drawing them zoomed out.
+
+        Source rects are rounded outwards, so pieces side by side on the board
+        overlap by a pixel rather than leave a gap.
+        """
+        source = self.surface
+        if source.get_bitsize() not in (24, 32):
+            source = source.convert(32)  # smoothscale only takes 24 and 32 bit surfaces
+        width, height = source.get_size()
+        surface = pygame.transform.smoothscale(source, (max(1, round(width * zoom)), max(1, round(height * zoom))))
+        sources = []
+        for x, y, source_width, source_height in self.sources:
+            left, top = math.floor(x * zoom), math.floor(y * zoom)
+            right, bottom = math.ceil((x + source_width) * zoom), math.ceil((y + source_height) * zoom)
+            sources.append((left, top, right - left, bottom - top))
+        return PieceAtlas(surface, sources, round(self.margin * zoom))
+
+    def blit(self, target, piece, x, y):
+        target.blit(self.surface, (x - self.margin, y - self.margin), self.sources[piece])
+
+    def blits(self, target, placements):
+        """Draw (piece, (x, y)) pairs in order with a single blits call."""
+        surface, sources, margin = self.surface, self.sources, self.margin
+        target.blits(
+            [(surface, (x - margin, y - margin), sources[piece]) for piece, (x, y) in placements],
+            doreturn=False,
+        )
+
+
+def tab_layout(rows, cols, seed=None):
+    """Random tab directions for the interior edges.
+
+    Returns (vertical, horizontal): vertical[r, k] is +1 when the tab on the
+    edge right of piece (r, k) points right and -1 when it points left;
+    horizontal[k, c] is +1 when the tab below piece (k, c) points down.
+    """
+    rng = np.random.default_rng(seed)
+    vertical = rng.choice(np.array([-1, 1], dtype=np.int8), size=(rows, max(cols - 1, 0)))
+    horizontal = rng.choice(np.array([-1, 1], dtype=np.int8), size=(max(rows - 1, 0), cols))
+    return vertical, horizontal
+
+
+def _nearest_edge(coords, edges):
+    """Index of the cut nearest to each coordinate, among the two around its cell."""
+    cells = np.searchsorted(edges, coords, side="right") - 1
+    nearest = np.where(coords - edges[cells] < edges[cells + 1] - coords, cells, cells + 1)
+    return cells, nearest
+
+
+def piece_labels(width, height, rows, cols, margin, layout, top=0, bottom=None):
+    """Id of the piece owning each pixel of image rows top to bottom, as a (bottom - top, width) array.
+
+    Starts from the plain grid and hands the pixels inside every tab over to
+    the piece the tab belongs to, which also carves the matching blank out
+    of its neighbour.
+    """
+    x_edges = grid_edges(width, cols)
+    y_edges = grid_edges(height, rows)
+    xs = np.arange(width)
+    ys = np.arange(top, height if bottom is None else bottom)
+    col_of_x, nearest_x = _nearest_edge(xs, x_edges)
+    row_of_y, nearest_y = _nearest_edge(ys, y_edges)
+    labels = (row_of_y[:, None] * cols + col_of_x[None, :]).astype(np.int32)
+
+    radius = TAB_RADIUS * margin
+    offset = margin - radius  # Knob centre distance past the edge
+    vertical, horizontal = layout
+    # Tabs sit on the middle of a cut, so only pixels near a cut and near the
+    # middle of their cell can be inside one
+    near_cut_x = np.abs(xs + 0.5 - x_edges[nearest_x]) < margin
+    near_cut_y = np.abs(ys + 0.5 - y_edges[nearest_y]) < margin
+    mid_x = (x_edges[col_of_x] + x_edges[col_of_x + 1]) / 2
+    mid_y = (y_edges[row_of_y] + y_edges[row_of_y + 1]) / 2
+    near_mid_x = np.abs(xs + 0.5 - mid_x) <= radius
+    near_mid_y = np.abs(ys + 0.5 - mid_y) <= radius
+
+    if cols > 1:
+        # Tabs on the cuts between columns, one per row
+        by = np.flatnonzero(near_mid_y)
+        bx = np.flatnonzero(near_cut_x & (nearest_x >= 1) & (nearest_x <= cols - 1))
+        rows_y = row_of_y[by][:, None]
+        edge = nearest_x[bx][None, :]
+        sign = vertical[rows_y, edge - 1]
+        centre_x = x_edges[edge] + sign * offset
+        inside = (ys[by][:, None] + 0.5 - mid_y[by][:, None]) ** 2 + (bx[None, :] + 0.5 - centre_x) ** 2 <= radius ** 2
+        owner = rows_y * cols + edge - (sign > 0)
+        window = np.ix_(by, bx)
+        labels[window] = np.where(inside, owner, labels[window])
+
+    if rows > 1:
+        # Tabs on the cuts between rows, one per column
+        by = np.flatnonzero(near_cut_y & (nearest_y >= 1) & (nearest_y <= rows - 1))
+        bx = np.flatnonzero(near_mid_x)
+        edge = nearest_y[by][:, None]
+        cols_x = col_of_x[bx][None, :]
+        sign = horizontal[edge - 1, cols_x]
+        centre_y = y_edges[edge] + sign * offset
+        inside = (ys[by][:, None] + 0.5 - centre_y) ** 2 + (bx[None, :] + 0.5 - mid_x[bx][None, :]) ** 2 <= radius ** 2
+        owner = (edge - (sign > 0)) * cols + cols_x
+        window = np.ix_(by, bx)
+        labels[window] = np.where(inside, owner, labels[window])
+
+    return labels
+
+
+def tab_margin(width, height, rows, cols):
+    """How far tabs reach past the cell for this grid, 0 when pieces stay rectangular."""
+    smallest = min(width // cols, height // rows)
+    margin = int(smallest * TAB_SIZE)
+    return margin if margin >= MIN_MARGIN and rows * cols > 1 else 0
+
+
+def build_atlas(image, rows, cols, shaped=True, seed=None):
+    """Cut image into rows x cols pieces and pack them into a PieceAtlas.
+
+    With shaped=False, or when the pieces are too small for tabs, the atlas
+    is the image itself and the sources are the plain grid cells. The tab
+    layout is seeded with the grid size unless a seed is given, so a
+    reloaded game gets the same shapes.
+    """
+    width, height = image.get_size()
+    rects = piece_rects(width, height, rows, cols)
+    margin = tab_margin(width, height, rows, cols) if shaped else 0
+    if margin == 0:
+        return PieceAtlas(image, [tuple(rect) for rect in rects.tolist()], 0)
+
+    layout = tab_layout(rows, cols, (rows, cols) if seed is None else seed)
+
+    # Atlas cells are the largest piece plus the tab margin on each side.
+    # Arrays are (y, x) like the pixel rows they are built from
+    stride_w = int(rects[:, 2].max()) + 2 * margin
+    stride_h = int(rects[:, 3].max()) + 2 * margin
+    atlas_width, atlas_height = cols * stride_w, rows * stride_h
+    atlas_x = np.arange(atlas_width, dtype=np.int32)
+    atlas_col = atlas_x // stride_w
+    image_x = grid_edges(width, cols)[atlas_col] + atlas_x % stride_w - margin
+    valid_x = (image_x >= 0) & (image_x < width)
+    image_x = np.clip(image_x, 0, width - 1)
+    y_edges = grid_edges(height, rows)
+
+    # Built a band of piece rows at a time, written straight into the surface's pixels
+    surface = pygame.Surface((atlas_width, atlas_height), pygame.SRCALPHA, 32)
+    surface_rgb = pygame.surfarray.pixels3d(surface)  # (x, y) views, edits land in surface
+    surface_alpha = pygame.surfarray.pixels_alpha(surface)
+    band_rows = max(1, BAND_PIXELS // (atlas_width * stride_h))
+    for first_row in range(0, rows, band_rows):
+        start, end = first_row * stride_h, min(first_row + band_rows, rows) * stride_h
+        # The atlas lines just above and below the band are included for the outline test
+        band_top, band_bottom = max(start - 1, 0), min(end + 1, atlas_height)
+        atlas_y = np.arange(band_top, band_bottom, dtype=np.int32)
+        atlas_row = atlas_y // stride_h
+        image_y = y_edges[atlas_row] + atlas_y % stride_h - margin
+        valid_y = (image_y >= 0) & (image_y < height)
+        image_y = np.clip(image_y, 0, height - 1)
+        top, bottom = int(image_y.min()), int(image_y.max()) + 1
+        labels = piece_labels(width, height, rows, cols, margin, layout, top, bottom)
+
+        # A pixel belongs in an atlas cell when the cell's piece owns it. The
+        # lookups are separable, so gather whole rows and then whole columns
+        piece = atlas_row[:, None] * cols + atlas_col[None, :]
+        owners = labels.take(image_y - top, axis=0).take(image_x, axis=1)
+        mask = valid_y[:, None] & valid_x[None, :] & (owners == piece)
+        band = image.subsurface((0, top, width, bottom - top))
+        pixels = np.frombuffer(pygame.image.tobytes(band, "RGB"), dtype=np.uint8).reshape(bottom - top, width, 3)
+        rgb = pixels.take(image_y - top, axis=0).take(image_x, axis=1)
+
+        # Darken the outermost pixels of each piece so the outline shows on the table
+        interior = mask.copy()
+        interior[1:-1, 1:-1] &= mask[:-2, 1:-1] & mask[2:, 1:-1] & mask[1:-1, :-2] & mask[1:-1, 2:]
+        outline = mask & ~interior
+        rgb[outline] = (rgb[outline] * OUTLINE_SHADE).astype(np.uint8)
+
+        cells = slice(start - band_top, end - band_top)
+        surface_rgb[:, start:end] = rgb[cells].transpose(1, 0, 2)
+        surface_alpha[:, start:end] = (mask[cells] * np.uint8(255)).T
+    del surface_rgb, surface_alpha  # Unlocks the surface
+
+    sources = [
+        ((i % cols) * stride_w, (i // cols) * stride_h, w + 2 * margin, h + 2 * margin)
+        for i, (_, _, w, h) in enumerate(rects.tolist())
+    ]
+    return PieceAtlas(surface, sources, margin)
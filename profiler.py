@@ -0,0 +1,122 @@
+"""Opt-in per-phase frame timing for the main loop.
+
+The loop calls ``begin_frame()`` at the top of every frame and ``mark(phase)``
+after each part of it; a mark charges the time since the previous mark to
+that phase. The last ``capacity`` frames are kept in a NumPy ring buffer, so
+recording costs one ``perf_counter`` call per phase and no allocation.
+"""
+import json
+import time
+
+import numpy as np
+import pygame
+
+OVERLAY_REFRESH = 0.5  # Seconds between overlay text updates
+OVERLAY_COLOR = (255, 255, 0)
+OVERLAY_BACKGROUND = (0, 0, 0)
+
+
+class FrameProfiler:
+    def __init__(self, phases, capacity=3600, idle_phase=None):
+        self.phases = list(phases)
+        self.phase_index = {phase: i for i, phase in enumerate(self.phases)}
+        self.idle_phase = idle_phase  # Waiting for the next frame, left out of busy time
+        self.capacity = capacity
+        self.starts = np.zeros(capacity)  # perf_counter at the start of each frame
+        self.durations = np.zeros((capacity, len(self.phases)))  # Seconds spent in each phase
+        self.frames = 0  # Frames recorded so far, the latest is at (frames - 1) % capacity
+        self.current = np.zeros(len(self.phases))
+        self.frame_start = None
+        self.last_mark = None
+        self.overlay_surface = None
+        self.overlay_updated = 0.0
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            row = self.frames % self.capacity
+            self.starts[row] = self.frame_start
+            self.durations[row] = self.current
+            self.frames += 1
+        self.current[:] = 0.0
+        self.frame_start = now
+        self.last_mark = now
+
+    def mark(self, phase):
+        """Charge the time since the previous mark to phase."""
+        now = time.perf_counter()
+        self.current[self.phase_index[phase]] += now - self.last_mark
+        self.last_mark = now
+
+    def _recorded(self):
+        """(starts, durations) of the recorded frames, oldest first."""
+        count = min(self.frames, self.capacity)
+        if self.frames <= self.capacity:
+            return self.starts[:count], self.durations[:count]
+        split = self.frames % self.capacity
+        return np.roll(self.starts, -split), np.roll(self.durations, -split, axis=0)
+
+    def stats(self):
+        """FPS, frame time and busy time percentiles in milliseconds, and the mean per phase."""
+        starts, durations = self._recorded()
+        if len(starts) < 2:
+            return None
+        frame_times = np.diff(starts) * 1000
+        busy = durations.sum(axis=1)
+        if self.idle_phase is not None:
+            busy -= durations[:, self.phase_index[self.idle_phase]]
+        busy *= 1000
+        return {
+            "fps": float(1000 / frame_times.mean()),
+            "frame_p50": float(np.percentile(frame_times, 50)),
+            "frame_p99": float(np.percentile(frame_times, 99)),
+            "busy_p50": float(np.percentile(busy, 50)),
+            "busy_p99": float(np.percentile(busy, 99)),
+            "phases": dict(zip(self.phases, (durations.mean(axis=0) * 1000).tolist())),
+        }
+
+    def overlay(self, font):
+        """Surface with the current stats, re-rendered every OVERLAY_REFRESH seconds."""
+        now = time.perf_counter()
+        if self.overlay_surface is None or now - self.overlay_updated >= OVERLAY_REFRESH:
+            self.overlay_updated = now
+            stats = self.stats()
+            if stats is None:
+                lines = ["collecting frames..."]
+            else:
+                lines = [
+                    f"{stats['fps']:5.1f} FPS  frame p50 {stats['frame_p50']:5.1f} p99 {stats['frame_p99']:5.1f} ms",
+                    f"busy p50 {stats['busy_p50']:5.1f} p99 {stats['busy_p99']:5.1f} ms",
+                ] + [
+                    f"{phase:<15}{mean:7.2f} ms"
+                    for phase, mean in stats["phases"].items() if phase != self.idle_phase
+                ]
+            rendered = [font.render(line, True, OVERLAY_COLOR) for line in lines]
+            width = max(surface.get_width() for surface in rendered) + 10
+            height = sum(surface.get_height() for surface in rendered) + 10
+            self.overlay_surface = pygame.Surface((width, height))
+            self.overlay_surface.fill(OVERLAY_BACKGROUND)
+            y = 5
+            for surface in rendered:
+                self.overlay_surface.blit(surface, (5, y))
+                y += surface.get_height()
+        return self.overlay_surface
+
+    def write_trace(self, path):
+        """Write the recorded frames as Chrome trace JSON (chrome://tracing, Perfetto)."""
+        starts, durations = self._recorded()
+        if len(starts) == 0:
+            return
+        origin = starts[0]
+        events = []
+        for frame, (start, phase_durations) in enumerate(zip(starts.tolist(), durations.tolist())):
+            ts = (start - origin) * 1e6
+            total = sum(phase_durations)
+            events.append({"name": "frame", "ph": "X", "ts": ts, "dur": total * 1e6, "pid": 1, "tid": 1,
+                           "args": {"frame": frame}})
+            for phase, duration in zip(self.phases, phase_durations):
+                if duration > 0:
+                    events.append({"name": phase, "ph": "X", "ts": ts, "dur": duration * 1e6, "pid": 1, "tid": 2})
+                    ts += duration * 1e6
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
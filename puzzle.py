@@ -1,30 +1,30 @@
 import pygame
 import pygame_gui
-import pickle
+import argparse
+import importlib
+import json
 import os
 import random
-import sqlite3
+import re
+import sys
 import threading
-import tkinter as tk
-from database import insert_user, validate_user, insert_record, get_leaderboard
-from tkinter import Tk, messagebox
-from tkinter.filedialog import askopenfilename
-
-# Initialize Pygame and pygame_gui
-pygame.init()
-pygame.mixer.init()
-
-# Favicon 
-icon_image = pygame.image.load("image/9255645.png")
-pygame.display.set_icon(icon_image)
-
-# Sounds
-click_sound = pygame.mixer.Sound("sounds/click-234708.mp3")
-congrats_sound = pygame.mixer.Sound("sounds/goodresult-82807.mp3")
+from concurrent.futures import ThreadPoolExecutor
+from image_cache import ImageCache
+from renderer import DirtyRectRenderer
+from input_events import coalesce_motion
+from text_cache import TextCache
+
+# numpy, the modules built on it, database and tkinter are imported where they are first used, the
+# login screen needs none of them. They are imported on the loader thread after the first frame.
+DEFERRED_MODULES = [
+    "numpy", "engine", "piece_atlas", "camera", "solver", "save_format", "journal", "confetti", "database",
+    "tkinter", "tkinter.filedialog", "tkinter.messagebox",
+]
+
+# Sounds, loaded on the loader thread after the first frame
+click_sound = None
+congrats_sound = None
 background_music = "sounds/space-music-161094.mp3"
-pygame.mixer.music.load(background_music)
-pygame.mixer.music.play(-1)
-#pygame.mixer.music.set_volume(0.5) 
 
 # Constants
 WINDOW_WIDTH, WINDOW_HEIGHT = 800, 600
@@ -32,66 +32,123 @@ BG_COLOR = (39, 64, 1)
 BORDER_COLOR = (242, 159, 5)
 FPS = 60
 
+# Redraw only the changed regions of the game screen (set PUZZLE_DIRTY_RENDERING=0 to disable)
+DIRTY_RENDERING = os.environ.get("PUZZLE_DIRTY_RENDERING", "1") != "0"
+TIMER_RECT = pygame.Rect(20, 20, 180, 30)  # Area covered by the timer text
+HINT_DURATION = 3000  # Milliseconds a hint stays highlighted
+HINT_COLOR = (255, 255, 255)
+HINT_MAX_PIECES = 1024  # Largest puzzle solved for hints, the solver's score matrices take about 60 bytes per pair of pieces
+# Cut pieces with jigsaw tabs and blanks (set PUZZLE_JIGSAW_SHAPES=0 for rectangles)
+JIGSAW_SHAPES = os.environ.get("PUZZLE_JIGSAW_SHAPES", "1") != "0"
+
+# Frame profiling (--profile or PUZZLE_PROFILE=1): overlay toggled with F3, Chrome trace written on exit
+PROFILE = os.environ.get("PUZZLE_PROFILE", "0") != "0"
+PROFILE_TRACE = os.environ.get("PUZZLE_PROFILE_TRACE", "puzzle_trace.json")
+# Input recording and replay (--record/--replay or PUZZLE_RECORD/PUZZLE_REPLAY), see input_log
+RECORD_PATH = os.environ.get("PUZZLE_RECORD")
+REPLAY_PATH = os.environ.get("PUZZLE_REPLAY")
+COOP_ADDRESS = os.environ.get("PUZZLE_COOP")  # HOST:PORT of a coop_server.py session to join
+EXIT_AFTER_FIRST_FRAME = False  # --exit-after-first-frame, for measuring startup time
+PROFILE_PHASES = ["tick", "events", "jobs", "gui_update", "draw", "completion", "gui_draw", "overlay", "display_update"]
+
 # Game States
 LOGIN_SCREEN = "login_screen"
 HOME_SCREEN = "home_screen"
 GAME_SCREEN = "game_screen"
+LOADING_SCREEN = "loading_screen"  # Puzzle image is being prepared on the loader thread
 
 # Paths
 SAVE_PATH = "puzzle_save.txt"  # Save file for puzzle progress
-
-# Initialize pygame_gui Manager
-manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT))
-
-# Create the display window
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption("Jigsaw Puzzle")
+IMAGE_CACHE_DIR = os.environ.get("PUZZLE_IMAGE_CACHE_DIR", ".image_cache")  # Pre-scaled images, empty to disable
+IMAGE_CACHE_BYTES = 256 * 1024 * 1024  # Memory budget for decoded and scaled images
+IMAGE_CACHE_DISK_BYTES = 512 * 1024 * 1024  # Disk budget of the pre-scaled images, least recently used are deleted first
 
 # Variables
+manager = None  # pygame_gui UIManager, created at startup
+screen = None  # Display surface, created at startup
 username = None
 timer_running = False
 start_time = None
 elapsed_time = 0
 clock = pygame.time.Clock()
 running = True
+in_game = False  # Whether the game is in progress
+in_game_buttons = None  # Buttons for the in-game screen
 logged_in = False
 game_state = LOGIN_SCREEN
 puzzle_completed = False
 state_logged = False
 
-timer_font = pygame.font.Font(None, 36) 
+timer_texts = TextCache(None, 36)  # Timer and loading text, rendered again only when it changes
 
 # Default grid size
 ROWS = 3
 COLS = 3
+GRID_SIZE_OPTIONS = ["2x2", "3x3", "3x4", "4x4", "4x6", "5x5", "6x6", "6x8", "7x7", "8x8", "9x9", "10x10", "20x20", "50x50", "100x100"]
+GRID_SIZE_PATTERN = re.compile(r"(\d+)\s*[xX\u00d7]\s*(\d+)")  # "RxC", rows first
+MAX_GRID_SIZE = 100  # Most rows or columns in a grid
 
 # Variables for puzzle settings
 BORDER_PADDING = 50
-dragging = None  # Track which piece is being dragged
-locked_pieces = set()  # Set of locked pieces
-piece_positions = []  # Positions of the pieces
-pieces = []  # Puzzle pieces
-grid = []  # Grid for snapping
-
-class Confetti:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = random.randint(2, 5)
-        self.color = random.choice([(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)])
-        self.speed_x = random.uniform(-3, 3)
-        self.speed_y = random.uniform(3, 5)
-
-    def update(self):
-        self.x += self.speed_x
-        self.y += self.speed_y
-
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x, self.y, self.size, self.size))
+engine = None  # Puzzle state: positions, locked pieces, grid and dragging
+pieces = None  # PieceAtlas holding every puzzle piece
+renderer = DirtyRectRenderer()  # Dirty-rectangle renderer for the game screen
+profiler = None  # FrameProfiler with per-phase frame timings when profiling
+profile_font = None  # Font of the profiler overlay, created when it is first drawn
+profile_overlay = True  # Whether the profiler stats are drawn, toggled with F3
+profile_rect = None  # Screen area covered by the profiler overlay last frame
+image_cache = ImageCache(IMAGE_CACHE_BYTES, IMAGE_CACHE_DIR or None, IMAGE_CACHE_DISK_BYTES)  # Decoded and scaled puzzle images
+loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="puzzle-loader")  # Loads images off the event loop
+loading_job = None  # Future of the image being loaded
+journal = None  # Autosave journal of the current game, only when logged in
+auth_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="puzzle-auth")  # Password hashing off the event loop
+auth_job = None  # Future of the sign up or log in being verified
+auth_action = None  # "signup" or "login"
+rendered_elapsed_time = None  # Timer value currently on screen
+hint_solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="puzzle-solver")  # Hint solves, so loading never waits for one
+hint_job = None  # Future of the solver working out the layout for hints
+hint_solution = None  # Slot the solver found for every piece
+hint_buddies = None  # (right, below) best buddy of every piece, -1 for none
+hint = None  # (piece, slot, expiry ticks) of the hint on screen
+no_hint_until = None  # Ticks until which the hint button says there is no hint
+cluster_cache = None  # (root, size, zoom, screen offset from the dragged piece, surface) of the dragged cluster
+camera = None  # Camera over the table, which is larger than the window for puzzles with many pieces
+piece_mips = {}  # Zoom -> PieceAtlas of the pieces shrunk to it, made when that zoom is first drawn
+panning = False  # Whether the table is being dragged with the right or middle button
+mouse_pos = (0, 0)  # Last cursor position seen in an event, where the mouse wheel zooms
+loading_fit_size = None  # Size the image being loaded is scaled to fit
+scatter_seed = None  # Seed of the current game, every layout of it (resets included) comes from scatter_rng
+scatter_rng = random.Random()
+recorder = None  # InputRecorder of the current game when recording
+replay = None  # InputReplay of the recorded game being played back
+coop = None  # CoopClient of the shared puzzle being played
 
 def calculate_num_pieces(rows, cols):
     return rows * cols
 
+# Function to load the sounds and start the music, runs on the loader thread
+def load_audio():
+    global click_sound, congrats_sound
+    try:
+        pygame.mixer.init()
+        click_sound = pygame.mixer.Sound("sounds/click-234708.mp3")
+        congrats_sound = pygame.mixer.Sound("sounds/goodresult-82807.mp3")
+        pygame.mixer.music.load(background_music)
+        pygame.mixer.music.play(-1)
+        #pygame.mixer.music.set_volume(0.5) 
+    except Exception as e:
+        print(f"Error loading sounds: {e}")
+
+# Function to play a sound effect, skipped while the sounds are still loading
+def play_sound(sound):
+    if sound is not None:
+        sound.play()
+
+# Function to import the modules a game needs ahead of time, runs on the loader thread
+def warm_up_modules():
+    for module in DEFERRED_MODULES:
+        importlib.import_module(module)
+
 # Function to reset the timer
 def reset_timer():
     global start_time, elapsed_time, timer_running
@@ -111,9 +168,28 @@ def render_timer():
     minutes = elapsed_time // 60
     seconds = elapsed_time % 60
     timer_text = f"Time: {minutes:02}:{seconds:02}"
-    timer_surface = timer_font.render(timer_text, True, (255, 255, 255))
+    timer_surface = timer_texts.render(timer_text, (255, 255, 255))
     screen.blit(timer_surface, (20, 20))
 
+# Function to draw the profiler stats in the bottom-left corner, on top of everything else
+def draw_profile_overlay(dirty_rects):
+    global profile_rect, profile_font
+    if not profile_overlay:
+        if profile_rect is not None:
+            renderer.mark_dirty(profile_rect)  # Uncover the game screen under it next frame
+            profile_rect = None
+        return
+    if profile_font is None:
+        profile_font = pygame.font.Font(None, 22)
+    surface = profiler.overlay(profile_font)
+    rect = surface.get_rect(bottomleft=(10, screen.get_height() - 10))
+    screen.blit(surface, rect)
+    if profile_rect is not None and profile_rect != rect:
+        renderer.mark_dirty(profile_rect)  # The overlay changed size, restore what the old one covered
+    profile_rect = rect
+    if dirty_rects is not None:
+        dirty_rects.append(rect)
+
 # Function to pause the timer
 def pause_timer():
     global timer_running
@@ -126,34 +202,133 @@ def resume_timer():
     if timer_running:
         start_time = pygame.time.get_ticks() - elapsed_time * 1000  # Adjust for elapsed time
 
-def save_timer_state():
-    try:
-        timer_data = {
-            "elapsed_time": elapsed_time,  # Save the elapsed time
-            "timer_running": timer_running,  # Save the timer state
-        }
-        with open("timer_state.pkl", "wb") as timer_file:
-            pickle.dump(timer_data, timer_file)
-        print("Timer state saved!")
-    except Exception as e:
-        print(f"Error saving timer state: {e}")
-
-def load_timer_state():
-    global elapsed_time, timer_running
+# Save file holding a user's progress and timer
+def progress_path(username):
+    return f"{username}_saved_progress.sav"
+
+# Start autosaving the current game, moves are journaled on a background thread
+def start_journal():
+    global journal
+    from journal import ProgressJournal
+    stop_journal()
+    if logged_in:
+        journal = ProgressJournal(progress_path(username))
+
+# Write out everything still queued and stop autosaving
+def stop_journal():
+    global journal
+    if journal is not None:
+        journal.close()
+        journal = None
+
+# Function to start recording the input of a new game, replacing the previous recording
+def start_recording():
+    global recorder
+    from input_log import InputRecorder
+    stop_recording()
+    recorder = InputRecorder(RECORD_PATH, {
+        "image": IMAGE_PATH,
+        "rows": ROWS,
+        "cols": COLS,
+        "seed": scatter_seed,
+        "fit": list(loading_fit_size),
+        "window": [WINDOW_WIDTH, WINDOW_HEIGHT],
+        "jigsaw_shapes": JIGSAW_SHAPES,
+    })
+
+# Function to finish the recording of the current game
+def stop_recording():
+    global recorder
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+
+# Function to skip the menus and load the game of the recording being replayed
+def start_replay():
+    global ROWS, COLS, JIGSAW_SHAPES, IMAGE_PATH, WINDOW_WIDTH, WINDOW_HEIGHT, screen, manager
+    global loading_fit_size, loading_job, game_state
+    header = replay.header
+    ROWS, COLS = header["rows"], header["cols"]
+    JIGSAW_SHAPES = header["jigsaw_shapes"]
+    IMAGE_PATH = header["image"]
+    WINDOW_WIDTH, WINDOW_HEIGHT = header["window"]
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT))
+    loading_fit_size = tuple(header["fit"])
+    loading_job = loader.submit(prepare_puzzle_image, IMAGE_PATH, *loading_fit_size, ROWS, COLS)
+    game_state = LOADING_SCREEN
+
+# Function to skip the menus and load the puzzle of the co-op session
+def start_coop():
+    global coop, ROWS, COLS, JIGSAW_SHAPES, IMAGE_PATH, BORDER_PADDING, WINDOW_WIDTH, WINDOW_HEIGHT, screen, manager
+    global loading_job, game_state
+    from coop_client import CoopClient
+    host, port = COOP_ADDRESS.rsplit(":", 1)
     try:
-        with open("timer_state.pkl", "rb") as timer_file:
-            timer_data = pickle.load(timer_file)
-            elapsed_time = timer_data.get("elapsed_time", 0)
-            timer_running = timer_data.get("timer_running", False)
-            print("Timer state loaded successfully!")
-    except FileNotFoundError:
-        print("No timer state found!")
-        elapsed_time = 0
-        timer_running = False
-    except Exception as e:
-        print(f"Error loading timer state: {e}")
+        coop = CoopClient(host, int(port))
+    except OSError as error:  # Refused, timed out, or dropped before sending the puzzle (ConnectionError)
+        coop = None
+        show_error_message(f"Error: Could not join the co-op game at {COOP_ADDRESS}: {error}")
+        create_login_ui()
+        return
+    ROWS, COLS = coop.rows, coop.cols
+    JIGSAW_SHAPES = coop.jigsaw_shapes
+    IMAGE_PATH = coop.image_path
+    BORDER_PADDING = coop.border_padding
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    WINDOW_WIDTH, WINDOW_HEIGHT = screen.get_size()
+    manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT))
+    loading_job = loader.submit(prepare_sized_image, IMAGE_PATH, *coop.image_size, ROWS, COLS)
+    game_state = LOADING_SCREEN
+
+# Function to set the puzzle up as the co-op server has it
+def start_coop_game():
+    from engine import PuzzleEngine
+    global engine, using_saved_data
+    coop.receive()  # Catch up with the moves made while loading
+    engine = PuzzleEngine(ROWS, COLS, scaled_image_width, scaled_image_height, BORDER_PADDING)
+    engine.locked = coop.locked.copy()
+    engine.set_positions(coop.positions)
+    using_saved_data = True
+
+# Function to move the pieces other players moved, and the piece of this player once the server let go of it
+def sync_coop():
+    import numpy as np
+    global coop, cluster_cache
+    locked, released, ended = coop.receive()
+    if ended is not None and engine.dragging is not None:
+        renderer.mark_dirty(dragged_rect())  # Denied, or taken back when another player's drop locked it
+        engine.dragging = None
+    # Pieces held here stay where this player put them until the server is done with them
+    held = set(engine.clusters.members(coop.held)) if coop.held is not None else ()
+    stale = [i for i in np.flatnonzero(np.any(engine.positions != coop.positions, axis=1)).tolist() if i not in held]
+    for i in stale:
+        renderer.mark_dirty(piece_rect(i))
+        engine.move_piece(i, *coop.positions[i].tolist())
+        renderer.mark_dirty(piece_rect(i))
+    for i in locked:
+        engine.locked[i] = True
+        bake_locked_piece(i)
+        renderer.mark_dirty(piece_rect(i))
+    if ended is not None and not set(engine.clusters.members(ended)).isdisjoint(locked):
+        play_sound(click_sound)  # This player's piece locked into the board
+    if released:
+        engine.rebuild_clusters()  # Drops snap pieces to their neighbours
+        cluster_cache = None
+    coop.flush()
+    if coop.closed:
+        print("Lost the connection to the co-op server, playing on alone.")
+        coop = None
+
+# Wait for the completion records still queued for the database, nothing to wait for if it was never used
+def flush_database():
+    database = sys.modules.get("database")
+    if database is not None:
+        database.flush_records()
 
 def choose_image():
+    from tkinter import Tk
+    from tkinter.filedialog import askopenfilename
     Tk().withdraw()  # Hide the root window
     file_path = askopenfilename(
         filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp;*.gif")],
@@ -181,45 +356,41 @@ def scale_image_to_fit(image, max_width, max_height):
     
     return scaled_image
 
-# Update grid size based on dropdown selection
+# Parse a grid size such as "4x6" into (rows, cols), None if it is not a valid size
+def parse_grid_size(text):
+    match = GRID_SIZE_PATTERN.fullmatch(text.strip())
+    if match is None:
+        return None
+    rows, cols = int(match.group(1)), int(match.group(2))
+    if not (1 <= rows <= MAX_GRID_SIZE and 1 <= cols <= MAX_GRID_SIZE) or rows * cols < 2:
+        return None
+    return rows, cols
+
+# Update grid size based on dropdown selection or a custom "RxC" size
 def update_grid_size(selected_option):
     global ROWS, COLS
-    sizes = {
-        ('2x2', '2x2'): (2, 2),
-        ('3x3', '3x3'): (3, 3),
-        ('4x4', '4x4'): (4, 4),
-        ('5x5', '5x5'): (5, 5),
-        ('6x6', '6x6'): (6, 6),
-        ('7x7', '7x7'): (7, 7),
-        ('8x8', '8x8'): (8, 8),
-        ('9x9', '9x9'): (9, 9),
-        ('10x10', '10x10'): (10, 10),
-    }
-    if selected_option in sizes:
-        ROWS, COLS = sizes[selected_option]
-        generate_pieces()
+    if isinstance(selected_option, tuple):
+        selected_option = selected_option[0]  # (text, id) in newer pygame_gui versions
+    size = parse_grid_size(selected_option)
+    if size is None:
+        return False
+    ROWS, COLS = size
+    return True
 
-# Split image into pieces
+# Split image into pieces packed in one atlas, remainder pixels are spread over the rows and columns
 def split_image(scaled_image, rows, cols):
-    piece_width = scaled_image.get_width() // cols
-    piece_height = scaled_image.get_height() // rows
-    pieces = []
-    for row in range(rows):
-        for col in range(cols):
-            x = col * piece_width
-            y = row * piece_height
-            piece_surface = scaled_image.subsurface(
-                pygame.Rect(x, y, piece_width, piece_height)
-            )
-            pieces.append(piece_surface)
-    return pieces
+    from piece_atlas import build_atlas
+    return build_atlas(scaled_image, rows, cols, shaped=JIGSAW_SHAPES)
 
 # Generate puzzle pieces and their random positions
-def generate_pieces():
-    global pieces, piece_positions, locked_pieces, grid, using_saved_data
-    piece_width = scaled_image_width // COLS
-    piece_height = scaled_image_height // ROWS
-    pieces = split_image(scaled_image, ROWS, COLS)
+def generate_pieces(split_pieces=None):
+    from camera import table_size
+    from engine import PuzzleEngine
+    global pieces, engine, cluster_cache
+    # Reuse pieces already split on the loader thread
+    pieces = split_pieces if split_pieces is not None else split_image(scaled_image, ROWS, COLS)
+    pieces.convert()
+    piece_mips.clear()
 
     # Use saved positions if using_saved_data is True
     if using_saved_data:
@@ -227,65 +398,181 @@ def generate_pieces():
         print("Using saved positions for pieces.")
     else:
         # Generate random positions if not loading saved data
-        piece_positions = []
-        for _ in pieces:
-            rand_x = random.randint(0, WINDOW_WIDTH - piece_width)
-            rand_y = random.randint(0, WINDOW_HEIGHT - piece_height)
-            while border_rect.collidepoint(rand_x, rand_y):
-                rand_x = random.randint(0, WINDOW_WIDTH - piece_width)
-                rand_y = random.randint(0, WINDOW_HEIGHT - piece_height)
-            piece_positions.append([rand_x, rand_y])
-
-    # Generate grid positions based on the loaded ROWS and COLS
-    grid = [
-        (BORDER_PADDING + col * piece_width, BORDER_PADDING + row * piece_height)
-        for row in range(ROWS)
-        for col in range(COLS)
-    ]
+        engine = PuzzleEngine(ROWS, COLS, scaled_image_width, scaled_image_height, BORDER_PADDING)
+        table_width, table_height = table_size(
+            scaled_image_width, scaled_image_height, WINDOW_WIDTH, WINDOW_HEIGHT, BORDER_PADDING
+        )
+        engine.scatter(table_width, table_height, seed=scatter_rng.randrange(2 ** 32), margin=pieces.margin)
+
+    cancel_hint()
+    cluster_cache = None
+    renderer.reset()
+
+# Set up a camera showing the whole table, which is big enough for the board and every piece
+def reset_camera():
+    from camera import Camera, table_size
+    global camera, panning
+    table_width, table_height = table_size(
+        scaled_image_width, scaled_image_height, WINDOW_WIDTH, WINDOW_HEIGHT, BORDER_PADDING
+    )
+    right, bottom = (engine.positions + engine.sizes).max(axis=0).tolist()  # Saved on a larger screen
+    camera = Camera(WINDOW_WIDTH, WINDOW_HEIGHT, max(table_width, right), max(table_height, bottom))
+    panning = False
+    renderer.reset()
+
+# Load, scale and split the puzzle image, runs on the loader thread
+def prepare_puzzle_image(image_path, max_width, max_height, rows, cols):
+    from camera import table_scale
+
+    # Puzzles with many pieces are scaled past the fit size, onto a table larger than the window
+    image_width, image_height = image_cache.original_size(image_path)
+    scale = table_scale(image_width, image_height, max_width, max_height, rows, cols)
+    fit_width, fit_height = int(max_width * scale), int(max_height * scale)
+    factor = min(fit_width / image_width, fit_height / image_height)
+    width, height = int(image_width * factor), int(image_height * factor)
+
+    # Keyed on the size alone, so grids that scale the same share one surface
+    prepared_image = image_cache.get(
+        image_path, ("size", width, height), lambda image: scale_image_to_fit(image, fit_width, fit_height)
+    )
+    return prepared_image, split_image(prepared_image, rows, cols)
+
+# Load an image scaled to exactly width x height and split it, runs on the loader thread
+def prepare_sized_image(image_path, width, height, rows, cols):
+    prepared_image = image_cache.get(
+        image_path, ("smooth", width, height), lambda image: pygame.transform.smoothscale(image, (width, height))
+    )
+    return prepared_image, split_image(prepared_image, rows, cols)
+
+# Render the loading screen while the loader thread works
+def render_loading_screen():
+    dots = "." * (pygame.time.get_ticks() // 400 % 4)
+    text_surface = timer_texts.render(f"Loading puzzle{dots}", (255, 255, 255))
+    text_rect = text_surface.get_rect(midleft=(WINDOW_WIDTH // 2 - 100, WINDOW_HEIGHT // 2))
+    screen.blit(text_surface, text_rect)
+
+# Solve the puzzle from its pixels alone, runs on the hint solver thread
+def solve_layout(image, rows, cols):
+    import numpy as np
+    from solver import best_buddies, compatibility, image_tiles, solve
+    pixels = np.frombuffer(pygame.image.tobytes(image, "RGB"), dtype=np.uint8)
+    tiles = image_tiles(pixels.reshape(image.get_height(), image.get_width(), 3), rows, cols)
+    # Hand the pieces over shuffled, the solver must not rely on their order
+    order = np.random.default_rng().permutation(len(tiles))
+    shuffled = [tiles[piece] for piece in order]
+    scores = compatibility(shuffled)
+    placement = solve(shuffled, rows, cols, scores)
+    slots = np.empty(len(tiles), dtype=np.intp)
+    slots[order[placement.ravel()]] = np.arange(len(tiles))
+    # Best buddies as pieces rather than shuffled tiles
+    buddies = []
+    for buddy in best_buddies(*scores):
+        pieces_buddy = np.full(len(tiles), -1, dtype=np.intp)
+        pieces_buddy[order] = np.where(buddy >= 0, order[buddy], -1)
+        buddies.append(pieces_buddy)
+    return slots, tuple(buddies)
+
+# Screen rect of a grid slot
+def slot_rect(slot):
+    return camera.screen_rect(*engine.grid_slots[slot], *engine.piece_sizes[slot])
+
+# Highlight a loose piece and the slot the solver found for it, only when it is best buddies with a locked neighbour there
+def show_hint():
+    global hint
+    if hint is not None:
+        renderer.mark_dirty(piece_rect(hint[0]))
+        renderer.mark_dirty(slot_rect(hint[1]))
+    right, below = hint_buddies
+    rows, cols = engine.rows, engine.cols
+    locked = engine.locked
+
+    # Locked pieces are in their own slot, so a locked neighbour's slot is also its piece
+    def confident(piece):
+        slot = int(hint_solution[piece])
+        row, col = divmod(slot, cols)
+        return bool(
+            (col > 0 and locked[slot - 1] and right[slot - 1] == piece)
+            or (col < cols - 1 and locked[slot + 1] and right[piece] == slot + 1)
+            or (row > 0 and locked[slot - cols] and below[slot - cols] == piece)
+            or (row < rows - 1 and locked[slot + cols] and below[piece] == slot + cols)
+        )
+
+    sure = [i for i in engine.loose_pieces if i != engine.dragging and confident(i)]
+    if not sure:
+        hint = None
+        show_no_hint()
+        return
+    piece = min(sure, key=lambda i: int(hint_solution[i]))
+    hint = (piece, int(hint_solution[piece]), pygame.time.get_ticks() + HINT_DURATION)
+    renderer.mark_dirty(piece_rect(piece))
+    renderer.mark_dirty(slot_rect(hint[1]))
+
+# Say on the hint button that there is no hint to give, for as long as a hint would show
+def show_no_hint():
+    global no_hint_until
+    print("No hint available.")
+    hint_button.set_text("No hint available")
+    no_hint_until = pygame.time.get_ticks() + HINT_DURATION
+
+# Drop the hint and the solve of the previous game, a solve already running finishes unseen
+def cancel_hint():
+    global hint_job, hint_solution, hint_buddies, hint, no_hint_until
+    if hint_job is not None:
+        hint_job.cancel()
+    hint_job = None
+    hint_solution = None
+    hint_buddies = None
+    hint = None
+    no_hint_until = None
+
+# Outline the hinted piece and its slot
+def draw_hint():
+    if hint is not None:
+        piece, slot, _ = hint
+        pygame.draw.rect(screen, HINT_COLOR, piece_rect(piece), 3)
+        pygame.draw.rect(screen, HINT_COLOR, slot_rect(slot), 3)
 
 # Save puzzle progress
 def save_progress(username):
+    from save_format import write_save
     if not logged_in:
         show_error_message("You must be logged in to save progress.")
         return
     try:
-        save_data = {
-            "piece_positions": piece_positions,
-            "locked_pieces": list(locked_pieces),
-            "rows": ROWS,
-            "cols": COLS,
-            "image_path": IMAGE_PATH, 
-            "scaled_image_width": scaled_image_width,
-            "scaled_image_height": scaled_image_height,
-        }
-        with open(f"{username}_saved_progress.pkl", "wb") as f:
-            pickle.dump(save_data, f)
+        if journal is not None:
+            # Snapshot on the journal thread, which also empties the journal
+            journal.compact(engine, IMAGE_PATH, elapsed_time, timer_running)
+        else:
+            write_save(progress_path(username), engine, IMAGE_PATH, elapsed_time, timer_running)
         print(f"Progress saved for user {username}!")
     except Exception as e:
         print(f"Error saving progress: {e}") 
 
 # Load puzzle progress
 def load_progress(username):
+    from engine import PuzzleEngine
+    from journal import replay_journal
+    from save_format import read_save
     if not logged_in:
         show_error_message("You must be logged in to continue the game.")
         return False
-    global piece_positions, locked_pieces, ROWS, COLS, using_saved_data
+    global engine, ROWS, COLS, using_saved_data, elapsed_time, timer_running
     global scaled_image, scaled_image_width, scaled_image_height, border_rect, IMAGE_PATH
     try:
-        with open(f"{username}_saved_progress.pkl", "rb") as f:
-            save_data = pickle.load(f)
+        save_data = read_save(progress_path(username))
 
         # Reload the image from the saved path
         saved_image_path = save_data.get("image_path")
         
         IMAGE_PATH = saved_image_path
-        original_image = pygame.image.load(IMAGE_PATH)
 
         # Saved dimensions for scaling
         scaled_image_width = save_data["scaled_image_width"]
         scaled_image_height = save_data["scaled_image_height"]
-        scaled_image = pygame.transform.smoothscale(
-           original_image, (scaled_image_width, scaled_image_height)
+        scaled_image = image_cache.get(
+            IMAGE_PATH,
+            ("smooth", scaled_image_width, scaled_image_height),
+            lambda image: pygame.transform.smoothscale(image, (scaled_image_width, scaled_image_height)),
         )
         
         # Update border
@@ -293,24 +580,23 @@ def load_progress(username):
             (BORDER_PADDING, BORDER_PADDING, scaled_image_width, scaled_image_height)
         )
 
-        # Load puzzle state
-        piece_positions = save_data["piece_positions"]
-        locked_pieces = set(save_data["locked_pieces"])
-        ROWS = save_data["rows"]
-        COLS = save_data["cols"]
+        # Load puzzle state, the engine rebuilds the grid
+        engine = PuzzleEngine.deserialize(save_data, BORDER_PADDING)
+        ROWS = engine.rows
+        COLS = engine.cols
+
+        # Restore the timer stored with the progress
+        elapsed_time = save_data["elapsed_time"]
+        timer_running = save_data["timer_running"]
+
+        # Replay moves autosaved since the snapshot
+        journal_elapsed_time = replay_journal(progress_path(username), engine)
+        if journal_elapsed_time is not None:
+            elapsed_time = max(elapsed_time, journal_elapsed_time)
 
         # Set flag to use saved data
         using_saved_data = True
 
-        # Re-generate the grid
-        piece_width = scaled_image_width // COLS
-        piece_height = scaled_image_height // ROWS
-        grid[:] = [
-            (BORDER_PADDING + col * piece_width, BORDER_PADDING + row * piece_height)
-            for row in range(ROWS)
-            for col in range(COLS)
-        ]
-
         # Generate pieces with existing positions
         generate_pieces()
 
@@ -319,10 +605,14 @@ def load_progress(username):
     except FileNotFoundError:
         show_error_message(f"No saved progress found for user {username}.")
         return False
+    except ValueError as e:
+        print(f"Error loading progress: {e}")
+        show_error_message(f"Saved progress for user {username} could not be read.")
+        return False
 
 # Create in-game buttons
 def create_in_game_buttons(manager):
-    global save_button, reset_button, back_button
+    global save_button, reset_button, back_button, hint_button
     save_button = pygame_gui.elements.UIButton(
         relative_rect=pygame.Rect((1100, 50), (150, 35)), 
         text='Save progress', 
@@ -338,45 +628,165 @@ def create_in_game_buttons(manager):
         text='Back to menu', 
         manager=manager
     )
-    return save_button, reset_button, back_button
-
-# Function to check if the puzzle is complete
-def is_puzzle_complete():
-    for i, (piece_position) in enumerate(piece_positions):
-        # Check if each piece is placed correctly in the grid position
-        grid_x, grid_y = grid[i]
-        if piece_position != [grid_x, grid_y]:
-            return False
-    return True
-
-# Add a font for the congratulatory message
-font = pygame.font.SysFont("Arial", 40)
+    hint_button = pygame_gui.elements.UIButton(
+        relative_rect=pygame.Rect((1100, 200), (150, 35)),
+        text='Hint',
+        manager=manager
+    )
+    return save_button, reset_button, back_button, hint_button
+
+# Pieces at the camera's zoom, shrunk once per zoom level so zoomed out views blit small surfaces
+def zoomed_pieces():
+    zoom = camera.zoom
+    if zoom == 1:
+        return pieces
+    atlas = piece_mips.get(zoom)
+    if atlas is None:
+        atlas = piece_mips[zoom] = pieces.scaled(zoom)
+        atlas.convert()
+    return atlas
+
+# Screen rect a piece is drawn to, including its tabs
+def piece_rect(i):
+    atlas = zoomed_pieces()
+    x, y = camera.to_screen(*engine.positions[i].tolist())
+    _, _, width, height = atlas.sources[i]
+    return pygame.Rect(x - atlas.margin, y - atlas.margin, width, height)
+
+# Screen rect a group of pieces is drawn to, including their tabs
+def pieces_rect(ids):
+    ids = list(ids)
+    return piece_rect(ids[0]).unionall([piece_rect(i) for i in ids[1:]])
+
+# Locked or loose pieces on screen, or in the table area under a screen rect, in draw order
+def visible_pieces(locked, area=None):
+    margin = pieces.margin
+    if area is None:
+        # The whole view spans too many index cells, one array test over every piece is faster
+        x, y, width, height = camera.visible_rect()
+        return engine.pieces_in_rect(x - margin, y - margin, width + 2 * margin, height + 2 * margin, locked)
+    x, y, width, height = camera.table_rect(area)
+    # The index holds grid cells, widen the area so tabs reaching into it are found
+    found = engine.index.query_rect(x - margin, y - margin, width + 2 * margin, height + 2 * margin)
+    return [i for i in sorted(found) if engine.locked[i] == locked]
+
+# Surface with every piece of the dragged cluster, rebuilt only when the cluster or the zoom changes
+def dragged_cluster():
+    global cluster_cache
+    piece = engine.dragging
+    root = engine.clusters.find(piece)
+    members = engine.clusters.members(piece)
+    if cluster_cache is None or cluster_cache[:3] != (root, len(members), camera.zoom):
+        rect = pieces_rect(members)
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        relative = [(x - rect.x, y - rect.y) for x, y in camera.screen_positions(engine.positions[members])]
+        zoomed_pieces().blits(surface, zip(members, relative))
+        x, y = camera.to_screen(*engine.positions[piece].tolist())
+        cluster_cache = (root, len(members), camera.zoom, (rect.x - x, rect.y - y), surface)
+    return cluster_cache
+
+# Screen rect covered by the dragged piece or cluster
+def dragged_rect():
+    piece = engine.dragging
+    if engine.clusters.size(piece) == 1:
+        return piece_rect(piece)
+    _, _, _, (dx, dy), surface = dragged_cluster()
+    x, y = camera.to_screen(*engine.positions[piece].tolist())
+    return surface.get_rect(topleft=(x + dx, y + dy))
+
+# Draw the dragged piece, or its whole cluster in one blit
+def draw_dragged():
+    piece = engine.dragging
+    if engine.clusters.size(piece) == 1:
+        zoomed_pieces().blit(screen, piece, *camera.to_screen(*engine.positions[piece].tolist()))
+    else:
+        screen.blit(dragged_cluster()[4], dragged_rect())
+
+# Draw the static layer, locked pieces plus the board outline, limited to area if given
+def draw_static_layer(surface, area=None):
+    surface.fill(BG_COLOR, area)
+    # The outline as four fills, pygame.draw.rect outlines the part of a rect inside the clip area
+    left, top, width, height = camera.screen_rect(*border_rect)
+    edges = [(left, top, width, 2), (left, top + height - 2, width, 2), (left, top, 2, height), (left + width - 2, top, 2, height)]
+    for edge in edges:
+        surface.fill(BORDER_COLOR, edge)
+    locked = visible_pieces(True, area)
+    zoomed_pieces().blits(surface, zip(locked, camera.screen_positions(engine.positions[locked])))
+
+# Cached static background of the whole screen
+def build_static_background():
+    background = pygame.Surface(screen.get_size(), 0, screen)
+    draw_static_layer(background)
+    return background
+
+# Bake a newly locked piece into the cached background, with the locked pieces around it drawn again in
+# draw order: shrunk pieces overlap their neighbours by a pixel, and pieces lock in any order
+def bake_locked_piece(i):
+    background = renderer.background
+    if background is not None:
+        area = piece_rect(i).clip(background.get_rect())
+        background.set_clip(area)
+        draw_static_layer(background, area)
+        background.set_clip(None)
+
+# Draw the loose pieces on screen (dragged piece last) and the timer, limited to area if given
+def draw_dynamic_layer(area=None):
+    dragging = engine.dragging
+    # Pieces of the dragged cluster are drawn last, together
+    in_drag = set(engine.clusters.members(dragging)) if dragging is not None else ()
+    loose = [i for i in visible_pieces(False, area) if i not in in_drag]
+    zoomed_pieces().blits(screen, zip(loose, camera.screen_positions(engine.positions[loose])))
+    if dragging is not None:
+        draw_dragged()
+    draw_hint()
+    render_timer()
+
+# Pan the table by (dx, dy) screen pixels, scrolling what is drawn so only the uncovered edges are drawn again
+def pan_camera(dx, dy):
+    left, top = camera.left, camera.top
+    if camera.pan(dx, dy):
+        overlays = [TIMER_RECT, profile_rect] + [button.rect for button in in_game_buttons or ()]
+        renderer.scroll(screen, left - camera.left, top - camera.top, draw_static_layer, overlays)
+
+# Render the game screen by redrawing only the regions that changed
+def render_game_screen_dirty():
+    global rendered_elapsed_time
+    if elapsed_time != rendered_elapsed_time:
+        renderer.mark_dirty(TIMER_RECT)
+        rendered_elapsed_time = elapsed_time
+    if in_game_buttons:
+        for button in in_game_buttons:
+            renderer.mark_dirty(button.rect)
+    return renderer.render(screen, draw_dynamic_layer)
+
+congratulations_texts = TextCache(None, 74)
+CONFETTI_COUNT = 300
 
 def display_congratulations():
-    confetti_particles = [Confetti(random.randint(0, WINDOW_WIDTH), random.randint(0, WINDOW_HEIGHT)) for _ in range(300)]
+    from confetti import ConfettiSystem
+    confetti = ConfettiSystem(CONFETTI_COUNT, WINDOW_WIDTH, WINDOW_HEIGHT)
+    text_surface = congratulations_texts.render("Congratulations!", (166, 47, 3))
+    text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
     start_time = pygame.time.get_ticks()
     duration = 3000  # Duration of the congratulations message in milliseconds
 
     # Play the congratulations sound
-    congrats_sound.play()
+    play_sound(congrats_sound)
 
     while pygame.time.get_ticks() - start_time < duration:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                flush_database()
                 pygame.quit()
                 exit()
 
         screen.fill(BG_COLOR)
 
         # Draw confetti particles
-        for confetti in confetti_particles:
-            confetti.update()
-            confetti.draw(screen)
-
-        # Render the congratulations text
-        font = pygame.font.Font(None, 74)
-        text_surface = font.render("Congratulations!", True, (166, 47, 3))
-        text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        confetti.update()
+        confetti.draw(screen)
+
+        # Draw the congratulations text
         screen.blit(text_surface, text_rect)
 
         pygame.display.update()
@@ -385,6 +795,8 @@ def display_congratulations():
     return True
 
 def display_leaderboard_popup(puzzle_image, num_pieces):
+    import tkinter as tk
+    from database import get_leaderboard
     leaderboard = get_leaderboard(puzzle_image, num_pieces)
     if not leaderboard:
         show_error_message("No records found for this puzzle.")
@@ -423,6 +835,8 @@ def show_leaderboard_after_delay(puzzle_image, num_pieces):
 
 # Function to show error message
 def show_error_message(message):
+    import tkinter as tk
+    from tkinter import messagebox
     root = tk.Tk()
     root.withdraw()  # Hide the root window
     messagebox.showerror("Error", message)
@@ -430,7 +844,7 @@ def show_error_message(message):
 
 # Create UI elements for registration and login
 def create_login_ui():
-    global title_label, username_label, password_label, username_input, password_input, signup_button, login_button, no_authentication_button, exit_login_button
+    global title_label, username_label, password_label, username_input, password_input, signup_button, login_button, no_authentication_button, exit_login_button, auth_status_label
     title_label = pygame_gui.elements.UILabel(
         relative_rect=pygame.Rect((250, 50), (300, 50)), 
         text="Jigsaw Puzzle", 
@@ -475,21 +889,50 @@ def create_login_ui():
         text="Exit",
         manager=manager,
     )
+    auth_status_label = pygame_gui.elements.UILabel(
+        relative_rect=pygame.Rect((250, 520), (300, 30)),
+        text="",
+        manager=manager,
+    )
+
+# Run a sign up or log in on the auth thread and show that it is being verified
+def start_auth(action, username, password):
+    global auth_job, auth_action
+    from database import insert_user, validate_user
+    auth_action = action
+    auth_job = auth_executor.submit(insert_user if action == "signup" else validate_user, username, password)
+    signup_button.disable()
+    login_button.disable()
+    auth_status_label.set_text("Verifying...")
+
+# Let the player try again after a sign up or log in finished
+def finish_auth():
+    global auth_job
+    auth_job = None
+    signup_button.enable()
+    login_button.enable()
+    auth_status_label.set_text("")
 
 # Main menu elements
 def create_home_screen_ui():
-    global title_label, dropdown_menu, start_button, continue_button, back_to_login_button, exit_button
+    global title_label, dropdown_menu, grid_size_entry, start_button, continue_button, back_to_login_button, exit_button
     title_label = pygame_gui.elements.UILabel(
         relative_rect=pygame.Rect((250, 20), (300, 50)),
         text="Jigsaw Puzzle",
         manager=manager,
     )
     dropdown_menu = pygame_gui.elements.UIDropDownMenu(
-        options_list=["2x2", "3x3", "4x4", "5x5", "6x6", "7x7", "8x8", "9x9", "10x10"],
+        options_list=GRID_SIZE_OPTIONS,
         starting_option="2x2",  # Default is 2x2
         relative_rect=pygame.Rect((250, 100), (300, 50)),
         manager=manager,
     )
+    # Any other grid, e.g. "12x16", takes precedence over the dropdown when filled in
+    grid_size_entry = pygame_gui.elements.UITextEntryLine(
+        relative_rect=pygame.Rect((560, 100), (150, 50)),
+        manager=manager,
+        placeholder_text="Custom RxC",
+    )
     start_button = pygame_gui.elements.UIButton(
         relative_rect=pygame.Rect((250, 200), (300, 50)),
         text="Start New Game",
@@ -511,76 +954,176 @@ def create_home_screen_ui():
         manager=manager,
     )
 
-create_login_ui()
-
-# Main loop
-running = True
-in_game = False  # Whether the game is in progress
-in_game_buttons = None  # Buttons for the in-game screen
-
-while running:
-    time_delta = clock.tick(FPS) / 1000.0
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Jigsaw puzzle game")
+    arg_parser.add_argument("--profile", action="store_true", help="record per-phase frame timings")
+    arg_parser.add_argument("--profile-trace", metavar="PATH", help="where to write the Chrome trace on exit")
+    arg_parser.add_argument("--record", metavar="PATH", help="record the input of each new game to PATH")
+    arg_parser.add_argument("--replay", metavar="PATH", help="play a recorded game back as fast as possible and exit")
+    arg_parser.add_argument("--coop", metavar="HOST:PORT", help="join the puzzle of a coop_server.py session")
+    arg_parser.add_argument("--exit-after-first-frame", action="store_true", help="quit once the first frame is shown")
+    args, _ = arg_parser.parse_known_args()
+    PROFILE = args.profile or PROFILE
+    PROFILE_TRACE = args.profile_trace or PROFILE_TRACE
+    RECORD_PATH = args.record or RECORD_PATH
+    REPLAY_PATH = args.replay or REPLAY_PATH
+    COOP_ADDRESS = args.coop or COOP_ADDRESS
+    EXIT_AFTER_FIRST_FRAME = args.exit_after_first_frame
+
+    # Initialize Pygame and pygame_gui
+    pygame.init()
+
+    # Favicon 
+    icon_image = pygame.image.load("image/9255645.png")
+    pygame.display.set_icon(icon_image)
+
+    # Initialize pygame_gui Manager
+    manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    # Create the display window
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Jigsaw Puzzle")
+
+    if PROFILE:
+        from profiler import FrameProfiler
+        profiler = FrameProfiler(PROFILE_PHASES, idle_phase="tick")
+    if REPLAY_PATH:
+        from input_log import InputReplay
+        replay = InputReplay(REPLAY_PATH)
+
+    if replay is not None:
+        start_replay()
+    elif COOP_ADDRESS:
+        start_coop()
+    else:
+        create_login_ui()
+
+    # Main loop
+    first_frame = True
+
+    while running:
+        if profiler is not None:
+            profiler.begin_frame()
+        time_delta = clock.tick(FPS if replay is None else 0) / 1000.0  # Replays run flat out
+        if profiler is not None:
+            profiler.mark("tick")
+
+        events = pygame.event.get()
+        if replay is not None and game_state == GAME_SCREEN:
+            # Only quitting is taken from the real input, the game plays from the log
+            events = [event for event in events if event.type == pygame.QUIT] + replay.next_events()
+            if replay.finished:
+                running = False
+        elif recorder is not None and game_state == GAME_SCREEN:
+            recorder.record(events)
+        events = coalesce_motion(events)  # One drag per frame however fast the mouse reports
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+
+            if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+                renderer.invalidate()
+
+            if profiler is not None and event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profile_overlay = not profile_overlay
+
+            if hasattr(event, "pos"):
+                mouse_pos = event.pos
+
+            gameplay_event = False  # Picking, dragging and dropping pieces and moving the camera, the GUI does not see these
+            if in_game and game_state == GAME_SCREEN:
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    # Topmost unlocked piece under the cursor
+                    hit = engine.pick(*camera.to_table(*event.pos))
+                    if hit is not None and coop is not None and not coop.grab(hit, engine.clusters.members(hit)):
+                        engine.dragging = hit = None  # Another player has it
+                    if hit is not None:
+                        renderer.mark_dirty(dragged_rect())  # Now drawn on top
+                        gameplay_event = True
+
+                elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and coop is not None:
+                    if engine.dragging is not None:
+                        # The server snaps the piece, sync_coop moves it where it landed
+                        gameplay_event = True
+                        piece = engine.dragging
+                        renderer.mark_dirty(dragged_rect())
+                        x, y = engine.positions[piece].tolist()
+                        width, height = engine.piece_sizes[piece]
+                        coop.drop(piece, x + width // 2, y + height // 2)
+                        engine.dragging = None
+
+                elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                    if engine.dragging is not None:
+                        gameplay_event = True
+                        old_rect = dragged_rect()
+                        cluster_size = engine.clusters.size(engine.dragging)
+                        moved, locked = engine.drop()
+                        renderer.mark_dirty(old_rect)
+                        renderer.mark_dirty(pieces_rect(moved))
+                        for i in locked:
+                            bake_locked_piece(i)
+                        if locked or engine.clusters.size(moved[0]) > cluster_size:
+                            play_sound(click_sound)  # Snapped to the board or to a neighbour
+                        if journal is not None:
+                            from journal import LOCK, MOVE
+                            locked_set = set(locked)
+                            positions = engine.positions.tolist()
+                            for i in moved:
+                                journal.record(LOCK if i in locked_set else MOVE, i, *positions[i], elapsed_time)
+                            for i in locked_set.difference(moved):
+                                journal.record(LOCK, i, *positions[i], elapsed_time)
+                            if journal.needs_compaction:
+                                save_progress(username)
 
-        if in_game:
-            update_timer()  # Update the timer when the game is active
-
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_x, mouse_y = event.pos
-                for i in range(len(piece_positions) - 1, -1, -1):  # Iterate backwards
-                    if i in locked_pieces:
-                        continue
-                    x, y = piece_positions[i]
-                    piece_width = scaled_image_width // COLS
-                    piece_height = scaled_image_height // ROWS
-                    if x <= mouse_x <= x + piece_width and y <= mouse_y <= y + piece_height:
-                        dragging = i
-                        break
-
-            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                if dragging is not None:
-                    piece_x, piece_y = piece_positions[dragging]
-                    grid_x, grid_y = grid[dragging]
-                    if abs(piece_x - grid_x) < 10 and abs(piece_y - grid_y) < 10:
-                        piece_positions[dragging] = [grid_x, grid_y]
-                        locked_pieces.add(dragging)
-                        click_sound.play()
-                    dragging = None
-
-            elif event.type == pygame.MOUSEMOTION and dragging is not None:
-                mouse_x, mouse_y = event.pos
-                piece_width = scaled_image_width // COLS
-                piece_height = scaled_image_height // ROWS
-                piece_positions[dragging] = [mouse_x - piece_width // 2, mouse_y - piece_height // 2]
-
-        manager.process_events(event)
-
-        if event.type == pygame.USEREVENT:
-            if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
-                click_sound.play()
-                if game_state == LOGIN_SCREEN:
-                    if event.ui_element == exit_login_button:
-                        pygame.quit()
-                        running = False
-                        exit()
-                    if event.ui_element == signup_button:
-                        username = username_input.get_text()
-                        password = password_input.get_text()
-                        if not insert_user(username, password):
-                            show_error_message(f"Error: Username {username} is already in use.")
-                        else:
-                            print(f"User {username} registered.")
-                    elif event.ui_element == login_button:
-                        username = username_input.get_text()
-                        password = password_input.get_text()
-                        if validate_user(username, password):
-                            print(f"User {username} logged in.")
-                            logged_in = True
+                elif event.type == pygame.MOUSEMOTION and engine.dragging is not None:
+                    renderer.mark_dirty(dragged_rect())
+                    engine.drag(*camera.to_table(*event.pos))
+                    renderer.mark_dirty(dragged_rect())
+                    if coop is not None:
+                        coop.move(engine.dragging, *camera.to_table(*event.pos))
+                    gameplay_event = True
+
+                # Right or middle drag pans the table, the wheel zooms at the cursor
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+                    panning = True
+                    gameplay_event = True
+
+                elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+                    panning = False
+                    gameplay_event = True
+
+                elif event.type == pygame.MOUSEMOTION and panning:
+                    pan_camera(*event.rel)
+                    gameplay_event = True
+
+                elif event.type == pygame.MOUSEWHEEL:
+                    if camera.zoom_at(*mouse_pos, event.y):
+                        renderer.reset()
+                    gameplay_event = True
+
+            if not gameplay_event:
+                manager.process_events(event)
+
+            if event.type == pygame.USEREVENT:
+                if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
+                    play_sound(click_sound)
+                    if game_state == LOGIN_SCREEN:
+                        if event.ui_element == exit_login_button:
+                            flush_database()
+                            pygame.quit()
+                            running = False
+                            exit()
+                        if event.ui_element == signup_button and auth_job is None:
+                            username = username_input.get_text()
+                            start_auth("signup", username, password_input.get_text())
+                        elif event.ui_element == login_button and auth_job is None:
+                            username = username_input.get_text()
+                            start_auth("login", username, password_input.get_text())
+                        elif event.ui_element == no_authentication_button:
+                            print("No authentication selected.")
+                            logged_in = False
                             game_state = HOME_SCREEN
-                            # Remove the input UI elements after login
                             title_label.kill()
                             username_label.kill()
                             password_label.kill()
@@ -590,184 +1133,336 @@ while running:
                             login_button.kill()
                             no_authentication_button.kill()
                             exit_login_button.kill()
+                            auth_status_label.kill()
                             create_home_screen_ui()
-                        else:
-                            show_error_message(f"Error: Invalid user or password.")
-                    elif event.ui_element == no_authentication_button:
-                        print("No authentication selected.")
-                        logged_in = False
-                        game_state = HOME_SCREEN
-                        title_label.kill()
-                        username_label.kill()
-                        password_label.kill()
-                        username_input.kill()
-                        password_input.kill()
-                        signup_button.kill()
-                        login_button.kill()
-                        no_authentication_button.kill()
-                        exit_login_button.kill()
-                        create_home_screen_ui()
                 
-                elif game_state == HOME_SCREEN:
-                    if event.ui_element == exit_button:
-                        pygame.quit()
-                        running = False
-                        exit()
-
-                    if event.ui_element == back_to_login_button:
-                        game_state = LOGIN_SCREEN
-                        title_label.kill()
-                        start_button.kill()
-                        exit_button.kill()
-                        continue_button.kill()
-                        back_to_login_button.kill()
-                        dropdown_menu.kill()
-                        create_login_ui()
-
-                    if event.ui_element == continue_button:
-                        if logged_in:
-                            if load_progress(username):
-                                game_state = GAME_SCREEN
-                                load_timer_state()
-                                resume_timer()
+                    elif game_state == HOME_SCREEN:
+                        if event.ui_element == exit_button:
+                            flush_database()
+                            pygame.quit()
+                            running = False
+                            exit()
+
+                        if event.ui_element == back_to_login_button:
+                            game_state = LOGIN_SCREEN
+                            title_label.kill()
+                            start_button.kill()
+                            exit_button.kill()
+                            continue_button.kill()
+                            back_to_login_button.kill()
+                            dropdown_menu.kill()
+                            grid_size_entry.kill()
+                            create_login_ui()
+
+                        if event.ui_element == continue_button:
+                            if logged_in:
+                                if load_progress(username):
+                                    game_state = GAME_SCREEN
+                                    resume_timer()
+                                    start_journal()
+                                    save_progress(username)  # Fold the replayed journal into the snapshot
+                                    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+                                    WINDOW_WIDTH, WINDOW_HEIGHT = screen.get_size()
+                                    manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT))
+                                    border_rect = pygame.Rect(
+                                        (BORDER_PADDING, BORDER_PADDING, scaled_image_width, scaled_image_height)
+                                    )
+                                    reset_camera()
+
+                                    in_game = True
+                                    title_label.kill()
+                                    continue_button.kill()
+                                    exit_button.kill()
+                                    dropdown_menu.kill()
+                                    grid_size_entry.kill()
+
+                                    in_game_buttons = create_in_game_buttons(manager)
+                                else:
+                                    show_error_message(f"Error: No saved progress found.")
+                            else:
+                                show_error_message("You must be logged in to continue the game.")
+
+                        if event.ui_element == start_button:
+                            custom_size = grid_size_entry.get_text().strip()
+                            if custom_size and not update_grid_size(custom_size):
+                                show_error_message(
+                                    f"Invalid grid size '{custom_size}', use rows x columns up to {MAX_GRID_SIZE}x{MAX_GRID_SIZE}."
+                                )
+                                IMAGE_PATH = None
+                            else:
+                                if not custom_size:
+                                    update_grid_size(dropdown_menu.selected_option)
+                                IMAGE_PATH = choose_image()
+
+                            if IMAGE_PATH and os.path.exists(IMAGE_PATH):
+                                # Load, scale and split the image on the loader thread
+                                loading_fit_size = (WINDOW_WIDTH - 2 * BORDER_PADDING, WINDOW_HEIGHT - 2 * BORDER_PADDING)
+                                loading_job = loader.submit(prepare_puzzle_image, IMAGE_PATH, *loading_fit_size, ROWS, COLS)
+                                game_state = LOADING_SCREEN
+
+                                # Fullscreen mode
                                 screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
                                 WINDOW_WIDTH, WINDOW_HEIGHT = screen.get_size()
                                 manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT))
-                                border_rect = pygame.Rect(
-                                    (BORDER_PADDING, BORDER_PADDING, scaled_image_width, scaled_image_height)
-                                )
 
-                                in_game = True
                                 title_label.kill()
-                                continue_button.kill()
+                                start_button.kill()
                                 exit_button.kill()
                                 dropdown_menu.kill()
+                                grid_size_entry.kill()
 
-                                in_game_buttons = create_in_game_buttons(manager)
-                            else:
-                                show_error_message(f"Error: No saved progress found.")
-                        else:
-                            show_error_message("You must be logged in to continue the game.")
-
-                    if event.ui_element == start_button:
-                        IMAGE_PATH = choose_image()
-
-                        if IMAGE_PATH and os.path.exists(IMAGE_PATH):
-                            original_image = pygame.image.load(IMAGE_PATH)
-                            scaled_image = scale_image_to_fit(
-                                original_image,
-                                WINDOW_WIDTH - 2 * BORDER_PADDING,
-                                WINDOW_HEIGHT - 2 * BORDER_PADDING
-                            )
-                            game_state = GAME_SCREEN
-                            # Update the scaled image dimensions
-                            scaled_image_width, scaled_image_height = scaled_image.get_size()
-
-                            # Adjust the border rectangle
-                            border_rect = pygame.Rect(
-                                (BORDER_PADDING, BORDER_PADDING, scaled_image_width, scaled_image_height)
-                            )
-
-                            using_saved_data = False  # Starting a new game, use random positions
-                            piece_positions = []  # Reset piece positions
-                            locked_pieces = set()  # Reset locked pieces
-                            generate_pieces()  # Generate a new set of pieces
-                            reset_timer()
-                            
-                            # Fullscreen mode
-                            screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-                            WINDOW_WIDTH, WINDOW_HEIGHT = screen.get_size()
-                            manager = pygame_gui.UIManager((WINDOW_WIDTH, WINDOW_HEIGHT))
-                            border_rect = pygame.Rect(
-                                (BORDER_PADDING, BORDER_PADDING, scaled_image_width, scaled_image_height)
-                            )
-                            update_grid_size(dropdown_menu.selected_option)
-                            
-                            in_game = True
-                            title_label.kill()
-                            start_button.kill()
-                            exit_button.kill()
-                            dropdown_menu.kill()
-
-                            in_game_buttons = create_in_game_buttons(manager)
-
-                elif game_state == GAME_SCREEN:
-                    if in_game_buttons: 
-                        save_button, reset_button, back_button = in_game_buttons
+                    elif game_state == GAME_SCREEN:
+                        if in_game_buttons: 
+                            save_button, reset_button, back_button, hint_button = in_game_buttons
                         
-                        if event.ui_element == save_button:
-                            if logged_in:
-                                save_progress(username)
-                                print("Progress saved!")
-                            else:
-                                show_error_message("You must be logged in to save progress.")
-
-                        if event.ui_element == reset_button:
-                            using_saved_data = False  # Starting a new game, use random positions
-                            piece_positions = []  # Reset piece positions
-                            locked_pieces = set()
-                            generate_pieces()  # Generate a new set of pieces
-                            reset_timer()
-                            print("Puzzle reset!")
-
-                        if event.ui_element == back_button:
-                            save_timer_state()
-                            game_state = HOME_SCREEN
-                            pause_timer()  # Pause the timer
-                            using_saved_data = False  # Reset saved data usage flag
-                            save_button.kill() 
-                            reset_button.kill()
-                            back_button.kill()
-                            create_home_screen_ui()
-                            for button in in_game_buttons:
-                                button.kill()
-                            in_game_buttons = None
+                            if event.ui_element == save_button:
+                                if logged_in:
+                                    save_progress(username)
+                                    print("Progress saved!")
+                                else:
+                                    show_error_message("You must be logged in to save progress.")
+
+                            if event.ui_element == reset_button and coop is None:  # The layout is shared
+                                using_saved_data = False  # Starting a new game, use random positions
+                                generate_pieces()  # Generate a new set of pieces
+                                reset_timer()
+                                if journal is not None:
+                                    save_progress(username)  # Journaled moves refer to the new layout
+                                print("Puzzle reset!")
+
+                            if event.ui_element == hint_button:
+                                if hint_solution is not None:
+                                    show_hint()
+                                elif ROWS * COLS > HINT_MAX_PIECES:
+                                    show_no_hint()
+                                elif hint_job is None:
+                                    hint_job = hint_solver.submit(solve_layout, scaled_image, ROWS, COLS)
+
+                            if event.ui_element == back_button:
+                                if logged_in:
+                                    save_progress(username)  # Autosave, including the timer
+                                stop_journal()
+                                stop_recording()
+                                cancel_hint()
+                                if coop is not None:
+                                    coop.close()
+                                    coop = None
+                                game_state = HOME_SCREEN
+                                in_game = False
+                                engine.dragging = None  # The old puzzle is hidden, nothing of it can be held
+                                panning = False
+                                pause_timer()  # Pause the timer
+                                using_saved_data = False  # Reset saved data usage flag
+                                save_button.kill() 
+                                reset_button.kill()
+                                back_button.kill()
+                                hint_button.kill()
+                                create_home_screen_ui()
+                                for button in in_game_buttons:
+                                    button.kill()
+                                in_game_buttons = None
 
-    manager.update(time_delta)
+        if in_game:
+            update_timer()  # Once per frame, also when there was no input
+        if profiler is not None:
+            profiler.mark("events")
+
+        # Act on a finished sign up or log in
+        if auth_job is not None and auth_job.done():
+            try:
+                auth_ok = auth_job.result()
+            except Exception as e:
+                print(f"Error verifying user: {e}")
+                auth_ok = False
+            finish_auth()
+            if auth_action == "signup":
+                if not auth_ok:
+                    show_error_message(f"Error: Username {username} is already in use.")
+                else:
+                    print(f"User {username} registered.")
+            elif game_state != LOGIN_SCREEN:
+                print("Left the login screen before the login was verified.")
+            elif auth_ok:
+                print(f"User {username} logged in.")
+                logged_in = True
+                game_state = HOME_SCREEN
+                # Remove the input UI elements after login
+                title_label.kill()
+                username_label.kill()
+                password_label.kill()
+                username_input.kill()
+                password_input.kill()
+                signup_button.kill()
+                login_button.kill()
+                no_authentication_button.kill()
+                exit_login_button.kill()
+                auth_status_label.kill()
+                create_home_screen_ui()
+            else:
+                show_error_message(f"Error: Invalid user or password.")
+
+        # Hand the loaded image over to the game once the loader thread is done
+        if game_state == LOADING_SCREEN and loading_job is not None and loading_job.done():
+            try:
+                scaled_image, split_pieces = loading_job.result()
+            except Exception as e:
+                print(f"Error loading image: {e}")
+                show_error_message(f"Error: Could not load image {IMAGE_PATH}.")
+                if coop is not None:
+                    coop.close()
+                    coop = None
+                game_state = HOME_SCREEN
+                in_game = False
+                create_home_screen_ui()
+            else:
+                game_state = GAME_SCREEN
+                # Update the scaled image dimensions
+                scaled_image_width, scaled_image_height = scaled_image.get_size()
+
+                # Adjust the border rectangle
+                border_rect = pygame.Rect(
+                    (BORDER_PADDING, BORDER_PADDING, scaled_image_width, scaled_image_height)
+                )
+
+                if coop is not None:
+                    start_coop_game()  # The server's layout, other players may have moved pieces already
+                else:
+                    using_saved_data = False  # Starting a new game, use random positions
+                    scatter_seed = replay.header["seed"] if replay is not None else random.randrange(2 ** 32)
+                    scatter_rng = random.Random(scatter_seed)
+                generate_pieces(split_pieces)  # Generate a new set of pieces
+                reset_camera()
+                reset_timer()
+                if logged_in:
+                    start_journal()
+                    save_progress(username)  # Journaled moves refer to the new layout
+                if RECORD_PATH and coop is None:
+                    start_recording()
+
+                in_game = True
+                in_game_buttons = create_in_game_buttons(manager)
+            loading_job = None
+
+        # Follow the other players, the loading screen only keeps the connection drained
+        if coop is not None:
+            if game_state == GAME_SCREEN:
+                sync_coop()
+            else:
+                coop.receive()
+
+        # Show the hint once the solver is done, and clear it when it expires
+        if game_state == GAME_SCREEN and hint_job is not None and hint_job.done():
+            try:
+                hint_solution, hint_buddies = hint_job.result()
+            except Exception as e:
+                print(f"Error solving puzzle for a hint: {e}")
+            else:
+                show_hint()
+            hint_job = None
+        if hint is not None and pygame.time.get_ticks() > hint[2]:
+            renderer.mark_dirty(piece_rect(hint[0]))
+            renderer.mark_dirty(slot_rect(hint[1]))
+            hint = None
+        if no_hint_until is not None and pygame.time.get_ticks() > no_hint_until:
+            hint_button.set_text("Hint")
+            no_hint_until = None
+
+        if profiler is not None:
+            profiler.mark("jobs")
+
+        manager.update(time_delta)
+        if profiler is not None:
+            profiler.mark("gui_update")
+
+        dirty_rects = None
+        if game_state == GAME_SCREEN:
+            # Locked pieces live in the background, only loose pieces are blitted per frame
+            if renderer.background is None:
+                renderer.set_background(build_static_background())
+                renderer.invalidate()
+            if DIRTY_RENDERING:
+                dirty_rects = render_game_screen_dirty()
+            else:
+                screen.blit(renderer.background, (0, 0))
+                draw_dynamic_layer()
+        else:
+            screen.fill(BG_COLOR)
+            renderer.invalidate()
+        if profiler is not None:
+            profiler.mark("draw")
+
+        if game_state == LOGIN_SCREEN:
+            manager.draw_ui(screen)
+        elif game_state == HOME_SCREEN:
+            manager.draw_ui(screen)
+        elif game_state == LOADING_SCREEN:
+            render_loading_screen()
+        elif game_state == GAME_SCREEN:
+            # Check if the puzzle is complete
+            if engine.is_complete() and not puzzle_completed:
+                print("Puzzle is complete. Saving progress and inserting record.")
+                if display_congratulations():
+                    renderer.invalidate()  # The congratulations screen drew over everything
+                    save_progress(username)
+                    timer_running = False
+                    puzzle_completed = True
+                    state_logged = True
+
+                # Automatically save the record if logged in
+                if logged_in:
+                    puzzle_image = IMAGE_PATH
+                    completion_time = elapsed_time
+                    print(f"Inserting record: username={username}, puzzle_image={puzzle_image}, completion_time={completion_time}")
+                    from database import insert_record
+                    insert_record(username, puzzle_image, completion_time, ROWS, COLS)
+                    print("Record saved.")
+
+                    show_leaderboard_after_delay(puzzle_image, ROWS * COLS)
+            else:
+                if not puzzle_completed and not state_logged:
+                    print("Puzzle not complete or already completed.")
+                    state_logged = True # Set the flag to prevent repeated logging
+        if profiler is not None:
+            profiler.mark("completion")
 
-    screen.fill(BG_COLOR)
 
-    if game_state == LOGIN_SCREEN:
-        manager.draw_ui(screen)
-    elif game_state == HOME_SCREEN:
         manager.draw_ui(screen)
-    elif game_state == GAME_SCREEN:
-        # Transition to the home screen or main game logic
-        render_timer()  # Render the timer on the screen
-        pygame.draw.rect(screen, BORDER_COLOR, border_rect, 2)
-        piece_width = scaled_image_width // COLS
-        piece_height = scaled_image_height // ROWS
-        for i, (piece, (x, y)) in enumerate(zip(pieces, piece_positions)):
-            if i != dragging:
-                screen.blit(piece, (x, y))
-        if dragging is not None:
-            screen.blit(pieces[dragging], piece_positions[dragging])
-            
-        # Check if the puzzle is complete
-        if is_puzzle_complete() and not puzzle_completed:
-            print("Puzzle is complete. Saving progress and inserting record.")
-            if display_congratulations():
-                save_progress(username)
-                timer_running = False
-                puzzle_completed = True
-                state_logged = True
-
-            # Automatically save the record if logged in
-            if logged_in:
-                puzzle_image = IMAGE_PATH
-                completion_time = elapsed_time
-                print(f"Inserting record: username={username}, puzzle_image={puzzle_image}, completion_time={completion_time}")
-                insert_record(username, puzzle_image, completion_time, ROWS, COLS)
-                print("Record saved.")
-
-                show_leaderboard_after_delay(puzzle_image, ROWS * COLS)
+        if profiler is not None:
+            profiler.mark("gui_draw")
+            draw_profile_overlay(dirty_rects)
+            profiler.mark("overlay")
+        if dirty_rects is None:
+            pygame.display.update()
         else:
-            if not puzzle_completed and not state_logged:
-                print("Puzzle not complete or already completed.")
-                state_logged = True # Set the flag to prevent repeated logging
-
-
-    manager.draw_ui(screen)
-    pygame.display.update()
-
-pygame.quit()
+            pygame.display.update(dirty_rects)
+        if profiler is not None:
+            profiler.mark("display_update")
+
+        if first_frame:
+            first_frame = False
+            if EXIT_AFTER_FIRST_FRAME:
+                print("First frame shown", flush=True)
+                running = False
+            else:
+                # Everything the first frame could do without loads in the background from here on
+                loader.submit(load_audio)
+                loader.submit(warm_up_modules)
+
+    if profiler is not None:
+        profiler.begin_frame()  # Record the last frame
+        profiler.write_trace(PROFILE_TRACE)
+        print(f"Frame trace written to {PROFILE_TRACE}")
+    if replay is not None:
+        summary = replay.summary()
+        summary["pieces"] = engine.num_pieces if engine is not None else 0
+        summary["correct"] = int(engine.correct_count) if engine is not None else 0
+        print(f"Replay summary: {json.dumps(summary)}")
+    stop_recording()
+    stop_journal()
+    if coop is not None:
+        coop.close()
+    flush_database()  # The records writer is a daemon thread, queued records would be lost
+    loader.shutdown(wait=False)
+    hint_solver.shutdown(wait=False, cancel_futures=True)
+    auth_executor.shutdown(wait=False)
+    pygame.quit()
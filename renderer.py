@@ -0,0 +1,112 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """Redraws only the parts of the game screen that changed since the last frame.
+
+    The static part of the scene (background colour, board outline and locked
+    pieces) is cached in ``background``. Each frame the dirty regions are
+    restored from that cache, the caller redraws whatever moves on top of them
+    and only those regions are pushed to the display.
+    """
+
+    def __init__(self):
+        self.background = None
+        self.dirty = []
+        self.needs_full_redraw = True
+        self.needs_full_update = False  # The screen scrolled, every pixel of it goes to the display
+
+    def reset(self):
+        """Drop the cached background and redraw everything on the next frame."""
+        self.background = None
+        self.invalidate()
+
+    def invalidate(self):
+        self.needs_full_redraw = True
+        self.dirty = []
+
+    def set_background(self, surface):
+        self.background = surface
+
+    def scroll(self, screen, dx, dy, draw_background, overlays=()):
+        """Shift the screen and the cached background by (dx, dy), as when panning.
+
+        Only the strips uncovered along the edges are drawn again, with
+        ``draw_background(surface, area)`` into the background and then as
+        dirty regions on screen. ``overlays`` are screen rects drawn on top
+        that do not scroll, cleaned up where they were moved to and redrawn.
+        """
+        if self.background is None or self.needs_full_redraw:
+            self.reset()
+            return
+        width, height = self.background.get_size()
+        if abs(dx) >= width or abs(dy) >= height:
+            self.reset()
+            return
+        self.background.scroll(dx, dy)
+        screen.scroll(dx, dy)
+        self.dirty = [rect.move(dx, dy) for rect in self.dirty] + self.dirty
+        strips = []
+        if dx:
+            strips.append(pygame.Rect(0 if dx > 0 else width + dx, 0, abs(dx), height))
+        if dy:
+            strips.append(pygame.Rect(0, 0 if dy > 0 else height + dy, width, abs(dy)))
+        for strip in strips:
+            self.background.set_clip(strip)
+            draw_background(self.background, strip)
+            self.mark_dirty(strip)
+        self.background.set_clip(None)
+        for rect in overlays:
+            if rect is not None:
+                self.mark_dirty(rect)
+                self.mark_dirty(pygame.Rect(rect).move(dx, dy))
+        self.needs_full_update = True
+
+    def mark_dirty(self, rect):
+        if not self.needs_full_redraw and rect is not None:
+            rect = pygame.Rect(rect)
+            if rect.width > 0 and rect.height > 0:
+                self.dirty.append(rect)
+
+    def _merged_dirty_rects(self):
+        # Union overlapping rects so no region is redrawn twice
+        merged = []
+        for rect in self.dirty:
+            rect = rect.copy()
+            i = 0
+            while i < len(merged):
+                if rect.colliderect(merged[i]):
+                    rect.union_ip(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+        return merged
+
+    def render(self, screen, redraw):
+        """Restore the dirty regions and call ``redraw(area)`` for each of them.
+
+        ``area`` is None on a full redraw. Returns the list of rects to pass to
+        ``pygame.display.update``, or None when the whole screen must be updated
+        (after a full redraw or a scroll).
+        """
+        if self.needs_full_redraw:
+            screen.blit(self.background, (0, 0))
+            redraw(None)
+            self.needs_full_redraw = False
+            self.needs_full_update = False
+            self.dirty = []
+            return None
+
+        rects = [rect.clip(screen.get_rect()) for rect in self._merged_dirty_rects()]
+        rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+        for rect in rects:
+            screen.set_clip(rect)
+            screen.blit(self.background, rect, rect)
+            redraw(rect)
+        screen.set_clip(None)
+        self.dirty = []
+        if self.needs_full_update:
+            self.needs_full_update = False
+            return None
+        return rects
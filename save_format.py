@@ -0,0 +1,109 @@
+"""Versioned binary save files for puzzle progress.
+
+Layout (little-endian):
+
+    header   magic "PZSV", version u16, coordinate width u8 (2 or 4),
+             rows u32, cols u32, image width u32, image height u32,
+             image path length u16, elapsed seconds u32, timer running u8
+    path     UTF-8 image path
+    pieces   rows * cols (x, y) pairs as int16 or int32
+    locked   bitset of locked pieces, one bit per piece
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"PZSV"
+VERSION = 1
+HEADER = struct.Struct("<4sHBIIIIHIB")
+
+
+def _coordinate_dtype(width):
+    return np.dtype("<i2") if width == 2 else np.dtype("<i4")
+
+
+def write_atomic(path, chunks):
+    """Write chunks to a temp file next to path, then rename it over path."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def write_save(path, engine, image_path, elapsed_time, timer_running):
+    positions = engine.positions
+    fits_int16 = positions.size == 0 or (positions.min() >= -32768 and positions.max() <= 32767)
+    width = 2 if fits_int16 else 4
+    encoded_path = image_path.encode("utf-8")
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        width,
+        engine.rows,
+        engine.cols,
+        engine.image_width,
+        engine.image_height,
+        len(encoded_path),
+        int(elapsed_time),
+        bool(timer_running),
+    )
+    write_atomic(path, [
+        header,
+        encoded_path,
+        positions.astype(_coordinate_dtype(width)).tobytes(),
+        np.packbits(engine.locked, bitorder="little").tobytes(),
+    ])
+
+
+def read_save(path):
+    """Read a save file into the dictionary PuzzleEngine.deserialize expects.
+
+    Arrays are views over the file contents, so no per-piece Python objects
+    are created. Raises ValueError for files that are not valid saves.
+    """
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short to be a save file")
+    (magic, version, width, rows, cols, image_width, image_height,
+     path_length, elapsed_time, timer_running) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a puzzle save file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported save file version {version}")
+    if width not in (2, 4):
+        raise ValueError(f"Invalid coordinate width {width}")
+    if rows < 1 or cols < 1:
+        raise ValueError(f"Invalid grid size {rows}x{cols}")
+    if image_width < cols or image_height < rows:
+        raise ValueError(f"Image size {image_width}x{image_height} is too small for a {rows}x{cols} grid")
+
+    count = rows * cols
+    offset = HEADER.size
+    image_path = bytes(data[offset:offset + path_length]).decode("utf-8")
+    offset += path_length
+    positions_size = count * 2 * width
+    locked_size = (count + 7) // 8
+    if len(data) != offset + positions_size + locked_size:
+        raise ValueError(f"{path} is truncated or corrupt, it does not hold the {count} pieces of its grid")
+
+    positions = np.frombuffer(data, dtype=_coordinate_dtype(width), count=count * 2, offset=offset)
+    offset += positions_size
+    locked_bits = np.frombuffer(data, dtype=np.uint8, count=locked_size, offset=offset)
+    locked = np.unpackbits(locked_bits, count=count, bitorder="little").astype(bool)
+    return {
+        "piece_positions": positions.reshape(count, 2),
+        "locked_pieces": np.flatnonzero(locked),
+        "rows": rows,
+        "cols": cols,
+        "scaled_image_width": image_width,
+        "scaled_image_height": image_height,
+        "image_path": image_path,
+        "elapsed_time": elapsed_time,
+        "timer_running": bool(timer_running),
+    }
+
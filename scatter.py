@@ -0,0 +1,90 @@
+import numpy as np
+
+
+def free_regions(table_width, table_height, board_rect):
+    """Split the table around the board into up to four (x, y, width, height) bands.
+
+    A piece lying fully inside one of the bands never covers the board.
+    """
+    left, top, width, height = board_rect
+    right = min(table_width, left + width)
+    bottom = min(table_height, top + height)
+    left, top = max(0, left), max(0, top)
+    regions = [
+        (0, 0, table_width, top),  # Above the board
+        (0, bottom, table_width, table_height - bottom),  # Below the board
+        (0, top, left, bottom - top),  # Left of the board
+        (right, top, table_width - right, bottom - top),  # Right of the board
+    ]
+    return [region for region in regions if region[2] > 0 and region[3] > 0]
+
+
+def _slots(regions, piece_width, piece_height):
+    """Cut every region into piece-sized cells, spreading the leftover space between them.
+
+    Returns arrays of cell origins and the jitter each cell allows. Pieces in
+    different cells can never overlap.
+    """
+    origins, jitter = [], []
+    for x, y, width, height in regions:
+        nx, ny = width // piece_width, height // piece_height
+        if nx == 0 or ny == 0:
+            continue
+        slack_x = (width - nx * piece_width) // nx
+        slack_y = (height - ny * piece_height) // ny
+        xs = x + np.arange(nx) * (piece_width + slack_x)
+        ys = y + np.arange(ny) * (piece_height + slack_y)
+        grid_x, grid_y = np.meshgrid(xs, ys)
+        origins.append(np.column_stack((grid_x.ravel(), grid_y.ravel())))
+        jitter.append(np.tile((slack_x, slack_y), (nx * ny, 1)))
+    if not origins:
+        return np.empty((0, 2), dtype=np.int64), np.empty((0, 2), dtype=np.int64)
+    return np.concatenate(origins), np.concatenate(jitter)
+
+
+def scatter_positions(count, piece_size, table_size, board_rect, seed=None, no_overlap=False, margin=0):
+    """Random top-left positions for count pieces around the board, in bounded time.
+
+    The free space around the board is cut into piece-sized cells (a
+    stratified grid) and pieces are dealt into randomly chosen cells with a
+    random offset inside each cell, so no piece overlaps the board or another
+    piece while there is room. When there are more pieces than cells the extra
+    pieces share cells, unless no_overlap is set, in which case ValueError is
+    raised. The same seed always gives the same layout.
+
+    Jigsaw pieces are drawn margin pixels past their rect on every side, so
+    cells are that much larger and keep that far from the board.
+    """
+    piece_width, piece_height = max(1, piece_size[0]), max(1, piece_size[1])
+    table_width, table_height = table_size
+    rng = np.random.default_rng(seed)
+    left, top, width, height = board_rect
+    board_rect = (left - margin, top - margin, width + 2 * margin, height + 2 * margin)
+    origins, jitter = _slots(
+        free_regions(table_width, table_height, board_rect), piece_width + 2 * margin, piece_height + 2 * margin
+    )
+    origins = origins + margin  # Top left of the piece rect in its cell
+    positions = np.empty((count, 2), dtype=np.int32)
+    if count == 0:
+        return positions
+
+    if len(origins) == 0:
+        if no_overlap:
+            raise ValueError("No room around the board for a single piece")
+        # Nowhere to go off the board, fall back to anywhere on the table
+        positions[:, 0] = rng.integers(0, max(0, table_width - piece_width), size=count, endpoint=True)
+        positions[:, 1] = rng.integers(0, max(0, table_height - piece_height), size=count, endpoint=True)
+        return positions
+
+    if count <= len(origins):
+        chosen = rng.choice(len(origins), size=count, replace=False)
+    elif no_overlap:
+        raise ValueError(f"Only {len(origins)} of {count} pieces fit around the board without overlapping")
+    else:
+        # Every cell gets a piece, the rest double up on random cells
+        extra = rng.integers(0, len(origins), size=count - len(origins))
+        chosen = rng.permutation(np.concatenate((np.arange(len(origins)), extra)))
+
+    offsets = (rng.random((count, 2)) * (jitter[chosen] + 1)).astype(np.int64)
+    positions[:] = origins[chosen] + offsets
+    return positions
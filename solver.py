@@ -0,0 +1,314 @@
+"""Reassemble a shuffled puzzle from the pixels along the piece edges.
+
+Pieces are scored pairwise with Mahalanobis gradient compatibility (MGC):
+the colour gradient across a candidate seam is compared with the gradient
+distribution just inside each piece's edge. All pairs are scored at once
+by expanding the quadratic form into matrix products, so the cost is a few
+(N, 3L) x (3L, N) multiplications rather than N^2 Python-level comparisons.
+The score matrices are N x N, so memory grows with the square of the piece
+count: solving takes about 60 MB at a thousand pieces and 480 MB at 2,500.
+
+Placement is a minimum spanning tree style merge (Kruskal): candidate seams
+are taken best first and the two groups of pieces they connect are joined
+when the result does not overlap and still fits the rows x cols frame.
+Pieces left over are then filled into the free slots next to placed ones.
+best_buddies picks out the seams the scores are sure of, for callers that
+only want to act on confident matches.
+
+Usage: python solver.py IMAGE [IMAGE ...] --grid 10x10 [--seed 1] [--output DIR]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+CANDIDATES_PER_SIDE = 6  # Best partners per piece side considered by the placer
+BUDDY_MARGIN = 0.3  # Most a best buddy's score can be of the runner-up's, on both sides of the seam
+
+
+def _edges(tiles):
+    """Outer and second pixel lines of every side, as float arrays cut to a common length.
+
+    Pieces on the same row have the same height and pieces on the same
+    column the same width, so trimming to the shortest only drops a pixel
+    from the end of some strips.
+    """
+    height = min(tile.shape[0] for tile in tiles)
+    width = min(tile.shape[1] for tile in tiles)
+
+    def stack(lines):
+        return np.stack(lines).astype(np.float64)
+
+    return {
+        "right": (stack([t[:height, -1] for t in tiles]), stack([t[:height, -2] for t in tiles])),
+        "left": (stack([t[:height, 0] for t in tiles]), stack([t[:height, 1] for t in tiles])),
+        "bottom": (stack([t[-1, :width] for t in tiles]), stack([t[-2, :width] for t in tiles])),
+        "top": (stack([t[0, :width] for t in tiles]), stack([t[1, :width] for t in tiles])),
+    }
+
+
+def _one_sided_mgc(edge, inner, other):
+    """score[a, b]: how well other[b] continues the gradient leaving edge[a].
+
+    edge, inner and other are (N, L, 3). The Mahalanobis distance of each
+    predicted gradient other[b] - edge[a] from side a's own gradients is
+    summed over the strip; expanding the square turns the N x N sums into
+    matrix products.
+    """
+    count, length, _ = edge.shape
+    gradients = edge - inner
+    mean = gradients.mean(axis=1)  # (N, 3)
+    centred = gradients - mean[:, None, :]
+    covariance = np.einsum("nki,nkj->nij", centred, centred) / max(length - 1, 1)
+    precision = np.linalg.inv(covariance + np.eye(3))  # Regularised for flat strips
+
+    expected = edge + mean[:, None, :]  # Where other[b] would be for a perfect continuation
+    # sum_k (o - e)^T P (o - e) = sum_k o^T P o - 2 sum_k e^T P o + sum_k e^T P e
+    other_outer = np.einsum("nki,nkj->nij", other, other).reshape(count, 9)
+    weighted = np.einsum("nki,nij->nkj", expected, precision)
+    score = precision.reshape(count, 9) @ other_outer.T
+    score -= 2 * weighted.reshape(count, -1) @ other.reshape(count, -1).T
+    score += np.einsum("nkj,nkj->n", weighted, expected)[:, None]
+    return score
+
+
+def compatibility(tiles):
+    """Dissimilarity matrices (right, below) for a list of (H, W, 3) pixel arrays.
+
+    right[i, j] scores tile j placed right of tile i, below[i, j] tile j
+    placed below tile i. Lower is better; the diagonal is infinite.
+    """
+    edges = _edges(tiles)
+    right = _one_sided_mgc(*edges["right"], edges["left"][0])
+    right += _one_sided_mgc(*edges["left"], edges["right"][0]).T
+    below = _one_sided_mgc(*edges["bottom"], edges["top"][0])
+    below += _one_sided_mgc(*edges["top"], edges["bottom"][0]).T
+    np.fill_diagonal(right, np.inf)
+    np.fill_diagonal(below, np.inf)
+    return right, below
+
+
+def _normalised(scores):
+    """Divide each score by the second best in its row, so distinctive matches rank first."""
+    count = scores.shape[0]
+    if count < 3:
+        return scores
+    second = np.partition(scores, 1, axis=1)[:, 1:2]
+    return scores / (second + 1e-6)
+
+
+def _best_partners(scores, margin):
+    """Best column of every row of scores, -1 where it does not beat the second best by margin."""
+    count = scores.shape[0]
+    if count < 3:
+        return np.full(count, -1, dtype=np.intp)
+    best = np.argmin(scores, axis=1)
+    first, second = np.partition(scores, 1, axis=1)[:, :2].T
+    return np.where(first < margin * second, best, -1)
+
+
+def best_buddies(right, below, margin=BUDDY_MARGIN):
+    """(right, below) arrays of the tile each tile is best buddies with on that side, -1 for none.
+
+    Tiles i and j are best buddies right of i when j is the clear best match
+    right of i and i the clear best match left of j. Flat edges fit many tiles
+    about as well, so they have no buddies.
+    """
+    buddies = []
+    for scores in (right, below):
+        after = _best_partners(scores, margin)
+        before = _best_partners(scores.T, margin)
+        mutual = (after >= 0) & (before[after] == np.arange(len(after)))
+        buddies.append(np.where(mutual, after, -1))
+    return tuple(buddies)
+
+
+def _candidate_seams(right, below, per_side):
+    """(score, first, second, d_row, d_col) for the best partners of every piece side."""
+    seams = []
+    for scores, d_row, d_col in ((right, 0, 1), (below, 1, 0)):
+        count = scores.shape[0]
+        k = min(per_side, count - 1)
+        for matrix, transposed in ((_normalised(scores), False), (_normalised(scores.T), True)):
+            best = np.argpartition(matrix, k - 1, axis=1)[:, :k] if k < count else np.argsort(matrix, axis=1)
+            firsts = np.repeat(np.arange(count), best.shape[1])
+            seconds = best.ravel()
+            values = matrix[firsts, seconds]
+            if transposed:
+                firsts, seconds = seconds, firsts
+            seams.extend(zip(values.tolist(), firsts.tolist(), seconds.tolist(),
+                             [d_row] * len(values), [d_col] * len(values)))
+    seams.sort()
+    return seams
+
+
+def _merge_groups(count, rows, cols, seams):
+    """Join pieces along the seams best first. Returns the largest group as {piece: (row, col)}."""
+    group_of = list(range(count))
+    groups = {piece: {piece: (0, 0)} for piece in range(count)}
+    cells = {piece: {(0, 0): piece} for piece in range(count)}
+    bounds = {piece: (0, 0, 0, 0) for piece in range(count)}  # top, bottom, left, right
+    for _, first, second, d_row, d_col in seams:
+        group_a, group_b = group_of[first], group_of[second]
+        if group_a == group_b:
+            continue
+        if len(groups[group_a]) < len(groups[group_b]):
+            # Move the smaller group, seen from the other side of the seam
+            group_a, group_b = group_b, group_a
+            first, second, d_row, d_col = second, first, -d_row, -d_col
+        row_a, col_a = groups[group_a][first]
+        row_b, col_b = groups[group_b][second]
+        shift_row, shift_col = row_a + d_row - row_b, col_a + d_col - col_b
+        moved = {piece: (r + shift_row, c + shift_col) for piece, (r, c) in groups[group_b].items()}
+        if any(slot in cells[group_a] for slot in moved.values()):
+            continue
+        top_a, bottom_a, left_a, right_a = bounds[group_a]
+        top_b, bottom_b, left_b, right_b = bounds[group_b]
+        top, bottom = min(top_a, top_b + shift_row), max(bottom_a, bottom_b + shift_row)
+        left, right = min(left_a, left_b + shift_col), max(right_a, right_b + shift_col)
+        if bottom - top >= rows or right - left >= cols:
+            continue
+        groups[group_a].update(moved)
+        for piece, slot in moved.items():
+            cells[group_a][slot] = piece
+            group_of[piece] = group_a
+        bounds[group_a] = (top, bottom, left, right)
+        del groups[group_b], cells[group_b], bounds[group_b]
+    return max(groups.values(), key=len)
+
+
+def _fill(placement, right, below, unused):
+    """Fill the empty slots of placement, most constrained first, with the best fitting unused piece."""
+    rows, cols = placement.shape
+    unused = np.array(sorted(unused), dtype=np.intp)
+    while unused.size:
+        best = None
+        for row, col in zip(*np.nonzero(placement < 0)):
+            cost = np.zeros(unused.size)
+            neighbours = 0
+            if col > 0 and placement[row, col - 1] >= 0:
+                cost += right[placement[row, col - 1], unused]
+                neighbours += 1
+            if col < cols - 1 and placement[row, col + 1] >= 0:
+                cost += right[unused, placement[row, col + 1]]
+                neighbours += 1
+            if row > 0 and placement[row - 1, col] >= 0:
+                cost += below[placement[row - 1, col], unused]
+                neighbours += 1
+            if row < rows - 1 and placement[row + 1, col] >= 0:
+                cost += below[unused, placement[row + 1, col]]
+                neighbours += 1
+            if neighbours == 0:
+                continue
+            choice = int(np.argmin(cost))
+            key = (-neighbours, cost[choice] / neighbours)
+            if best is None or key < best[0]:
+                best = (key, row, col, choice)
+        if best is None:
+            # Nothing placed yet, start from the top-left corner
+            best = (None, *np.argwhere(placement < 0)[0], 0)
+        _, row, col, choice = best
+        placement[row, col] = unused[choice]
+        unused = np.delete(unused, choice)
+    return placement
+
+
+def solve(tiles, rows, cols, scores=None):
+    """Arrange tiles into a rows x cols grid. Returns a (rows, cols) array of tile indexes.
+
+    scores can pass in compatibility(tiles) when it has already been computed.
+    """
+    count = len(tiles)
+    if count != rows * cols:
+        raise ValueError(f"Expected {rows * cols} tiles for a {rows}x{cols} grid, got {count}")
+    right, below = compatibility(tiles) if scores is None else scores
+    placement = np.full((rows, cols), -1, dtype=np.intp)
+    if count == 1:
+        placement[0, 0] = 0
+        return placement
+    group = _merge_groups(count, rows, cols, _candidate_seams(right, below, CANDIDATES_PER_SIDE))
+    top = min(r for r, _ in group.values())
+    left = min(c for _, c in group.values())
+    for piece, (r, c) in group.items():
+        placement[r - top, c - left] = piece
+    return _fill(placement, right, below, set(range(count)) - set(group))
+
+
+def accuracy(placement, truth):
+    """(direct, neighbour): share of pieces in their true slot, and of true neighbour pairs kept."""
+    direct = float(np.mean(placement == truth))
+    position = {piece: (r, c) for (r, c), piece in np.ndenumerate(truth)}
+    pairs = 0
+    kept = 0
+    for (r, c), piece in np.ndenumerate(placement):
+        for d_row, d_col in ((0, 1), (1, 0)):
+            if r + d_row < placement.shape[0] and c + d_col < placement.shape[1]:
+                pairs += 1
+                true_r, true_c = position[piece]
+                kept += position[placement[r + d_row, c + d_col]] == (true_r + d_row, true_c + d_col)
+    return direct, kept / pairs if pairs else 1.0
+
+
+def image_tiles(pixels, rows, cols):
+    """Cut an (H, W, 3) pixel array into row-major tiles, remainder pixels spread like piece_rects."""
+    from engine import piece_rects
+
+    height, width = pixels.shape[:2]
+    return [pixels[y:y + h, x:x + w] for x, y, w, h in piece_rects(width, height, rows, cols).tolist()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve shuffled puzzles cut from images.")
+    parser.add_argument("images", nargs="+", help="image files to cut, shuffle and solve")
+    parser.add_argument("--grid", default="10x10", help="rows x columns, e.g. 10x10 (default)")
+    parser.add_argument("--seed", type=int, default=None, help="shuffle seed")
+    parser.add_argument("--output", help="directory to write the reassembled images to")
+    args = parser.parse_args(argv)
+
+    match = re.fullmatch(r"(\d+)\s*[xX]\s*(\d+)", args.grid.strip())
+    if match is None:
+        parser.error(f"invalid grid size {args.grid!r}")
+    rows, cols = int(match.group(1)), int(match.group(2))
+
+    import pygame
+
+    rng = np.random.default_rng(args.seed)
+    failed = False
+    for path in args.images:
+        try:
+            surface = pygame.image.load(path)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"{path}: could not load image: {e}")
+            failed = True
+            continue
+        pixels = np.frombuffer(pygame.image.tobytes(surface, "RGB"), dtype=np.uint8)
+        pixels = pixels.reshape(surface.get_height(), surface.get_width(), 3)
+        tiles = image_tiles(pixels, rows, cols)
+        order = rng.permutation(len(tiles))  # order[k] is the true slot of shuffled tile k
+
+        start = time.perf_counter()
+        placement = solve([tiles[slot] for slot in order], rows, cols)
+        elapsed = time.perf_counter() - start
+        direct, neighbour = accuracy(order[placement], np.arange(rows * cols).reshape(rows, cols))
+        print(f"{path}: {rows}x{cols} solved in {elapsed:.2f} s, direct {direct:.1%}, neighbour {neighbour:.1%}")
+
+        if args.output:
+            from engine import piece_rects
+
+            solved = np.zeros_like(pixels)
+            slots = piece_rects(surface.get_width(), surface.get_height(), rows, cols).tolist()
+            for (x, y, w, h), piece in zip(slots, placement.ravel().tolist()):
+                tile = tiles[order[piece]]
+                h, w = min(h, tile.shape[0]), min(w, tile.shape[1])
+                solved[y:y + h, x:x + w] = tile[:h, :w]
+            os.makedirs(args.output, exist_ok=True)
+            image = pygame.image.frombytes(solved.tobytes(), surface.get_size(), "RGB")
+            pygame.image.save(image, os.path.join(args.output, f"solved_{os.path.basename(path)}"))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
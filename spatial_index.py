@@ -0,0 +1,96 @@
+class SpatialIndex:
+    """Uniform grid of buckets holding the bounding rect of every piece.
+
+    Items are identified by their index in ``piece_positions``, which is also
+    their draw order, so the highest id under the cursor is the topmost piece.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = max(1, int(cell_size))
+        self.cells = {}  # (cell_x, cell_y) -> set of item ids
+        self.rects = {}  # item id -> (x, y, width, height)
+
+    def _cell_range(self, x, y, width, height):
+        # Edges are inclusive, matching the original hit-test
+        size = self.cell_size
+        return x // size, y // size, (x + width) // size, (y + height) // size
+
+    def _add_to_cells(self, item, cell_range):
+        x0, y0, x1, y1 = cell_range
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is None:
+                    self.cells[(cx, cy)] = {item}
+                else:
+                    bucket.add(item)
+
+    def _remove_from_cells(self, item, cell_range):
+        x0, y0, x1, y1 = cell_range
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.discard(item)
+                    if not bucket:
+                        del self.cells[(cx, cy)]
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+
+    def rebuild(self, positions, sizes):
+        """Index every position with its (width, height), sizing cells to the largest piece."""
+        self.clear()
+        self.cell_size = max([1] + [max(width, height) for width, height in sizes])
+        for item, ((x, y), (width, height)) in enumerate(zip(positions, sizes)):
+            self.insert(item, x, y, width, height)
+
+    def insert(self, item, x, y, width, height):
+        if item in self.rects:
+            self.remove(item)
+        self.rects[item] = (x, y, width, height)
+        self._add_to_cells(item, self._cell_range(x, y, width, height))
+
+    def remove(self, item):
+        rect = self.rects.pop(item, None)
+        if rect is not None:
+            self._remove_from_cells(item, self._cell_range(*rect))
+
+    def move(self, item, x, y):
+        """Move an item, only touching the buckets it enters or leaves."""
+        old_x, old_y, width, height = self.rects[item]
+        old_range = self._cell_range(old_x, old_y, width, height)
+        new_range = self._cell_range(x, y, width, height)
+        self.rects[item] = (x, y, width, height)
+        if old_range != new_range:
+            self._remove_from_cells(item, old_range)
+            self._add_to_cells(item, new_range)
+
+    def query_point(self, px, py):
+        """Return the ids of every item whose rect contains the point."""
+        size = self.cell_size
+        bucket = self.cells.get((px // size, py // size), ())
+        hits = []
+        for item in bucket:
+            x, y, width, height = self.rects[item]
+            if x <= px <= x + width and y <= py <= y + height:
+                hits.append(item)
+        return hits
+
+    def query_rect(self, x, y, width, height):
+        """Return the ids of every item whose rect overlaps the given rect."""
+        x0, y0, x1, y1 = self._cell_range(x, y, width, height)
+        found = set()
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        hits = set()
+        for item in found:
+            ix, iy, iw, ih = self.rects[item]
+            if ix <= x + width and x <= ix + iw and iy <= y + height and y <= iy + ih:
+                hits.add(item)
+        return hits
+
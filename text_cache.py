@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """Rendered text surfaces of one font, keyed by string and colour.
+
+    Text drawn every frame (the timer, the loading and congratulations
+    messages) is only rendered again when the string changes. The least
+    recently used surfaces are dropped once there are ``max_entries``. The
+    font itself is only loaded when the first string is rendered.
+    """
+
+    def __init__(self, name, size, max_entries=64, antialias=True):
+        self.name = name  # Font file, None for the default font
+        self.size = size
+        self.font = None
+        self.max_entries = max_entries
+        self.antialias = antialias
+        self.surfaces = OrderedDict()  # (text, colour) -> rendered surface
+
+    def render(self, text, color):
+        key = (text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        if self.font is None:
+            self.font = pygame.font.Font(self.name, self.size)
+        surface = self.font.render(text, self.antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface